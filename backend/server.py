@@ -1,14 +1,27 @@
 # backend/server.py
 from __future__ import annotations
-import asyncio, json
-from typing import List, Optional, AsyncIterator
+import asyncio, json, math, os, time
+from contextlib import AsyncExitStack, asynccontextmanager
+from typing import Any, Dict, List, Optional, AsyncIterator
 
-from fastapi import FastAPI
-from fastapi.responses import StreamingResponse
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from starlette.background import BackgroundTask
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 
-from src.agent_graph import app as agent_app
+from src.agent_graph import app as agent_app, compile_app, warm_up
+from src.agent_state import make_state
+from src.admission import admission, Overloaded, Ticket, THREADS
+from src.sessions import SessionLocks, open_checkpointer
+from src import wrappers, memory, telemetry, cassette
+from src.context import metrics as context_metrics
+from src.ledger import ledger
+from src.market import market
+from src.ratelimit import governor
+from src.response_cache import responses
 
 
 # ── 1. Pydantic schemas -------------------------------------------------
@@ -16,6 +29,7 @@ class ChatRequest(BaseModel):
     session: Optional[str] = None     # conversation ID (optional)
     message: str                      # the user prompt
     stream: bool = True               # default = SSE streaming
+    deadline_s: Optional[float] = None  # per‑request budget, capped at R0_DEADLINE_S
 
 class ChatResponse(BaseModel):
     result: str
@@ -33,33 +47,277 @@ api.add_middleware(
 )
 
 
-# helper: run LangGraph synchronously in a threadpool
-async def run_agent(prompt: str):
-    loop = asyncio.get_running_loop()
-    return await loop.run_in_executor(None, agent_app.invoke, {"text": prompt})
+@api.on_event("startup")
+async def _warm_up() -> None:
+    # dedicated, bounded pool for the blocking work of graph runs (to_thread)
+    asyncio.get_running_loop().set_default_executor(
+        ThreadPoolExecutor(THREADS, thread_name_prefix="r0-agent"))
+    await _session_app()
+    market.start()                                 # no‑op unless R0_WATCHLIST is set
+    # eager init keeps the first request fast; R0_WARMUP=0 for instant boot
+    if os.getenv("R0_WARMUP", "1") == "1":
+        await asyncio.to_thread(warm_up)
+
+
+@api.on_event("shutdown")
+async def _close_clients() -> None:
+    await asyncio.to_thread(market.stop)
+    await wrappers.aclose()
+    await asyncio.to_thread(memory.writer.close)   # flush pending memories
+    cassette.tape.close()
+    if _sessions["saver"] is not None and hasattr(_sessions["saver"], "conn"):
+        await _sessions["saver"].conn.close()      # sqlite session store
+
+
+# ── sessions: checkpointed graph + one in‑flight turn per session ──────
+_sessions: Dict[str, Any] = {"app": None, "saver": None}
+_sessions_init = asyncio.Lock()
+_session_lock  = SessionLocks()
+
+
+async def _session_app():
+    if _sessions["app"] is None:
+        async with _sessions_init:
+            if _sessions["app"] is None:
+                _sessions["saver"] = await open_checkpointer()
+                _sessions["app"]   = compile_app(_sessions["saver"])
+    return _sessions["app"]
+
+
+@asynccontextmanager
+async def _turn(session: Optional[str], locked: bool = False):
+    """
+    (graph, config) for one turn; stateless when there is no session id.
+    `locked`: the caller already holds the session lock (`_session_turn`).
+    """
+    if session is None:
+        yield agent_app, None
+        return
+    graph  = await _session_app()
+    config = {"configurable": {"thread_id": session}}
+    if locked:
+        yield graph, config
+        return
+    async with _session_lock(session):             # turns of a session run in order
+        yield graph, config
+
+
+@asynccontextmanager
+async def _session_turn(session: Optional[str], budget: float):
+    """
+    Hold the session lock, waiting at most `budget` s for the session's
+    previous turn.  `/chat` takes it *before* an admission slot, so a
+    follow‑up never sits on a slot (or in its hold‑time average) while
+    the earlier turn finishes.
+    """
+    if session is None:
+        yield
+        return
+    lock = _session_lock(session)
+    try:
+        async with asyncio.timeout(budget):
+            await lock.acquire()
+    except TimeoutError:
+        raise Overloaded(503, "previous turn of this session is still running",
+                         admission.turn_s) from None
+    try:
+        yield
+    finally:
+        lock.release()
+
+
+# helper: run LangGraph natively on the event loop (async nodes + httpx)
+async def run_agent(prompt: str, session: Optional[str] = None, locked: bool = False):
+    t0 = time.perf_counter()
+    with telemetry.span("turn", mode="invoke"):
+        async with _turn(session, locked) as (graph, config):
+            state = await graph.ainvoke(make_state(prompt), config)
+    cassette.tape.turn(prompt, session, state.get("result"), (time.perf_counter() - t0) * 1000)
+    return state
+
+
+# ── 3. SSE streaming ----------------------------------------------------
+FRAME_CHARS = int(os.getenv("R0_SSE_FRAME_CHARS", "24"))    # flush at this size …
+FRAME_MS    = float(os.getenv("R0_SSE_FRAME_MS", "40"))     # … or this age
+
+
+def _sse(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+class _TokenFramer:
+    """Coalesce LLM tokens into frames of ~FRAME_CHARS chars / FRAME_MS ms."""
+
+    def __init__(self):
+        self.buf: List[str] = []
+        self.size  = 0
+        self.since = 0.0
 
+    def push(self, text: str) -> Optional[str]:
+        if not self.buf:
+            self.since = time.monotonic()
+        self.buf.append(text)
+        self.size += len(text)
+        if self.size >= FRAME_CHARS or (time.monotonic() - self.since) * 1000 >= FRAME_MS:
+            return self.flush()
+        return None
 
-# ── 3. /chat endpoint ---------------------------------------------------
+    def flush(self) -> Optional[str]:
+        if not self.buf:
+            return None
+        frame, self.buf, self.size = "".join(self.buf), [], 0
+        return frame
+
+
+async def stream_agent(prompt: str, session: Optional[str] = None,
+                       ticket: Optional[Ticket] = None,
+                       locked: bool = False) -> AsyncIterator[str]:
+    """
+    Live progress of one graph run as SSE:
+
+    • `node`       – a node finished            {"node": "think"}
+    • `tool_start` / `tool_end` – per tool call  {"tool", "args"} / {"tool", "ok", "ms"}
+    • `token`      – LLM text as it is produced  {"text": "…"}
+    • `result`     – final answer + recalls     {"result", "recalled"}
+    • `error`      – failure / deadline         {"error": "…"}
+    • `done`       – end of stream              [DONE]
+
+    With a `ticket` the run is cancelled at its deadline and the admission
+    slot is released when the stream ends.  `locked` as for `_turn`.
+    """
+    framer = _TokenFramer()
+    final: Dict[str, Any] = {}
+    t0 = time.perf_counter()
+    try:
+        async with asyncio.timeout(ticket.remaining() if ticket else None), \
+                telemetry.span("turn", mode="stream"):
+            async with _turn(session, locked) as (graph, config):
+                async for mode, chunk in graph.astream(
+                    make_state(prompt), config, stream_mode=["messages", "updates", "custom"],
+                ):
+                    if mode == "messages":
+                        msg, meta = chunk
+                        if meta.get("langgraph_node") == "think" and isinstance(msg.content, str) and msg.content:
+                            frame = framer.push(msg.content)
+                            if frame:
+                                yield _sse("token", {"text": frame})
+                        continue
+
+                    frame = framer.flush()
+                    if frame:
+                        yield _sse("token", {"text": frame})
+                    if mode == "updates":
+                        for node, update in chunk.items():
+                            final.update(update or {})
+                            yield _sse("node", {"node": node})
+                    else:                              # custom: tool events
+                        yield _sse(chunk.pop("event", "progress"), chunk)
+
+        frame = framer.flush()
+        if frame:
+            yield _sse("token", {"text": frame})
+        yield _sse("result", {"result": str(final.get("result", "")),
+                              "recalled": final.get("recalled", [])})
+        cassette.tape.turn(prompt, session, final.get("result"),
+                           (time.perf_counter() - t0) * 1000)
+    except TimeoutError:
+        yield _sse("error", {"error": "deadline exceeded"})
+    except Exception as exc:                       # surface, then close cleanly
+        yield _sse("error", {"error": str(exc)})
+    finally:
+        if ticket is not None:
+            admission.release(ticket)
+    yield "event: done\ndata: [DONE]\n\n"
+
+
+# ── 4. /chat endpoint ---------------------------------------------------
 @api.post("/chat", response_model=ChatResponse)
 async def chat(payload: ChatRequest):              # ← body is ChatRequest
-    state = await run_agent(payload.message)
+    # checked here, not by the schema: a 422 echoing the value can't encode inf / nan
+    if payload.deadline_s is not None and not 0 < payload.deadline_s < math.inf:
+        raise HTTPException(422, "deadline_s must be a positive, finite number of seconds")
+    start  = time.monotonic()
+    budget = admission.budget(payload.deadline_s)
+    held   = AsyncExitStack()                      # session lock, then the slot
+    try:
+        await held.enter_async_context(_session_turn(payload.session, budget))
+        ticket = await admission.admit(payload.message, budget - (time.monotonic() - start))
+    except Overloaded as exc:                      # fast 429 / 503, never a long queue
+        await held.aclose()
+        raise HTTPException(exc.status, exc.reason,
+                            headers={"Retry-After": str(exc.retry_after_s)})
+    except BaseException:                          # client went away while waiting
+        await held.aclose()
+        raise
+    held.callback(admission.release, ticket)
+
+    if payload.stream:
+        return StreamingResponse(stream_agent(payload.message, payload.session, ticket,
+                                              locked=True),
+                                 media_type="text/event-stream",
+                                 # also frees slot + lock if the stream never starts
+                                 background=BackgroundTask(held.aclose))
+
+    try:
+        async with asyncio.timeout(ticket.remaining()):
+            state = await run_agent(payload.message, payload.session, locked=True)
+    except TimeoutError:
+        raise HTTPException(504, "deadline exceeded")
+    finally:
+        await held.aclose()
     result   = str(state.get("result", ""))
     recalled = state.get("recalled", [])
+    return ChatResponse(result=result, recalled=recalled)
 
-    if payload.stream:
-        async def token_gen() -> AsyncIterator[str]:
-            for ch in result:                      # naive char‑stream
-                yield f"data: {ch}\n\n"
-                await asyncio.sleep(0)
-            yield "event: done\ndata: [DONE]\n\n"
 
-        return StreamingResponse(token_gen(),
-                                 media_type="text/event-stream")
+@api.get("/limits")
+async def limits() -> Dict[str, Dict[str, float]]:
+    """Client‑side rate governor: tokens, current rate and waiters per bucket."""
+    return governor.levels()
 
-    return ChatResponse(result=result, recalled=recalled)
+
+def _gauges():
+    """Point‑in‑time state of the caches, buckets and queues for /metrics."""
+    for bucket, lv in governor.levels().items():
+        yield "r0_rate_tokens", {"bucket": bucket}, lv["tokens"]
+        yield "r0_rate_per_s", {"bucket": bucket}, lv["rate"]
+        yield "r0_rate_waiting", {"bucket": bucket}, lv["waiting"]
+        yield "r0_rate_throttles_total", {"bucket": bucket}, lv["throttles"]
+    for k, v in responses.stats().items():
+        yield f"r0_response_cache_{k}", {}, v
+    for k, v in ledger.stats().items():
+        yield f"r0_ledger_{k}", {}, v
+    ctx = context_metrics.snapshot()
+    for src, n in ctx["tokens_out"].items():
+        yield "r0_context_tokens_total", {"source": src}, n
+    for src, n in ctx["truncations"].items():
+        yield "r0_context_truncations_total", {"source": src}, n
+    if memory.emb is not None:
+        yield "r0_embed_cache_hits_total", {}, memory.emb.hits
+        yield "r0_embed_cache_misses_total", {}, memory.emb.misses
+    yield "r0_memory_write_queue", {}, memory.writer.pending
+    adm = admission.stats()
+    yield "r0_admission_busy", {}, adm["busy"]
+    yield "r0_admission_queued", {"priority": "order"}, adm["queued_orders"]
+    yield "r0_admission_queued", {"priority": "normal"}, adm["queued"]
+    yield "r0_admission_turn_seconds", {}, adm["turn_s"]
+    yield "r0_admission_admitted_total", {}, adm["admitted"]
+    yield "r0_admission_expired_total", {}, adm["expired"]
+    for status in (429, 503):
+        yield "r0_admission_rejected_total", {"status": status}, adm[f"rejected_{status}"]
+
+
+telemetry.gauges(_gauges)
+
+
+@api.get("/metrics", response_class=PlainTextResponse)
+async def metrics() -> PlainTextResponse:
+    """Prometheus exposition: span histograms, counters and the gauges above."""
+    return PlainTextResponse(telemetry.registry.render(),
+                             media_type="text/plain; version=0.0.4")
 
 
-# ── 4. Local dev runner -------------------------------------------------
+# ── 5. Local dev runner -------------------------------------------------
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run("backend.server:api", host="0.0.0.0", port=8000, reload=True)
@@ -0,0 +1,233 @@
+# bench/e2e.py
+"""
+End‑to‑end benchmark – runs offline against local stand‑ins:
+
+* exchange  – `bench.mock_exchange.MockExchange` (latency / error / 429 injection)
+* LLM       – `bench.fakes.ScriptedChat` (scripted tool calls, fixed think time)
+* memory    – the local NumPy backend in memory (`R0_MEMORY_PATH=""`) with
+              hash embeddings, i.e. no Pinecone / OpenAI
+
+Measures
+
+* turns  – per scenario: end‑to‑end latency of `app.ainvoke` and per‑node
+           latency (gaps between `astream` updates), plus exchange calls
+* load   – concurrent `POST /chat` (non‑streaming) through the FastAPI app
+           in process: throughput, latency percentiles, failures
+* alloc  – tracemalloc over a batch of turns: peak, retained bytes per
+           turn and the top allocation sites
+* spans  – the `src.telemetry` histograms of the whole run (per tool,
+           HTTP endpoint, embedding / vector call …)
+
+    python -m bench.e2e                                   # JSON to stdout
+    python -m bench.e2e --latency-ms 30 --llm-ms 200 --out run.json
+    python -m bench.e2e --out new.json --compare run.json # medians vs. a previous run
+"""
+from __future__ import annotations
+
+import os
+
+for _k, _v in {"R0_MEMORY_BACKEND": "local", "R0_MEMORY_PATH": "", "R0_EMBEDDINGS": "hash",
+               "R0_TOKENIZER": "heuristic", "R0_RESPONSE_CACHE": "0", "R0_WARMUP": "0",
+               "ROOSTOO_RATE_LIMIT": "0", "OPENAI_API_KEY": "bench",
+               "ROOSTOO_KEY": "bench", "ROOSTOO_SECRET": "bench"}.items():
+    os.environ.setdefault(_k, _v)       # before any src import reads them
+
+import argparse, asyncio, json, platform, statistics, subprocess, sys, time
+import tracemalloc
+from typing import Any, Dict, List
+
+from bench.fakes import Script, ScriptedChat
+from bench.mock_exchange import MockExchange
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCENARIOS: Dict[str, Script] = {
+    "BTC/USD price": Script(),                                   # fast path, no LLM
+    "hello, what can you do?": Script(answer="I can look up prices and trade."),
+    "How is my portfolio doing today?": Script(
+        calls=[("getBalance", {}), ("getTicker", {"pair": "BTC/USD"}),
+               ("getTicker", {"pair": "ETH/USD"})],
+        answer="You hold BTC and ETH; both are roughly flat today."),
+    "Buy a little BTC for me please": Script(
+        calls=[("placeOrder", {"pair": "BTC/USD", "side": "BUY", "type": "MARKET",
+                               "quantity": "0.001"})],
+        answer="Bought 0.001 BTC."),
+    "Summarise my trading so far": Script(
+        calls=[("getOrderSummary", {})], answer="You have a handful of BTC fills."),
+}
+NAMES = {"BTC/USD price": "fast_path", "hello, what can you do?": "llm_only",
+         "How is my portfolio doing today?": "parallel_reads",
+         "Buy a little BTC for me please": "order", "Summarise my trading so far": "history"}
+
+
+def _pct(values: List[float]) -> Dict[str, float]:
+    if not values:
+        return {}
+    s = sorted(values)
+    at = lambda q: s[min(len(s) - 1, int(round(q * (len(s) - 1))))]
+    return {"n": len(s), "mean": round(statistics.fmean(s), 3), "p50": round(at(0.5), 3),
+            "p95": round(at(0.95), 3), "p99": round(at(0.99), 3), "max": round(s[-1], 3)}
+
+
+# ── measurements ──────────────────────────────────────────────────────
+async def _turn(app, prompt: str, nodes: Dict[str, List[float]]) -> float:
+    from src.agent_state import make_state
+    t0 = last = time.perf_counter()
+    async for chunk in app.astream(make_state(prompt), stream_mode="updates"):
+        now = time.perf_counter()
+        for node in chunk:
+            nodes.setdefault(node, []).append((now - last) * 1000)
+        last = now
+    return (time.perf_counter() - t0) * 1000
+
+
+async def bench_turns(app, exchange: MockExchange, turns: int) -> Dict[str, Any]:
+    out: Dict[str, Any] = {}
+    for prompt in SCENARIOS:
+        await _turn(app, prompt, {})                       # warm caches / connections
+        before = sum(exchange.counts.values())
+        nodes: Dict[str, List[float]] = {}
+        e2e = [await _turn(app, prompt, nodes) for _ in range(turns)]
+        out[NAMES[prompt]] = {
+            "e2e_ms": _pct(e2e),
+            "nodes_ms": {n: _pct(v) for n, v in nodes.items()},
+            "exchange_calls_per_turn": round((sum(exchange.counts.values()) - before) / turns, 2),
+        }
+    return out
+
+
+async def bench_load(requests: int, concurrency: int) -> Dict[str, Any]:
+    import httpx
+    from backend.server import api
+
+    prompts = list(SCENARIOS)
+    sem = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    failures = 0
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=api),
+                                 base_url="http://bench", timeout=60) as client:
+        async def one(i: int) -> None:
+            nonlocal failures
+            async with sem:
+                t0 = time.perf_counter()
+                r = await client.post("/chat", json={"message": prompts[i % len(prompts)],
+                                                     "stream": False})
+                latencies.append((time.perf_counter() - t0) * 1000)
+                if r.status_code != 200:
+                    failures += 1
+
+        t0 = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(requests)))
+        wall = time.perf_counter() - t0
+    return {"requests": requests, "concurrency": concurrency, "failures": failures,
+            "wall_s": round(wall, 3), "throughput_rps": round(requests / wall, 2),
+            "latency_ms": _pct(latencies)}
+
+
+async def bench_alloc(app, turns: int, top: int) -> Dict[str, Any]:
+    prompts = list(SCENARIOS)
+    for p in prompts:                                      # steady state first
+        await _turn(app, p, {})
+    tracemalloc.start(10)
+    base = tracemalloc.take_snapshot()
+    tracemalloc.reset_peak()
+    start_cur, _ = tracemalloc.get_traced_memory()
+    for i in range(turns):
+        await _turn(app, prompts[i % len(prompts)], {})
+    cur, peak = tracemalloc.get_traced_memory()
+    diff = tracemalloc.take_snapshot().compare_to(base, "lineno")
+    tracemalloc.stop()
+    return {
+        "turns": turns,
+        "peak_kib": round((peak - start_cur) / 1024, 1),
+        "retained_bytes_per_turn": round((cur - start_cur) / turns),
+        "top_sites": [{"site": str(d.traceback[0]), "size_kib": round(d.size_diff / 1024, 1),
+                       "blocks": d.count_diff} for d in diff[:top]],
+    }
+
+
+# ── driver ────────────────────────────────────────────────────────────
+def _meta(args: argparse.Namespace) -> Dict[str, Any]:
+    try:
+        rev = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                             capture_output=True, text=True).stdout.strip()
+    except OSError:
+        rev = ""
+    return {"git": rev, "python": platform.python_version(), "machine": platform.machine(),
+            "cpus": os.cpu_count(), "started": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "config": {k: v for k, v in vars(args).items() if k not in ("out", "compare")}}
+
+
+def compare(new: Dict[str, Any], old: Dict[str, Any]) -> Dict[str, Any]:
+    """p50 / throughput of `new` relative to `old` (negative % = faster)."""
+    rel = lambda a, b: round((a - b) / b * 100, 1) if b else None
+    out: Dict[str, Any] = {"turn_p50_pct": {}}
+    for name, res in new.get("turns", {}).items():
+        prev = old.get("turns", {}).get(name)
+        if prev:
+            out["turn_p50_pct"][name] = rel(res["e2e_ms"]["p50"], prev["e2e_ms"]["p50"])
+    if "load" in new and "load" in old:
+        out["throughput_pct"] = rel(new["load"]["throughput_rps"], old["load"]["throughput_rps"])
+    if "alloc" in new and "alloc" in old:
+        out["retained_per_turn_pct"] = rel(new["alloc"]["retained_bytes_per_turn"],
+                                           old["alloc"]["retained_bytes_per_turn"] or 1)
+    return out
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    import src.wrappers as w
+    from src import nodes, telemetry
+    from src.agent_graph import app
+
+    report: Dict[str, Any] = {"meta": _meta(args)}
+    with MockExchange(args.latency_ms, args.jitter_ms, args.error_rate,
+                      args.throttle_rate, seed=args.seed) as exchange:
+        w.BASE = exchange.url
+        nodes.llm = ScriptedChat(scripts=SCENARIOS, llm_ms=args.llm_ms)
+        telemetry.registry.reset()
+        if args.turns:
+            report["turns"] = await bench_turns(app, exchange, args.turns)
+        if args.requests:
+            report["load"] = await bench_load(args.requests, args.concurrency)
+        if args.alloc_turns:
+            report["alloc"] = await bench_alloc(app, args.alloc_turns, args.top)
+        report["spans"] = telemetry.registry.snapshot()
+        report["exchange"] = {"requests": dict(exchange.counts), "injected": exchange.injected}
+        await w.aclose()
+    return report
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__,
+                                 formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--turns", type=int, default=20, help="timed turns per scenario (0 = skip)")
+    ap.add_argument("--requests", type=int, default=100, help="/chat requests for the load test")
+    ap.add_argument("--concurrency", type=int, default=16)
+    ap.add_argument("--alloc-turns", type=int, default=20)
+    ap.add_argument("--top", type=int, default=10, help="allocation sites to report")
+    ap.add_argument("--latency-ms", type=float, default=20)
+    ap.add_argument("--jitter-ms", type=float, default=5)
+    ap.add_argument("--error-rate", type=float, default=0.0)
+    ap.add_argument("--throttle-rate", type=float, default=0.0)
+    ap.add_argument("--llm-ms", type=float, default=50)
+    ap.add_argument("--seed", type=int, default=7)
+    ap.add_argument("--out", help="also write the JSON report here")
+    ap.add_argument("--compare", help="previous JSON report to diff against")
+    args = ap.parse_args()
+
+    report = asyncio.run(run(args))
+    if args.compare:
+        with open(args.compare) as f:
+            report["compare"] = compare(report, json.load(f))
+
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(text + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
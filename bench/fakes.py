@@ -0,0 +1,63 @@
+# bench/fakes.py
+"""
+Scripted stand‑in for the chat model.
+
+`ScriptedChat` answers think_node without a network call.  Each prompt
+maps to a `Script`: the tool calls to emit on the first think pass and
+the text to answer with once results are in.  A pass is "first" when the
+prompt arrives with no assistant message before it – think_node adds the
+tool result (and recalls) as assistant messages on later passes, so the
+script needs no per‑conversation state and is safe under concurrency.
+
+`llm_ms` adds a fixed think time per call (sleep / asyncio.sleep), so a
+run can model a real model's latency without depending on one.
+"""
+from __future__ import annotations
+
+import asyncio, itertools, time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Tuple
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+_ids = itertools.count()
+
+
+@dataclass
+class Script:
+    calls: List[Tuple[str, Dict[str, Any]]] = field(default_factory=list)
+    answer: str = "Done."
+
+
+class ScriptedChat(BaseChatModel):
+    scripts: Dict[str, Script]
+    default: Script = Script()
+    llm_ms: float = 0.0
+    calls: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted"
+
+    def _reply(self, messages: List[BaseMessage]) -> AIMessage:
+        self.calls += 1
+        prompt = next((m.content for m in reversed(messages) if isinstance(m, HumanMessage)), "")
+        script = self.scripts.get(prompt, self.default)
+        first = not any(isinstance(m, AIMessage) for m in messages)
+        if first and script.calls:
+            return AIMessage(content="", tool_calls=[
+                {"name": name, "args": args, "id": f"call_{next(_ids)}"}
+                for name, args in script.calls])
+        return AIMessage(content=script.answer)
+
+    def _generate(self, messages, stop=None, run_manager=None, **kw) -> ChatResult:
+        if self.llm_ms:
+            time.sleep(self.llm_ms / 1000)
+        return ChatResult(generations=[ChatGeneration(message=self._reply(messages))])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kw) -> ChatResult:
+        if self.llm_ms:
+            await asyncio.sleep(self.llm_ms / 1000)
+        return ChatResult(generations=[ChatGeneration(message=self._reply(messages))])
@@ -0,0 +1,244 @@
+# bench/mock_exchange.py
+"""
+Local stand‑in for the Roostoo v3 API.
+
+Serves every endpoint `src/wrappers.py` talks to from a thread‑per‑request
+HTTP server on 127.0.0.1, with a small in‑memory account so orders,
+balances and queries stay consistent:
+
+* serverTime, exchangeInfo, ticker (one pair or all; prices random‑walk)
+* balance, pending_count
+* place_order (MARKET fills at the last price, LIMIT rests),
+  query_order (order_id / pair / pending_only / offset / limit),
+  cancel_order (one, a pair, or everything)
+
+Injected faults, per request: `latency_ms` ± `jitter_ms`, `error_rate`
+(HTTP 500) and `throttle_rate` (HTTP 429 with `Retry-After`).
+Signatures are not checked.
+
+    with MockExchange(latency_ms=20, error_rate=0.01) as ex:
+        wrappers.BASE = ex.url
+"""
+from __future__ import annotations
+
+import json, random, threading, time, urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional, Tuple
+
+PAIRS = {   # pair → (start price, price precision, amount precision, min order)
+    "BTC/USD": (60_000.0, 2, 5, 1.0),
+    "ETH/USD": (3_000.0, 2, 4, 1.0),
+    "SOL/USD": (150.0, 3, 2, 1.0),
+    "DOGE/USD": (0.15, 5, 0, 1.0),
+}
+FEE = 0.001
+
+
+class MockExchange:
+    def __init__(self, latency_ms: float = 0.0, jitter_ms: float = 0.0,
+                 error_rate: float = 0.0, throttle_rate: float = 0.0,
+                 retry_after_s: float = 0.1, seed: int = 7):
+        self.latency_ms, self.jitter_ms = latency_ms, jitter_ms
+        self.error_rate, self.throttle_rate = error_rate, throttle_rate
+        self.retry_after_s = retry_after_s
+        self.rng    = random.Random(seed)
+        self.lock   = threading.Lock()
+        self.prices = {p: v[0] for p, v in PAIRS.items()}
+        self.volume = {p: 0.0 for p in PAIRS}
+        self.wallet = {"USD": {"Free": 1_000_000.0, "Lock": 0.0},
+                       **{p.split("/")[0]: {"Free": 10.0, "Lock": 0.0} for p in PAIRS}}
+        self.orders: Dict[int, dict] = {}
+        self.next_id = 1
+        self.counts: Dict[str, int] = {}
+        self.injected = {"error": 0, "throttle": 0}
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    # ── lifecycle ─────────────────────────────────────────────────────
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v3"
+
+    def start(self) -> "MockExchange":
+        exchange = self
+
+        class Handler(_Handler):
+            ex = exchange
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name="mock-exchange",
+                         daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self) -> "MockExchange":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    # ── faults ────────────────────────────────────────────────────────
+    def fault(self) -> Optional[Tuple[int, dict, Dict[str, str]]]:
+        with self.lock:
+            delay = max(0.0, self.latency_ms + self.rng.uniform(-self.jitter_ms, self.jitter_ms))
+            roll = self.rng.random()
+            kind = ("throttle" if roll < self.throttle_rate else
+                    "error" if roll < self.throttle_rate + self.error_rate else None)
+            if kind:
+                self.injected[kind] += 1
+        time.sleep(delay / 1000)
+        if kind == "throttle":
+            return 429, {"Success": False, "ErrMsg": "too many requests"}, \
+                {"Retry-After": f"{self.retry_after_s:g}"}
+        if kind == "error":
+            return 500, {"Success": False, "ErrMsg": "injected server error"}, {}
+        return None
+
+    # ── endpoints ─────────────────────────────────────────────────────
+    @staticmethod
+    def _ok(**body: Any) -> dict:
+        return {"Success": True, "ErrMsg": "", **body}
+
+    def _tick(self, pair: str) -> dict:
+        px = self.prices[pair] = self.prices[pair] * (1 + self.rng.gauss(0, 0.0005))
+        self.volume[pair] += abs(self.rng.gauss(0, 1))
+        return {"MaxBid": px * 0.9995, "MinAsk": px * 1.0005, "LastPrice": px,
+                "Change": self.rng.uniform(-0.05, 0.05), "CoinTradeValue": self.volume[pair],
+                "UnitTradeValue": self.volume[pair] * px}
+
+    def handle(self, endpoint: str, q: Dict[str, str]) -> Tuple[int, dict]:
+        now = int(time.time() * 1000)
+        with self.lock:
+            if endpoint == "serverTime":
+                return 200, {"ServerTime": now}
+            if endpoint == "exchangeInfo":
+                return 200, {"IsRunning": True, "TradePairs": {
+                    p: {"Coin": p.split("/")[0], "PricePrecision": pp, "AmountPrecision": ap,
+                        "MiniOrder": mo, "CanTrade": True}
+                    for p, (_, pp, ap, mo) in PAIRS.items()}}
+            if endpoint == "ticker":
+                pairs = [q["pair"]] if "pair" in q else list(PAIRS)
+                if any(p not in PAIRS for p in pairs):
+                    return 200, {"Success": False, "ErrMsg": "invalid pair", "Data": {}}
+                return 200, self._ok(ServerTime=now, Data={p: self._tick(p) for p in pairs})
+            if endpoint == "balance":
+                return 200, self._ok(Wallet={c: dict(b) for c, b in self.wallet.items()})
+            if endpoint == "pending_count":
+                pend = [o for o in self.orders.values() if o["Status"] == "PENDING"]
+                pairs: Dict[str, int] = {}
+                for o in pend:
+                    pairs[o["Pair"]] = pairs.get(o["Pair"], 0) + 1
+                return 200, self._ok(TotalPending=len(pend), OrderPairs=pairs)
+            if endpoint == "place_order":
+                return self._place(q, now)
+            if endpoint == "query_order":
+                return self._query(q)
+            if endpoint == "cancel_order":
+                return self._cancel(q, now)
+        return 404, {"Success": False, "ErrMsg": f"unknown endpoint {endpoint}"}
+
+    def _place(self, q: Dict[str, str], now: int) -> Tuple[int, dict]:
+        pair, side, otype = q.get("pair"), q.get("side"), q.get("type")
+        if pair not in PAIRS:
+            return 200, {"Success": False, "ErrMsg": "invalid pair"}
+        qty = float(q.get("quantity", 0))
+        coin, unit = pair.split("/")
+        px = self.prices[pair]
+        order = {"Pair": pair, "OrderID": self.next_id, "Side": side, "Type": otype,
+                 "StopType": "GTC", "Quantity": qty, "CreateTimestamp": now,
+                 "FinishTimestamp": 0, "FilledQuantity": 0.0, "FilledAverPrice": 0.0,
+                 "CoinChange": 0.0, "UnitChange": 0.0, "CommissionCoin": unit,
+                 "CommissionChargeValue": 0.0, "CommissionPercent": FEE, "Role": "TAKER"}
+        if otype == "MARKET":
+            value = qty * px
+            need = (unit, value) if side == "BUY" else (coin, qty)
+            if self.wallet[need[0]]["Free"] < need[1]:
+                return 200, {"Success": False, "ErrMsg": "insufficient balance"}
+            fee = value * FEE
+            sign = 1 if side == "BUY" else -1
+            self.wallet[coin]["Free"] += sign * qty
+            self.wallet[unit]["Free"] -= sign * value + fee
+            order.update(Status="FILLED", Price=px, FilledQuantity=qty, FilledAverPrice=px,
+                         CoinChange=qty, UnitChange=value, CommissionChargeValue=fee,
+                         FinishTimestamp=now)
+        else:
+            price = float(q.get("price", 0))
+            lock = (unit, qty * price) if side == "BUY" else (coin, qty)
+            if self.wallet[lock[0]]["Free"] < lock[1]:
+                return 200, {"Success": False, "ErrMsg": "insufficient balance"}
+            self.wallet[lock[0]]["Free"] -= lock[1]
+            self.wallet[lock[0]]["Lock"] += lock[1]
+            order.update(Status="PENDING", Price=price, Role="MAKER")
+        self.orders[self.next_id] = order
+        self.next_id += 1
+        return 200, self._ok(OrderDetail=dict(order))
+
+    def _query(self, q: Dict[str, str]) -> Tuple[int, dict]:
+        if "order_id" in q:
+            rows = [self.orders[int(q["order_id"])]] if int(q["order_id"]) in self.orders else []
+        else:
+            rows = sorted(self.orders.values(), key=lambda o: -o["OrderID"])
+            if "pair" in q:
+                rows = [o for o in rows if o["Pair"] == q["pair"]]
+            if q.get("pending_only") == "TRUE":
+                rows = [o for o in rows if o["Status"] == "PENDING"]
+            offset = int(q.get("offset", 0))
+            rows = rows[offset: offset + int(q.get("limit", 100))]
+        if not rows:
+            return 200, {"Success": False, "ErrMsg": "no order matched"}
+        return 200, self._ok(OrderMatched=[dict(o) for o in rows])
+
+    def _cancel(self, q: Dict[str, str], now: int) -> Tuple[int, dict]:
+        pend = [o for o in self.orders.values() if o["Status"] == "PENDING"]
+        if "order_id" in q:
+            pend = [o for o in pend if o["OrderID"] == int(q["order_id"])]
+        elif "pair" in q:
+            pend = [o for o in pend if o["Pair"] == q["pair"]]
+        for o in pend:
+            coin, unit = o["Pair"].split("/")
+            c, amt = (unit, o["Quantity"] * o["Price"]) if o["Side"] == "BUY" else (coin, o["Quantity"])
+            self.wallet[c]["Lock"] -= amt
+            self.wallet[c]["Free"] += amt
+            o.update(Status="CANCELED", FinishTimestamp=now)
+        return 200, self._ok(CanceledList=[o["OrderID"] for o in pend])
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"          # keep‑alive, like the real API
+    ex: MockExchange
+
+    def log_message(self, *args) -> None:
+        pass
+
+    def _reply(self, status: int, body: dict, headers: Dict[str, str] | None = None) -> None:
+        raw = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(raw)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(raw)
+
+    def _serve(self, query: str) -> None:
+        endpoint = urllib.parse.urlparse(self.path).path.rsplit("/", 1)[-1]
+        with self.ex.lock:
+            self.ex.counts[endpoint] = self.ex.counts.get(endpoint, 0) + 1
+        fault = self.ex.fault()
+        if fault is not None:
+            return self._reply(*fault)
+        self._reply(*self.ex.handle(endpoint, dict(urllib.parse.parse_qsl(query))))
+
+    def do_GET(self) -> None:
+        self._serve(urllib.parse.urlparse(self.path).query)
+
+    def do_POST(self) -> None:
+        n = int(self.headers.get("Content-Length") or 0)
+        self._serve(self.rfile.read(n).decode())
+
@@ -0,0 +1,115 @@
+# bench/startup.py
+"""
+Cold‑start benchmark for the agent stack.
+
+Every sample runs in a fresh interpreter so nothing is cached:
+
+* import   – wall time of `import <module>` (default: backend.server)
+* warm_up  – per‑step cost of `src.agent_graph.warm_up()`, i.e. what the
+             first request pays when lazy init was not done eagerly
+* invoke   – optional: latency of the first `app.invoke` (`--invoke "…"`,
+             needs real credentials)
+
+    python -m bench.startup                     # 5 samples, JSON to stdout
+    python -m bench.startup --budget-ms 1500    # exit 1 if import is slower
+    python -m bench.startup --importtime 15     # top‑15 modules by import time
+"""
+from __future__ import annotations
+
+import argparse, json, os, statistics, subprocess, sys
+from typing import Any, Dict, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_PROBE = r"""
+import json, sys, time, warnings
+warnings.simplefilter("ignore")
+t0 = time.perf_counter()
+__import__(sys.argv[1])
+out = {"import_ms": (time.perf_counter() - t0) * 1000}
+if sys.argv[2] == "1":
+    from src.agent_graph import warm_up
+    t1 = time.perf_counter()
+    out["warm_up"] = warm_up()
+    out["warm_up_ms"] = (time.perf_counter() - t1) * 1000
+if sys.argv[3]:
+    from src.agent_graph import app
+    t2 = time.perf_counter()
+    app.invoke({"text": sys.argv[3]})
+    out["first_invoke_ms"] = (time.perf_counter() - t2) * 1000
+print(json.dumps(out))
+"""
+
+
+def _sample(module: str, warm: bool, prompt: str) -> Dict[str, Any]:
+    proc = subprocess.run(
+        [sys.executable, "-c", _PROBE, module, "1" if warm else "0", prompt],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def _importtime(module: str, top: int) -> List[Dict[str, Any]]:
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        head, cum_us, name = line.split("|", 2)
+        self_us = head.split(":", 1)[1]
+        rows.append({"module": name.strip(), "self_ms": int(self_us) / 1000,
+                     "cumulative_ms": int(cum_us) / 1000})
+    return sorted(rows, key=lambda r: r["self_ms"], reverse=True)[:top]
+
+
+def _summary(values: List[float]) -> Dict[str, float]:
+    return {"median": round(statistics.median(values), 2),
+            "min": round(min(values), 2), "max": round(max(values), 2)}
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--module", default="backend.server")
+    ap.add_argument("--samples", type=int, default=5)
+    ap.add_argument("--no-warm-up", action="store_true", help="only measure the import")
+    ap.add_argument("--invoke", default="", help="prompt for a first real app.invoke")
+    ap.add_argument("--importtime", type=int, default=0, metavar="N")
+    ap.add_argument("--budget-ms", type=float, default=0, help="fail if median import exceeds this")
+    ap.add_argument("--out", help="also write the JSON report here")
+    args = ap.parse_args()
+
+    runs = [_sample(args.module, not args.no_warm_up, args.invoke) for _ in range(args.samples)]
+    report: Dict[str, Any] = {
+        "module": args.module,
+        "samples": args.samples,
+        "import_ms": _summary([r["import_ms"] for r in runs]),
+    }
+    if not args.no_warm_up:
+        report["warm_up_ms"] = _summary([r["warm_up_ms"] for r in runs])
+        report["warm_up_steps_ms"] = {
+            step: round(statistics.median(r["warm_up"][step] for r in runs), 2)
+            for step in runs[0]["warm_up"]
+        }
+    if args.invoke:
+        report["first_invoke_ms"] = _summary([r["first_invoke_ms"] for r in runs])
+    if args.importtime:
+        report["slowest_imports"] = _importtime(args.module, args.importtime)
+
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(text + "\n")
+
+    if args.budget_ms and report["import_ms"]["median"] > args.budget_ms:
+        print(f"import budget exceeded: {report['import_ms']['median']} ms > {args.budget_ms} ms",
+              file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
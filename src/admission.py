@@ -0,0 +1,171 @@
+# src/admission.py
+"""
+Admission control for agent turns
+---------------------------------
+Keeps tail latency bounded under bursts instead of letting every request
+start a graph run at once:
+
+* **Slots** – at most `R0_AGENT_WORKERS` turns run concurrently; the
+  rest wait in a bounded queue.
+* **Fast rejection** – a request that finds the queue full gets 429, one
+  whose expected queue wait already exceeds its deadline gets 503 – both
+  immediately, with `Retry-After` estimated from the recent turn time.
+* **Priority** – order requests (buy / sell / cancel / place …) are
+  served before queued lookups and only count against each other for
+  the queue limit, so a burst of reads can't lock trading out.
+* **Deadlines** – every request has one (`R0_DEADLINE_S`, or its own,
+  capped at that); it covers queueing *and* the run.  Queue waits past
+  it are rejected with 503, and the server cancels a run that exceeds
+  it (504).  The server waits for a session's previous turn before
+  asking for a slot; that wait counts against the deadline too.
+
+The graph runs on the event loop; blocking work inside it (local vector
+search, checkpointing, sync fall‑backs) goes to the loop's default
+executor, which the server replaces with a dedicated pool of
+`R0_AGENT_THREADS` threads.
+
+    R0_AGENT_WORKERS=8      # concurrent graph runs
+    R0_AGENT_QUEUE=32       # waiting requests before 429
+    R0_AGENT_THREADS=16     # default executor of the server's event loop
+    R0_DEADLINE_S=60        # per‑request budget (queue + run)
+"""
+
+from __future__ import annotations
+
+import os, re, math, time, heapq, asyncio, itertools
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from src.telemetry import span
+
+WORKERS    = int(os.getenv("R0_AGENT_WORKERS", "8"))
+QUEUE      = int(os.getenv("R0_AGENT_QUEUE", "32"))
+THREADS    = int(os.getenv("R0_AGENT_THREADS", "16"))
+DEADLINE_S = float(os.getenv("R0_DEADLINE_S", "60"))
+
+ORDER, NORMAL = 0, 1                                # lower = served first
+_ORDER_WORDS = re.compile(r"\b(buy|sell|cancel|place|order|orders|trade|rebalance)\b", re.I)
+
+
+def priority(prompt: str) -> int:
+    return ORDER if _ORDER_WORDS.search(prompt) else NORMAL
+
+
+class Overloaded(Exception):
+    """Request not admitted; `status` is 429 or 503."""
+
+    def __init__(self, status: int, reason: str, retry_after_s: float):
+        super().__init__(reason)
+        self.status, self.reason = status, reason
+        self.retry_after_s = max(1, math.ceil(retry_after_s))
+
+
+@dataclass
+class Ticket:
+    """An admitted request: holds a slot until `admission.release(ticket)`."""
+    priority: int
+    deadline: float                                 # time.monotonic()
+    admitted: float = field(default_factory=time.monotonic)
+    released: bool = False
+
+    def remaining(self) -> float:
+        return max(0.0, self.deadline - time.monotonic())
+
+
+class Admission:
+    """Slot pool + priority wait queue on the event loop (not thread‑safe)."""
+
+    def __init__(self, workers: int = WORKERS, queue: int = QUEUE,
+                 deadline_s: float = DEADLINE_S):
+        self.workers, self.queue, self.deadline_s = workers, queue, deadline_s
+        self.busy = 0
+        self._waiting: List[tuple] = []             # heap of (priority, seq, future)
+        self._queued = {ORDER: 0, NORMAL: 0}
+        self._seq = itertools.count()
+        self.turn_s = 1.0                           # EWMA of slot hold time
+        self.admitted = self.expired = 0
+        self.rejected: Dict[int, int] = {429: 0, 503: 0}
+
+    # ── estimates ─────────────────────────────────────────────────────
+    def expected_wait(self, prio: int) -> float:
+        ahead = self._queued[ORDER] + (self._queued[NORMAL] if prio == NORMAL else 0)
+        if self.busy < self.workers and not ahead:
+            return 0.0
+        return self.turn_s * (ahead + 1) / max(1, self.workers)
+
+    def _reject(self, status: int, reason: str, prio: int) -> Overloaded:
+        self.rejected[status] += 1
+        return Overloaded(status, reason, self.expected_wait(prio))
+
+    def budget(self, deadline_s: Optional[float] = None) -> float:
+        """A request's own deadline, capped at the default one."""
+        return self.deadline_s if deadline_s is None else min(deadline_s, self.deadline_s)
+
+    # ── admit / release ───────────────────────────────────────────────
+    async def admit(self, prompt: str, deadline_s: Optional[float] = None) -> Ticket:
+        """A slot for `prompt`, or `Overloaded` – never waits past the deadline."""
+        budget = self.budget(deadline_s)
+        prio = priority(prompt)
+        ticket = Ticket(prio, time.monotonic() + budget)
+        if self.busy < self.workers and not any(self._queued.values()):
+            self.busy += 1
+            self.admitted += 1
+            return ticket
+
+        limit = self._queued[ORDER] if prio == ORDER else sum(self._queued.values())
+        if limit >= self.queue:
+            raise self._reject(429, "agent queue is full", prio)
+        if self.expected_wait(prio) > budget:
+            raise self._reject(503, "expected queue wait exceeds the deadline", prio)
+
+        fut = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiting, (prio, next(self._seq), fut))
+        self._queued[prio] += 1
+        try:
+            with span("queue", priority="order" if prio == ORDER else "normal"):
+                await asyncio.wait_for(asyncio.shield(fut), ticket.remaining())
+        except asyncio.TimeoutError:
+            if not fut.done():
+                fut.cancel()                        # skipped when slots are handed out
+                self._queued[prio] -= 1
+                self.expired += 1
+                raise self._reject(503, "deadline expired while queued", prio)
+        except asyncio.CancelledError:              # client went away
+            if fut.done() and not fut.cancelled():
+                self._release_slot()                # the slot reached us anyway: pass it on
+            else:
+                fut.cancel()
+                self._queued[prio] -= 1
+            raise
+        self.admitted += 1
+        ticket.admitted = time.monotonic()
+        return ticket
+
+    def release(self, ticket: Ticket) -> None:
+        """Give the slot back (idempotent)."""
+        if ticket.released:
+            return
+        ticket.released = True
+        held = time.monotonic() - ticket.admitted
+        self.turn_s = 0.8 * self.turn_s + 0.2 * held
+        self._release_slot()
+
+    def _release_slot(self) -> None:
+        while self._waiting:                        # hand the slot straight to the next waiter
+            prio, _, fut = heapq.heappop(self._waiting)
+            if fut.cancelled():
+                continue
+            self._queued[prio] -= 1
+            fut.set_result(None)
+            return
+        self.busy -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {"workers": self.workers, "busy": self.busy,
+                "queued_orders": self._queued[ORDER], "queued": self._queued[NORMAL],
+                "turn_s": round(self.turn_s, 3), "admitted": self.admitted,
+                "expired": self.expired, "rejected_429": self.rejected[429],
+                "rejected_503": self.rejected[503]}
+
+
+admission = Admission()
@@ -4,42 +4,89 @@
 Execution graph for R0, the Roostoo trading agent.
 
 Flow:
+        ┌────────────┐  fresh answer for the same read‑only prompt
+        │  cache     │ ─────────────────────────► (END)
+        └────┬───────┘
+             │   miss
+             ▼
+        ┌────────────┐  answered from a template
+        │  route     │ ─────────────────────────► (END)
+        └────┬───────┘  — LLM‑free fast path for trivial lookups
+             │   otherwise
+             ▼
         ┌────────────┐
         │  think     │  — decide what to do next
         └────┬───────┘
-             │   (queues   state["action"] ?)
-   action queued? │
+             │   (queues   state["actions"] ?)
+  actions queued? │
              │
     yes      ▼                no / safety cap
         ┌────────────┐                       (END)
-        │   act      │  — execute the tool
+        │   act      │  — execute the tool(s)
         └────┬───────┘
-             │
-             ▼
+             │            only runStrategy queued:
+             │           ┌────────────┐
+             │           │  execute   │ — run the whole plan in‑process
+             │           └────┬───────┘   (src.strategy), no LLM per step
+             ▼ ◄──────────────┘
         ┌────────────┐
         │  memory    │  — store / recall
         └────┬───────┘
              │
              └──────────────► back to think
+
+Each node carries both a sync and an async implementation, so the same
+compiled `app` serves `invoke` / `stream` and `ainvoke` / `astream`.
+
+Importing this module only wires the graph; the LLM client, vector store
+and exchange connection are created on first use.  Call `warm_up()` (e.g.
+from a server startup hook) to pay that cost before the first request.
 """
+import logging, time
+from typing import Callable, Dict
+
 
 from langgraph.graph import StateGraph, END
+from langchain_core.runnables import RunnableLambda
 
+from src import memory, wrappers
 from src.agent_state import State
-from src.nodes import think_node, act_node, memory_node
+from src.context import count_tokens
+from src.nodes import (
+    get_llm,
+    cache_node, route_node, think_node, act_node, memory_node, execute_node,
+    acache_node, aroute_node, athink_node, aact_node, amemory_node, aexecute_node,
+)
+from src.tools import STRATEGY_TOOL
 
 # ── build the state machine ───────────────────────────────────────────
 wf = StateGraph(State)
 
-wf.add_node("think",  think_node)
-wf.add_node("act",    act_node)
-wf.add_node("memory", memory_node)
+wf.add_node("cache",  RunnableLambda(cache_node,  afunc=acache_node))
+wf.add_node("route",  RunnableLambda(route_node,  afunc=aroute_node))
+wf.add_node("think",  RunnableLambda(think_node,  afunc=athink_node))
+wf.add_node("act",    RunnableLambda(act_node,    afunc=aact_node))
+wf.add_node("memory", RunnableLambda(memory_node, afunc=amemory_node))
+wf.add_node("execute", RunnableLambda(execute_node, afunc=aexecute_node))
+
+# entry point: a cached answer, else the fast path, else think
+wf.set_entry_point("cache")
+
+
+def cached(state: State) -> bool:
+    return bool(state.get("cached"))
+
+
+def answered(state: State) -> bool:
+    return bool(state.get("routed"))
+
 
-# entry point
-wf.set_entry_point("think")
+wf.add_conditional_edges("cache", cached, {True: END, False: "route"})
+wf.add_conditional_edges("route", answered, {True: END, False: "think"})
 
-# after executing a tool we always store / recall memory
+# after executing a tool (or a strategy) we always store / recall memory
 wf.add_edge("act", "memory")
+wf.add_edge("execute", "memory")
 
 # after memory we think again with the new context
 wf.add_edge("memory", "think")
@@ -51,13 +98,61 @@ def need_to_act(state: State) -> bool:
     """
     Return True if a tool is queued *and* we are still below the safety cap.
     """
-    return bool(state.get("action")) and state.get("loop_count", 0) < SAFETY_CAP
+    return bool(state.get("actions")) and state.get("loop_count", 0) < SAFETY_CAP
+
+
+def dispatch(state: State) -> str:
+    """
+    "execute" when think queued only strategy runs, "act" for any other
+    batch (a mixed one runs runStrategy as a plain tool), "end" otherwise.
+    """
+    if not need_to_act(state):
+        return "end"
+    if all(a["name"] == STRATEGY_TOOL for a in state["actions"]):
+        return "execute"
+    return "act"
 
 wf.add_conditional_edges(
     "think",
-    need_to_act,
-    {True: "act", False: END},
+    dispatch,
+    {"act": "act", "execute": "execute", "end": END},
 )
 
 # ── compile to a runnable app ─────────────────────────────────────────
-app = wf.compile()
+def compile_app(checkpointer=None):
+    """
+    Compile the graph; pass a checkpointer (see `src.sessions`) to keep
+    per‑session state between calls keyed by `thread_id`.
+    """
+    return wf.compile(checkpointer=checkpointer)
+
+
+app = compile_app()                # stateless: every call starts fresh
+
+
+# ── optional eager initialisation ─────────────────────────────────────
+log = logging.getLogger(__name__)
+
+
+def warm_up() -> Dict[str, float]:
+    """
+    Build the lazily‑initialised pieces now.  Failures are logged, not
+    raised, so an unreachable dependency never blocks worker startup.
+    Returns per‑step wall time in ms.
+    """
+    steps: Dict[str, Callable[[], object]] = {
+        "llm":           get_llm,
+        "tokenizer":     lambda: count_tokens("warm‑up"),
+        "memory":        memory.get_backend,
+        "server_clock":  wrappers.clock.sync,          # also opens a keep‑alive socket
+        "exchange_info": wrappers.exchange_info.get,
+    }
+    timings: Dict[str, float] = {}
+    for name, step in steps.items():
+        t0 = time.perf_counter()
+        try:
+            step()
+        except Exception:
+            log.exception("warm‑up step %r failed", name)
+        timings[name] = round((time.perf_counter() - t0) * 1000, 2)
+    return timings
@@ -20,13 +20,20 @@ class State(TypedDict, total=False):
     # ── user input & memory context ────────────────────────────────
     text: str                               # latest user prompt
     recalled: NotRequired[List[str]]        # memory snippets (oldest→newest)
+    recalled_for: NotRequired[Optional[str]]  # prompt `recalled` was fetched for
+    history: NotRequired[List[Dict[str, str]]]  # last turns of the session
+                                            # [{"user": …, "assistant": …}]
 
     # ── tool‑execution workflow ────────────────────────────────────
-    action: Optional[ToolCall]              # tool queued for *next* act pass
-    last_action: NotRequired[ToolCall]      # tool that was just executed
-    result: Optional[Any]                   # tool JSON or final summary
+    actions: List[ToolCall]                 # tools queued for *next* act pass
+    last_actions: NotRequired[List[ToolCall]]  # batch that was just executed
+    tools_used: NotRequired[List[str]]      # every tool run this turn (cache deps)
+    result: Optional[Any]                   # tool JSON, list of per‑call
+                                            # outcomes, or final summary
 
     # ── flow‑control guards ────────────────────────────────────────
+    routed: NotRequired[Optional[str]]      # intent answered by the fast path
+    cached: NotRequired[bool]               # answered from the response cache
     loop_count: int                         # safety breaker (default 0)
     error:  NotRequired[str]  
 
@@ -35,9 +42,21 @@ class State(TypedDict, total=False):
 def make_state(text: str) -> State:
     """
     Initialise a fresh State dict with sensible defaults.
+
+    Also used as the input of each turn of a checkpointed session: the
+    per‑turn fields (including the previous turn's recalls) are reset,
+    only `history` carries over.
     """
     return {
         "text": text,
-        "action": None,
+        "recalled": [],
+        "recalled_for": None,
+        "actions": [],
+        "last_actions": [],
+        "tools_used": [],
+        "result": None,
+        "error": None,
         "loop_count": 0,
+        "routed": None,
+        "cached": False,
     }
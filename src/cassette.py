@@ -0,0 +1,309 @@
+# src/cassette.py
+"""
+Record / replay cassettes
+-------------------------
+Captures the two expensive, non‑deterministic edges of a turn – tool
+calls (`tools.tool_runner`, i.e. the exchange) and the think‑node LLM
+call – so a turn can be reproduced, and traffic replayed, without
+OpenAI or the exchange.
+
+* **record** – every call is performed live and appended to the cassette
+  as one JSON line: kind, request key, the request, the response (or the
+  error it raised), its latency and its offset from the start of the
+  recording.  The server also records each turn (prompt, session,
+  answer) so captured traffic can be driven through the graph again.
+* **replay** – calls are answered from the cassette by request key and
+  never reach the network; identical requests get their recordings in
+  order (the last one repeats).  `R0_CASSETTE_PACE` scales the recorded
+  latency: 0 = full speed, 1 = original timings.  An unrecorded request
+  raises `CassetteMiss`, or goes live with `R0_CASSETTE_STRICT=0`.
+
+Keys: a tool call is keyed by name + arguments; an LLM call by what the
+model decides on – prompt, session history, tools already run this turn,
+the last actions and the error – not by the rendered messages, so
+recalled memories (which differ between runs) don't break a replay.
+
+A path ending in `.gz` is gzip‑compressed.
+
+    R0_CASSETTE=off               # off | record | replay
+    R0_CASSETTE_PATH=r0_cassette.jsonl.gz
+    R0_CASSETTE_PACE=0
+    R0_CASSETTE_STRICT=1
+
+    python -m src.cassette stats  r0_cassette.jsonl.gz
+    python -m src.cassette replay r0_cassette.jsonl.gz [--pace 1] [--concurrency 8]
+"""
+
+from __future__ import annotations
+
+import os, json, gzip, time, asyncio, hashlib, threading
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from langchain_core.messages import message_to_dict, messages_from_dict
+
+MODE   = os.getenv("R0_CASSETTE", "off").lower()
+PATH   = os.getenv("R0_CASSETTE_PATH", "r0_cassette.jsonl.gz")
+PACE   = float(os.getenv("R0_CASSETTE_PACE", "0"))
+STRICT = os.getenv("R0_CASSETTE_STRICT", "1") == "1"
+
+
+class CassetteMiss(LookupError):
+    """Replay found no recording for a request."""
+
+
+def request_key(kind: str, request: Any) -> str:
+    raw = json.dumps([kind, request], sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha1(raw.encode()).hexdigest()[:20]
+
+
+def encode_message(msg: Any) -> dict:
+    return message_to_dict(msg)
+
+
+def decode_message(data: dict) -> Any:
+    return messages_from_dict([data])[0]
+
+
+def _open(path: str, mode: str):
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+class Cassette:
+    """One cassette file in one mode; see the module docstring."""
+
+    def __init__(self, path: str = PATH, mode: str = MODE, pace: float = PACE,
+                 strict: bool = STRICT):
+        if mode not in ("off", "record", "replay"):
+            raise ValueError(f"R0_CASSETTE must be off, record or replay, not {mode!r}")
+        self.path, self.mode, self.pace, self.strict = path, mode, pace, strict
+        self._lock    = threading.Lock()
+        self._out     = None                        # record: open file
+        self._t0      = time.time()
+        self._tape: Optional[Dict[str, List[dict]]] = None   # replay: key → recordings
+        self._cursor: Dict[str, int] = {}
+        self.recorded = self.replayed = self.misses = 0
+
+    # ── record ────────────────────────────────────────────────────────
+    def _write(self, entry: dict) -> None:
+        line = json.dumps(entry, separators=(",", ":"), default=str)
+        with self._lock:
+            if self._out is None:
+                self._out = _open(self.path, "a")
+            self._out.write(line + "\n")
+            self._out.flush()
+            self.recorded += 1
+
+    def _entry(self, kind: str, request: Any, started: float) -> dict:
+        return {"k": kind, "id": request_key(kind, request), "req": request,
+                "ms": round((time.perf_counter() - started) * 1000, 2),
+                "t": round(time.time() - self._t0, 3)}
+
+    def turn(self, prompt: str, session: Optional[str], result: Any, ms: float) -> None:
+        """Record one served turn (record mode only)."""
+        if self.mode == "record":
+            self._write({"k": "turn", "prompt": prompt, "session": session,
+                         "result": None if result is None else str(result),
+                         "ms": round(ms, 2), "t": round(time.time() - self._t0, 3)})
+
+    def close(self) -> None:
+        with self._lock:
+            if self._out is not None:
+                self._out.close()
+                self._out = None
+
+    # ── replay ────────────────────────────────────────────────────────
+    def load(self) -> Dict[str, List[dict]]:
+        with self._lock:
+            if self._tape is None:
+                tape: Dict[str, List[dict]] = {}
+                for entry in read(self.path):
+                    if entry["k"] != "turn":
+                        tape.setdefault(entry["id"], []).append(entry)
+                self._tape = tape
+            return self._tape
+
+    def _lookup(self, kind: str, request: Any) -> Optional[dict]:
+        key = request_key(kind, request)
+        recs = self.load().get(key)
+        with self._lock:
+            if not recs:
+                self.misses += 1
+                return None
+            i = self._cursor.get(key, 0)
+            self._cursor[key] = min(i + 1, len(recs) - 1)
+            self.replayed += 1
+            return recs[i]
+
+    def _miss(self, kind: str, request: Any) -> None:
+        if self.strict:
+            raise CassetteMiss(f"no recorded {kind} call for {json.dumps(request, default=str)[:200]}")
+
+    @staticmethod
+    def _result(entry: dict, decode: Optional[Callable[[Any], Any]],
+                errors: Tuple[type, ...]) -> Any:
+        if entry.get("err"):
+            name, msg = entry["err"]
+            cls = next((e for e in errors if e.__name__ == name), RuntimeError)
+            raise cls(msg)
+        return decode(entry["res"]) if decode else entry["res"]
+
+    # ── call sites ────────────────────────────────────────────────────
+    def call(self, kind: str, request: Any, live: Callable[[], Any], *,
+             encode: Optional[Callable[[Any], Any]] = None,
+             decode: Optional[Callable[[Any], Any]] = None,
+             errors: Tuple[type, ...] = ()) -> Any:
+        """`live()` through the cassette.  `errors` are recorded and re‑raised
+        on replay; anything else propagates unrecorded."""
+        if self.mode == "replay":
+            entry = self._lookup(kind, request)
+            if entry is not None:
+                if self.pace:
+                    time.sleep(entry["ms"] * self.pace / 1000)
+                return self._result(entry, decode, errors)
+            self._miss(kind, request)
+            return live()
+        if self.mode != "record":
+            return live()
+        t0 = time.perf_counter()
+        try:
+            res = live()
+        except errors as exc:
+            self._write({**self._entry(kind, request, t0), "err": _err(exc, errors)})
+            raise
+        self._write({**self._entry(kind, request, t0), "res": encode(res) if encode else res})
+        return res
+
+    async def acall(self, kind: str, request: Any, live: Callable[[], Awaitable[Any]], *,
+                    encode: Optional[Callable[[Any], Any]] = None,
+                    decode: Optional[Callable[[Any], Any]] = None,
+                    errors: Tuple[type, ...] = ()) -> Any:
+        """Async twin of `call`; `live` is a coroutine function."""
+        if self.mode == "replay":
+            entry = self._lookup(kind, request)
+            if entry is not None:
+                if self.pace:
+                    await asyncio.sleep(entry["ms"] * self.pace / 1000)
+                return self._result(entry, decode, errors)
+            self._miss(kind, request)
+            return await live()
+        if self.mode != "record":
+            return await live()
+        t0 = time.perf_counter()
+        try:
+            res = await live()
+        except errors as exc:
+            self._write({**self._entry(kind, request, t0), "err": _err(exc, errors)})
+            raise
+        self._write({**self._entry(kind, request, t0), "res": encode(res) if encode else res})
+        return res
+
+    def stats(self) -> Dict[str, Any]:
+        return {"mode": self.mode, "path": self.path, "recorded": self.recorded,
+                "replayed": self.replayed, "misses": self.misses}
+
+
+def _err(exc: BaseException, errors: Tuple[type, ...]) -> List[str]:
+    """[class to re‑raise, message] – the first of `errors` the exception is."""
+    cls = next(e for e in errors if isinstance(exc, e))
+    return [cls.__name__, str(exc)]
+
+
+def read(path: str) -> List[dict]:
+    if not os.path.exists(path):
+        return []
+    with _open(path, "r") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+tape = Cassette()
+
+
+# ── replay driver ─────────────────────────────────────────────────────
+async def replay_turns(path: str, pace: float = 0.0, concurrency: int = 8) -> Dict[str, Any]:
+    """
+    Run every recorded turn through the graph against the cassette (tools
+    and LLM replayed) and compare the answers.  Turns of one session run
+    in order on a checkpointed graph, so follow‑ups see their history;
+    sessions and one‑off turns run concurrently.  Switches the process‑wide
+    `tape` to replay.
+    """
+    global tape
+    from src.agent_graph import app, compile_app
+    from src.agent_state import make_state
+    from src.sessions import BoundedMemorySaver
+
+    tape = Cassette(path, "replay", pace=pace, strict=True)
+    sessions = compile_app(BoundedMemorySaver())
+    groups: Dict[str, List[dict]] = {}
+    for i, entry in enumerate(e for e in read(path) if e["k"] == "turn"):
+        groups.setdefault(entry["session"] or f"_turn{i}", []).append(entry)
+
+    sem = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    out = {"turns": 0, "matched": 0, "mismatched": [], "failed": []}
+
+    async def run(group: List[dict]) -> None:
+        async with sem:
+            for entry in group:
+                graph, config = (sessions, {"configurable": {"thread_id": entry["session"]}}) \
+                    if entry["session"] else (app, None)
+                t0 = time.perf_counter()
+                try:
+                    state = await graph.ainvoke(make_state(entry["prompt"]), config)
+                except Exception as exc:
+                    out["failed"].append({"prompt": entry["prompt"], "error": str(exc)})
+                    continue
+                finally:
+                    latencies.append((time.perf_counter() - t0) * 1000)
+                    out["turns"] += 1
+                got = state.get("result")
+                if (None if got is None else str(got)) == entry["result"]:
+                    out["matched"] += 1
+                else:
+                    out["mismatched"].append({"prompt": entry["prompt"],
+                                              "recorded": entry["result"], "replayed": got})
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(run(g) for g in groups.values()))
+    wall = time.perf_counter() - t0
+    s = sorted(latencies) or [0.0]
+    return {**out, "wall_s": round(wall, 3),
+            "p50_ms": round(s[len(s) // 2], 2), "p95_ms": round(s[int(len(s) * 0.95)], 2),
+            "cassette": tape.stats()}
+
+
+def summary(path: str) -> Dict[str, Any]:
+    entries = read(path)
+    kinds: Dict[str, Dict[str, float]] = {}
+    for e in entries:
+        k = kinds.setdefault(e["k"], {"n": 0, "ms": 0.0, "errors": 0})
+        k["n"] += 1
+        k["ms"] = round(k["ms"] + e.get("ms", 0.0), 2)
+        k["errors"] += bool(e.get("err"))
+    return {"path": path, "bytes": os.path.getsize(path) if entries else 0,
+            "span_s": entries[-1]["t"] if entries else 0, "kinds": kinds}
+
+
+if __name__ == "__main__":
+    import argparse
+
+    # replay must not need the network: in‑memory store, offline embeddings
+    for k, v in {"R0_MEMORY_BACKEND": "local", "R0_MEMORY_PATH": "", "R0_EMBEDDINGS": "hash",
+                 "R0_RESPONSE_CACHE": "0", "OPENAI_API_KEY": "replay"}.items():
+        os.environ.setdefault(k, v)
+
+    ap = argparse.ArgumentParser(prog="python -m src.cassette")
+    ap.add_argument("command", choices=["stats", "replay"])
+    ap.add_argument("path", nargs="?", default=PATH)
+    ap.add_argument("--pace", type=float, default=0.0, help="0 = full speed, 1 = recorded timings")
+    ap.add_argument("--concurrency", type=int, default=8)
+    args = ap.parse_args()
+
+    from src import cassette                    # the module the tools see, not __main__
+    if args.command == "stats":
+        print(json.dumps(cassette.summary(args.path), indent=2))
+    else:
+        report = asyncio.run(cassette.replay_turns(args.path, args.pace, args.concurrency))
+        print(json.dumps(report, indent=2, default=str))
@@ -0,0 +1,306 @@
+# src/context.py
+"""
+Prompt assembly for think_node
+------------------------------
+Builds the chat messages for one LLM call under a token budget instead of
+pasting every recall and the raw tool JSON into the prompt.
+
+* The system prompt and the user's message are always sent whole.
+* What is left of `R0_CONTEXT_TOKENS` is split between the other sources
+  by `SHARES`; a source that needs less than its share hands the surplus
+  on, in `PRIORITY` order.
+* Tool results are compacted first (exchange boiler‑plate and empty
+  fields dropped, long lists / pair maps capped at `MAX_ITEMS`, pairs
+  named in the prompt kept first) and serialised as compact JSON.
+* Anything still over its allocation is cut at a token boundary with an
+  explicit `… [truncated …]` marker; recalls and history drop whole
+  entries (oldest history first) before cutting one.
+
+`metrics` accumulates token counts per source (before / after) and the
+number of truncations; `build_messages` also returns a `ContextReport`
+for the call it assembled.
+
+Token counts come from tiktoken when its encoding can be loaded, else
+from a ~4 chars/token estimate (offline boxes).
+"""
+
+from __future__ import annotations
+
+import os, re, json, threading, logging
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Tuple
+
+from langchain.schema import SystemMessage, HumanMessage, AIMessage
+
+log = logging.getLogger(__name__)
+
+# ── config ────────────────────────────────────────────────────────────
+BUDGET_TOKENS = int(os.getenv("R0_CONTEXT_TOKENS", "4000"))
+MAX_ITEMS     = int(os.getenv("R0_CONTEXT_MAX_ITEMS", "20"))
+TOKENIZER     = os.getenv("R0_TOKENIZER", "o200k_base")     # "heuristic" = never load tiktoken
+
+SOURCES  = ("recalled", "history", "result", "error")
+PRIORITY = ("result", "error", "history", "recalled")        # who gets spare tokens first
+
+MSG_OVERHEAD = 4                # role / separators per chat message
+MIN_CUT      = 32               # don't bother sending a shorter fragment
+
+
+def _parse_shares(raw: str) -> Dict[str, float]:
+    """`R0_CONTEXT_SHARES="result=0.6,recalled=0.1"` overrides single shares."""
+    shares = {"recalled": 0.20, "history": 0.25, "result": 0.45, "error": 0.10}
+    for part in filter(None, (p.strip() for p in raw.split(","))):
+        name, _, val = part.partition("=")
+        if name.strip() not in shares:
+            raise ValueError(f"Unknown context source in R0_CONTEXT_SHARES: {name!r}")
+        shares[name.strip()] = float(val)
+    return shares
+
+
+SHARES = _parse_shares(os.getenv("R0_CONTEXT_SHARES", ""))
+
+
+# ── token counting ────────────────────────────────────────────────────
+class _Tokenizer:
+    """tiktoken if available, otherwise a chars/4 estimate; loaded once."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._enc = None
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def _encoding(self):
+        if not self._loaded:
+            with self._lock:
+                if not self._loaded:
+                    if self.name != "heuristic":
+                        try:
+                            import tiktoken
+                            self._enc = tiktoken.get_encoding(self.name)
+                        except Exception:            # not installed / no network for the BPE file
+                            log.info("tiktoken unavailable, estimating tokens from length")
+                    self._loaded = True
+        return self._enc
+
+    def count(self, text: str) -> int:
+        enc = self._encoding()
+        if enc is None:
+            return (len(text) + 3) // 4
+        return len(enc.encode(text, disallowed_special=()))
+
+    def head(self, text: str, tokens: int) -> str:
+        """The first `tokens` tokens of `text`."""
+        enc = self._encoding()
+        if enc is None:
+            return text[: tokens * 4]
+        return enc.decode(enc.encode(text, disallowed_special=())[:tokens])
+
+
+tokenizer = _Tokenizer(TOKENIZER)
+
+
+def count_tokens(text: str) -> int:
+    return tokenizer.count(text)
+
+
+def truncate(text: str, tokens: int) -> str:
+    """Cut `text` to at most `tokens` tokens, marker included."""
+    have = count_tokens(text)
+    if have <= tokens:
+        return text
+    marker = f" … [truncated, {have - tokens} tokens omitted]"
+    keep = max(0, tokens - count_tokens(marker))
+    return tokenizer.head(text, keep) + marker
+
+
+# ── tool‑result compaction ────────────────────────────────────────────
+_DROP_ALWAYS = {"CoinFullName", "UnitFullName", "ServerTimeUsage", "CommissionPercent", "StopType"}
+_PAIR = re.compile(r"\b([A-Z0-9]{2,10})/([A-Z]{2,5})\b")
+
+
+def compact_result(result: Any, text: str = "") -> Any:
+    """
+    Strip a tool result down to what the model needs: no `Success: true` /
+    empty `ErrMsg` envelope, no null or empty fields, no display names;
+    lists and pair‑keyed maps capped at MAX_ITEMS (pairs / coins named in
+    `text` kept first).
+    """
+    wanted = {m.group(0) for m in _PAIR.finditer(text.upper())}
+    coins  = {c for p in wanted for c in p.split("/")}
+    return _compact(result, wanted, coins)
+
+
+def _compact(obj: Any, pairs: set, coins: set) -> Any:
+    if isinstance(obj, dict):
+        out = {}
+        for k, v in obj.items():
+            if k in _DROP_ALWAYS or v is None or v == "" or v == [] or v == {}:
+                continue
+            if (k == "Success" and v is True) or (k == "ErrMsg" and not v):
+                continue
+            out[k] = _compact(v, pairs, coins)
+        if len(out) > MAX_ITEMS:
+            keys = sorted(out, key=lambda k: not (k in pairs or k in coins))   # stable
+            out = {k: out[k] for k in keys[:MAX_ITEMS]}
+            out["…"] = f"+{len(keys) - MAX_ITEMS} more"
+        return out
+    if isinstance(obj, list):
+        items = [_compact(v, pairs, coins) for v in obj[:MAX_ITEMS]]
+        if len(obj) > MAX_ITEMS:
+            items.append(f"… +{len(obj) - MAX_ITEMS} more")
+        return items
+    return obj
+
+
+def render_result(result: Any, text: str = "") -> str:
+    """Compact JSON for structured results, plain text for everything else."""
+    if isinstance(result, (dict, list)):
+        return json.dumps(compact_result(result, text), separators=(",", ":"),
+                          ensure_ascii=False, default=str)
+    return str(result)
+
+
+# ── allocation ────────────────────────────────────────────────────────
+def allocate(need: Dict[str, int], available: int,
+             shares: Dict[str, float] = SHARES) -> Dict[str, int]:
+    """Per‑source token allowance: share first, then spare in PRIORITY order."""
+    alloc = {s: min(need.get(s, 0), int(shares[s] * available)) for s in SOURCES}
+    spare = available - sum(alloc.values())
+    for s in PRIORITY:
+        extra = min(spare, need.get(s, 0) - alloc[s])
+        if extra > 0:
+            alloc[s] += extra
+            spare    -= extra
+    return alloc
+
+
+@dataclass
+class ContextReport:
+    budget: int
+    used: int = 0
+    tokens_in: Dict[str, int] = field(default_factory=dict)    # before compaction / cuts
+    tokens_out: Dict[str, int] = field(default_factory=dict)   # what was sent
+    truncated: List[str] = field(default_factory=list)
+
+
+class ContextMetrics:
+    """Process‑wide token accounting for assembled prompts."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.calls = 0
+            self.tokens_in: Dict[str, int] = {}
+            self.tokens_out: Dict[str, int] = {}
+            self.truncations: Dict[str, int] = {}
+
+    def record(self, report: ContextReport) -> None:
+        with self._lock:
+            self.calls += 1
+            for src, n in report.tokens_in.items():
+                self.tokens_in[src] = self.tokens_in.get(src, 0) + n
+            for src, n in report.tokens_out.items():
+                self.tokens_out[src] = self.tokens_out.get(src, 0) + n
+            for src in report.truncated:
+                self.truncations[src] = self.truncations.get(src, 0) + 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"calls": self.calls, "tokens_in": dict(self.tokens_in),
+                    "tokens_out": dict(self.tokens_out), "truncations": dict(self.truncations)}
+
+
+metrics = ContextMetrics()
+
+
+# ── assembly ──────────────────────────────────────────────────────────
+def _fit_entries(entries: List[str], allowance: int) -> Tuple[List[str], bool]:
+    """Keep whole entries while they fit; cut the first one that doesn't."""
+    kept, left = [], allowance
+    for entry in entries:
+        cost = count_tokens(entry) + MSG_OVERHEAD
+        if cost <= left:
+            kept.append(entry)
+            left -= cost
+            continue
+        if left - MSG_OVERHEAD >= MIN_CUT:
+            kept.append(truncate(entry, left - MSG_OVERHEAD))
+        return kept, True
+    return kept, False
+
+
+def build_messages(state: Dict[str, Any], system: str,
+                   budget: int = BUDGET_TOKENS) -> Tuple[list, ContextReport]:
+    """Messages for one think pass, fitted to `budget` tokens."""
+    text   = state["text"]
+    report = ContextReport(budget=budget)
+
+    recalled = list(state.get("recalled") or [])
+    turns    = list(state.get("history") or [])
+    result   = state.get("result")
+    raw_res  = "" if result is None else str(result)
+    rendered = "" if result is None else render_result(result, text)
+    error    = f"⚠️ ERROR: {state['error']}" if state.get("error") else ""
+
+    fixed = count_tokens(system) + count_tokens(text) + 2 * MSG_OVERHEAD
+    need = {
+        "recalled": sum(count_tokens(c) + MSG_OVERHEAD for c in recalled),
+        "history":  sum(count_tokens(t["user"]) + count_tokens(t["assistant"])
+                        + 2 * MSG_OVERHEAD for t in turns),
+        "result":   count_tokens(rendered) + MSG_OVERHEAD if rendered else 0,
+        "error":    count_tokens(error) + MSG_OVERHEAD if error else 0,
+    }
+    report.tokens_in = {**need, "result": count_tokens(raw_res) + MSG_OVERHEAD if raw_res else 0}
+    alloc = allocate(need, max(0, budget - fixed))
+
+    # recalled memories (oldest → newest, as stored)
+    recalled, cut = _fit_entries(recalled, alloc["recalled"])
+    if cut:
+        report.truncated.append("recalled")
+
+    # history: newest turns win, whole turns only
+    kept_turns, left = [], alloc["history"]
+    for turn in reversed(turns):
+        cost = count_tokens(turn["user"]) + count_tokens(turn["assistant"]) + 2 * MSG_OVERHEAD
+        if cost > left:
+            report.truncated.append("history")
+            break
+        kept_turns.insert(0, turn)
+        left -= cost
+
+    if rendered and need["result"] > alloc["result"]:
+        rendered = truncate(rendered, max(0, alloc["result"] - MSG_OVERHEAD))
+        report.truncated.append("result")
+    if error and need["error"] > alloc["error"]:
+        error = truncate(error, max(MIN_CUT, alloc["error"] - MSG_OVERHEAD))
+        report.truncated.append("error")
+
+    # same order the model has always seen
+    messages = [SystemMessage(content=system)]
+    messages += [AIMessage(content=c) for c in recalled]
+    for turn in kept_turns:
+        messages += [HumanMessage(content=turn["user"]), AIMessage(content=turn["assistant"])]
+    if rendered:
+        messages.append(AIMessage(content=rendered))
+    if error:
+        messages.append(AIMessage(content=error))
+    messages.append(HumanMessage(content=text))
+
+    report.tokens_out = {
+        "system":   count_tokens(system) + MSG_OVERHEAD,
+        "user":     count_tokens(text) + MSG_OVERHEAD,
+        "recalled": sum(count_tokens(c) + MSG_OVERHEAD for c in recalled),
+        "history":  sum(count_tokens(t["user"]) + count_tokens(t["assistant"])
+                        + 2 * MSG_OVERHEAD for t in kept_turns),
+        "result":   count_tokens(rendered) + MSG_OVERHEAD if rendered else 0,
+        "error":    count_tokens(error) + MSG_OVERHEAD if error else 0,
+    }
+    report.used = sum(report.tokens_out.values())
+    metrics.record(report)
+    if report.truncated:
+        log.debug("context over budget, truncated %s: %s", report.truncated, report)
+    return messages, report
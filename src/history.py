@@ -0,0 +1,105 @@
+# src/history.py
+"""
+Order‑history summaries
+-----------------------
+Folds the stream of `OrderRecord`s from `wrappers.iter_orders` into
+per‑pair figures without keeping the orders around, so a whole history
+becomes one small dict for the LLM instead of many pages of raw JSON.
+
+Realised PnL uses the average cost of everything bought in the scanned
+history (order‑independent, so pages can arrive newest first); fees are
+reported separately per coin.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, Optional
+
+import src.wrappers as w
+
+
+@dataclass
+class PairSummary:
+    orders: int = 0
+    by_status: Dict[str, int] = field(default_factory=dict)
+    buy_qty: float = 0.0
+    buy_value: float = 0.0
+    sell_qty: float = 0.0
+    sell_value: float = 0.0
+    fees: Dict[str, float] = field(default_factory=dict)
+    first_ms: Optional[int] = None
+    last_ms: Optional[int] = None
+
+    def add(self, o: w.OrderRecord) -> None:
+        self.orders += 1
+        self.by_status[o.status] = self.by_status.get(o.status, 0) + 1
+        if o.filled:
+            value = o.filled * (o.avg_price or o.price)
+            if o.side == "BUY":
+                self.buy_qty, self.buy_value = self.buy_qty + o.filled, self.buy_value + value
+            else:
+                self.sell_qty, self.sell_value = self.sell_qty + o.filled, self.sell_value + value
+        if o.fee:
+            self.fees[o.fee_coin] = self.fees.get(o.fee_coin, 0.0) + o.fee
+        if o.created_ms:
+            self.first_ms = min(self.first_ms or o.created_ms, o.created_ms)
+            self.last_ms  = max(self.last_ms or 0, o.created_ms)
+
+    def as_dict(self) -> Dict[str, Any]:
+        avg_buy  = self.buy_value / self.buy_qty if self.buy_qty else None
+        avg_sell = self.sell_value / self.sell_qty if self.sell_qty else None
+        out: Dict[str, Any] = {
+            "orders": self.orders, "by_status": self.by_status,
+            "filled_buy_qty": _r(self.buy_qty), "filled_sell_qty": _r(self.sell_qty),
+            "avg_buy_price": _r(avg_buy), "avg_sell_price": _r(avg_sell),
+            "net_qty": _r(self.buy_qty - self.sell_qty),
+            "realised_pnl": _r(self.sell_qty * (avg_sell - avg_buy))
+                            if avg_buy is not None and avg_sell is not None else None,
+            "fees": {c: _r(v) for c, v in self.fees.items()},
+            "first_ms": self.first_ms, "last_ms": self.last_ms,
+        }
+        return {k: v for k, v in out.items() if v not in (None, {})}
+
+
+def _r(x: Optional[float]) -> Optional[float]:
+    return None if x is None else float(f"{x:.10g}")
+
+
+class Summary:
+    """Streaming accumulator: `add` records one by one, `as_dict` at the end."""
+
+    def __init__(self):
+        self.pairs: Dict[str, PairSummary] = {}
+        self.orders = 0
+
+    def add(self, o: w.OrderRecord) -> None:
+        self.orders += 1
+        self.pairs.setdefault(o.pair, PairSummary()).add(o)
+
+    def as_dict(self) -> Dict[str, Any]:
+        by_status: Dict[str, int] = {}
+        for p in self.pairs.values():
+            for st, n in p.by_status.items():
+                by_status[st] = by_status.get(st, 0) + n
+        return {"orders": self.orders, "by_status": by_status,
+                "pairs": {pair: p.as_dict() for pair, p in sorted(self.pairs.items())}}
+
+
+def summarize(records: Iterable[w.OrderRecord]) -> Dict[str, Any]:
+    acc = Summary()
+    for o in records:
+        acc.add(o)
+    return acc.as_dict()
+
+
+def order_summary(pair: Optional[str] = None) -> Dict[str, Any]:
+    """Summary of the whole order history (optionally one pair)."""
+    return summarize(w.iter_orders(pair=pair))
+
+
+async def aorder_summary(pair: Optional[str] = None) -> Dict[str, Any]:
+    acc = Summary()
+    async for o in w.aiter_orders(pair=pair):
+        acc.add(o)
+    return acc.as_dict()
@@ -0,0 +1,293 @@
+# src/ledger.py
+"""
+In‑process account ledger
+-------------------------
+Keeps the wallet and the open orders locally so the account read tools
+don't cost an exchange round trip each time.
+
+* `reconcile()` loads the truth: /balance plus every pending order
+  (/query_order, pending_only).  It runs on the first read, every
+  `R0_LEDGER_RECONCILE_S`, and on the next read after a mismatch.
+* `apply_order()` / `apply_cancel()` fold our own place / cancel
+  responses in straight away: a filled order moves coin and quote (and
+  the commission), a pending one locks its funds, a cancel unlocks the
+  remainder.
+* Anything the ledger can't explain – a balance going negative, a cancel
+  of an order it doesn't know, an exchange snapshot that differs from
+  the local one – marks it dirty; the next read reconciles first and
+  `stats()["mismatches"]` counts the disagreements.
+
+Limit orders that fill on the exchange later are invisible until the
+next reconcile; the interval bounds that staleness.  Finished orders
+never change, so a lookup by id answers from them without a reconcile;
+the most recently used `R0_LEDGER_FINAL_KEEP` of them are kept.
+
+    R0_LEDGER=1                   # 0 = every account read goes to the exchange
+    R0_LEDGER_RECONCILE_S=60
+    R0_LEDGER_FINAL_KEEP=1000
+"""
+
+from __future__ import annotations
+
+import os, time, logging, threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+import src.wrappers as w
+
+log = logging.getLogger(__name__)
+
+ENABLED     = os.getenv("R0_LEDGER", "1") == "1"
+RECONCILE_S = float(os.getenv("R0_LEDGER_RECONCILE_S", "60"))
+FINAL_KEEP  = int(os.getenv("R0_LEDGER_FINAL_KEEP", "1000"))
+
+FINAL = frozenset({"FILLED", "CANCELED", "CANCELLED"})
+_EPS  = 1e-9                                        # below this a balance is "negative"
+_TOL  = 1e-6                                        # wallet comparison tolerance
+
+
+def _ok(**body: Any) -> dict:
+    return {"Success": True, "ErrMsg": "", **body}
+
+
+class Ledger:
+    """Wallet + open orders by id and by pair; see the module docstring."""
+
+    def __init__(self, reconcile_s: float = RECONCILE_S, enabled: bool = ENABLED,
+                 final_keep: int = FINAL_KEEP):
+        self.enabled     = enabled                  # tools bypass the ledger when False
+        self.reconcile_s = reconcile_s
+        self.final_keep  = final_keep
+        self.wallet: Dict[str, Dict[str, float]] = {}
+        self.orders: Dict[int, dict] = {}           # open + recently finished, by OrderID
+        self._final: "OrderedDict[int, None]" = OrderedDict()   # finished ids, LRU order
+        self.open_by_pair: Dict[str, set] = {}
+        self._synced_at = float("-inf")
+        self._dirty     = True
+        self._lock      = threading.Lock()
+        self._flight    = w.SingleFlight()
+        self._aflight   = w.AsyncSingleFlight()
+        self._version   = 0                         # bumped by every local update
+        self.reconciles = self.mismatches = self.local_reads = 0
+
+    # ── freshness ─────────────────────────────────────────────────────
+    @property
+    def stale(self) -> bool:
+        return self._dirty or time.monotonic() - self._synced_at > self.reconcile_s
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._dirty = True
+
+    # ── reconcile ─────────────────────────────────────────────────────
+    def reconcile(self) -> None:
+        """Replace local state with the exchange's (concurrent callers share one)."""
+        def run() -> None:
+            seen = self._version
+            self._load(w.get_balance(), self._pending(), seen)
+        self._flight.do("reconcile", run)
+
+    async def areconcile(self) -> None:
+        async def run() -> None:
+            seen = self._version
+            self._load(await w.aget_balance(), await self._apending(), seen)
+        await self._aflight.do("reconcile", run)
+
+    def _pending(self) -> List[dict]:
+        return list(w.iter_orders(pending_only=True, compact=False))
+
+    async def _apending(self) -> List[dict]:
+        return [o async for o in w.aiter_orders(pending_only=True, compact=False)]
+
+    def _load(self, balance: dict, pending: List[dict], seen: int) -> None:
+        wallet = {c: {"Free": float(b.get("Free", 0)), "Lock": float(b.get("Lock", 0))}
+                  for c, b in (balance.get("Wallet") or balance.get("SpotWallet") or {}).items()}
+        with self._lock:
+            had_state = self._synced_at != float("-inf")
+            local_open = {oid for ids in self.open_by_pair.values() for oid in ids}
+            remote_open = {int(o["OrderID"]) for o in pending}
+            if had_state and (not self._same_wallet(wallet) or local_open != remote_open):
+                self.mismatches += 1
+                log.info("ledger differed from the exchange; reloaded")
+            self.wallet = wallet
+            self.open_by_pair = {}
+            for o in pending:
+                self._track(o)
+            for oid in local_open - remote_open:       # filled / cancelled meanwhile
+                if self.orders.get(oid, {}).get("Status") not in FINAL:
+                    self.orders.pop(oid, None)
+            self._synced_at = time.monotonic()
+            # an order applied while we were fetching may be missing from the snapshot
+            self._dirty = self._version != seen
+            self.reconciles += 1
+
+    def _same_wallet(self, wallet: Dict[str, Dict[str, float]]) -> bool:
+        coins = set(wallet) | set(self.wallet)
+        zero = {"Free": 0.0, "Lock": 0.0}
+        return all(abs(wallet.get(c, zero)[k] - self.wallet.get(c, zero)[k]) <= _TOL
+                   for c in coins for k in ("Free", "Lock"))
+
+    # ── incremental updates (callers: tools after place / cancel) ─────
+    def _track(self, order: dict) -> None:
+        oid = int(order["OrderID"])
+        self.orders[oid] = order
+        ids = self.open_by_pair.setdefault(order["Pair"], set())
+        if order.get("Status") in FINAL:
+            ids.discard(oid)
+            self._touch(oid)
+        else:
+            ids.add(oid)
+            self._final.pop(oid, None)
+        if not ids:
+            self.open_by_pair.pop(order["Pair"], None)
+
+    def _touch(self, oid: int) -> None:
+        """Mark a finished order recently used; forget the least recent past the cap."""
+        self._final[oid] = None
+        self._final.move_to_end(oid)
+        while len(self._final) > self.final_keep:
+            self.orders.pop(self._final.popitem(last=False)[0], None)
+
+    def _move(self, coin: str, field: str, delta: float) -> None:
+        bal = self.wallet.setdefault(coin, {"Free": 0.0, "Lock": 0.0})
+        bal[field] += delta
+        if bal[field] < -_EPS:                       # we got something wrong
+            self._dirty = True
+
+    def _locked_for(self, order: dict) -> tuple[str, float]:
+        """(coin, amount) a resting order keeps locked for its unfilled part."""
+        coin, unit = order["Pair"].split("/")
+        left = float(order.get("Quantity", 0)) - float(order.get("FilledQuantity", 0))
+        if order.get("Side") == "BUY":
+            return unit, left * float(order.get("Price", 0))
+        return coin, left
+
+    def apply_order(self, resp: dict) -> None:
+        """Fold a place_order response (its OrderDetail) into the ledger."""
+        order = (resp or {}).get("OrderDetail")
+        if not order or "OrderID" not in order:
+            return
+        with self._lock:
+            self._version += 1
+            coin, unit = order["Pair"].split("/")
+            buy = order.get("Side") == "BUY"
+            filled = float(order.get("FilledQuantity", 0))
+            if filled:
+                value = abs(float(order.get("UnitChange")
+                                  or filled * float(order.get("FilledAverPrice", 0))))
+                self._move(coin, "Free", filled if buy else -filled)
+                self._move(unit, "Free", -value if buy else value)
+                fee = float(order.get("CommissionChargeValue", 0))
+                if fee:
+                    self._move(order.get("CommissionCoin") or unit, "Free", -fee)
+            if order.get("Status") not in FINAL:
+                lock_coin, amount = self._locked_for(order)
+                self._move(lock_coin, "Free", -amount)
+                self._move(lock_coin, "Lock", amount)
+            self._track(order)
+
+    def apply_cancel(self, resp: dict) -> None:
+        """Fold a cancel_order response (CanceledList) into the ledger."""
+        with self._lock:
+            self._version += 1
+            for oid in (resp or {}).get("CanceledList") or []:
+                order = self.orders.get(int(oid))
+                if order is None or order.get("Status") in FINAL:
+                    self._dirty = True              # not ours / already done: re‑sync
+                    continue
+                lock_coin, amount = self._locked_for(order)
+                self._move(lock_coin, "Lock", -amount)
+                self._move(lock_coin, "Free", amount)
+                self._track({**order, "Status": "CANCELED"})
+
+    def apply_orders(self, bulk: dict) -> None:
+        """Every placed order of a `place_orders` result."""
+        for r in bulk.get("results", []):
+            if r.get("ok"):
+                self.apply_order(r.get("result"))
+
+    # ── reads ─────────────────────────────────────────────────────────
+    def _balance(self) -> dict:
+        with self._lock:
+            self.local_reads += 1
+            return _ok(Wallet={c: dict(b) for c, b in self.wallet.items()})
+
+    def _pending_count(self) -> dict:
+        with self._lock:
+            self.local_reads += 1
+            pairs = {p: len(ids) for p, ids in self.open_by_pair.items() if ids}
+            return _ok(TotalPending=sum(pairs.values()), OrderPairs=pairs)
+
+    def _query(self, order_id: Optional[str], pair: Optional[str], pending_only: Optional[bool],
+               offset: Optional[int], limit: Optional[int]) -> Optional[dict]:
+        """Local answer for a queryOrder, or None when only the exchange knows."""
+        with self._lock:
+            if order_id is not None:
+                order = self.orders.get(int(order_id)) if str(order_id).isdigit() else None
+                if order is None or order.get("Status") not in FINAL:
+                    return None                     # a resting order may have filled
+                self._touch(int(order_id))
+                self.local_reads += 1
+                return _ok(OrderMatched=[order])
+            if not pending_only or offset:
+                return None
+            ids = self.open_by_pair.get(pair, set()) if pair else \
+                {i for s in self.open_by_pair.values() for i in s}
+            self.local_reads += 1
+            newest = [self.orders[i] for i in sorted(ids, reverse=True)]
+            return _ok(OrderMatched=newest[:limit] if limit else newest)
+
+    @staticmethod
+    def _needs_sync(order_id: Optional[str], pending_only: Optional[bool],
+                    offset: Optional[int]) -> bool:
+        """Only the open-order listing depends on fresh state; a lookup by id is
+        either a finished order (final) or goes to the exchange anyway."""
+        return order_id is None and bool(pending_only) and not offset
+
+    def balance(self) -> dict:
+        if self.stale:
+            self.reconcile()
+        return self._balance()
+
+    async def abalance(self) -> dict:
+        if self.stale:
+            await self.areconcile()
+        return self._balance()
+
+    def pending_count(self) -> dict:
+        if self.stale:
+            self.reconcile()
+        return self._pending_count()
+
+    async def apending_count(self) -> dict:
+        if self.stale:
+            await self.areconcile()
+        return self._pending_count()
+
+    def query(self, order_id=None, pair=None, offset=None, limit=None, pending_only=None) -> dict:
+        if self.stale and self._needs_sync(order_id, pending_only, offset):
+            self.reconcile()
+        local = self._query(order_id, pair, pending_only, offset, limit)
+        if local is not None:
+            return local
+        return w.query_order(order_id=order_id, pair=pair, offset=offset,
+                             limit=limit, pending_only=pending_only)
+
+    async def aquery(self, order_id=None, pair=None, offset=None, limit=None,
+                     pending_only=None) -> dict:
+        if self.stale and self._needs_sync(order_id, pending_only, offset):
+            await self.areconcile()
+        local = self._query(order_id, pair, pending_only, offset, limit)
+        if local is not None:
+            return local
+        return await w.aquery_order(order_id=order_id, pair=pair, offset=offset,
+                                    limit=limit, pending_only=pending_only)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"reconciles": self.reconciles, "mismatches": self.mismatches,
+                    "local_reads": self.local_reads, "dirty": self._dirty,
+                    "open_orders": sum(len(s) for s in self.open_by_pair.values())}
+
+
+ledger = Ledger()
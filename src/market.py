@@ -0,0 +1,225 @@
+# src/market.py
+"""
+Background market data
+----------------------
+An optional poller samples the tickers of a watch‑list on a fixed cadence
+and keeps the recent history of every watched pair in a fixed‑size NumPy
+ring buffer.
+
+* One all‑pairs `/ticker` call per tick over the shared keep‑alive
+  session (a single pair is asked for directly).
+* Every response also refreshes `wrappers.tickers`, and watched pairs get
+  a staleness budget of two ticks, so `getTicker` / `getTickers` for them
+  are answered from memory – no exchange round trip on the request path.
+* `stats()` / `history()` compute windowed figures (VWAP, return,
+  volatility, range) from the buffer alone; the `getPriceStats` /
+  `getPriceHistory` tools expose them to the LLM.
+
+Disabled unless `R0_WATCHLIST` names at least one pair:
+
+    R0_WATCHLIST=BTC/USD,ETH/USD
+    R0_POLL_S=1            # sampling period
+    R0_RING_SIZE=3600      # samples kept per pair (1 h at 1 s)
+"""
+
+from __future__ import annotations
+
+import os, math, time, logging, threading
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+
+import src.wrappers as w
+
+log = logging.getLogger(__name__)
+
+WATCHLIST = [p.strip().upper() for p in os.getenv("R0_WATCHLIST", "").split(",") if p.strip()]
+POLL_S    = float(os.getenv("R0_POLL_S", "1"))
+RING_SIZE = int(os.getenv("R0_RING_SIZE", "3600"))
+
+FIELDS = ("LastPrice", "MaxBid", "MinAsk", "CoinTradeValue")   # columns of a sample
+_LAST, _BID, _ASK, _VOL = range(len(FIELDS))
+
+
+# ── ring buffer ───────────────────────────────────────────────────────
+class RingBuffer:
+    """
+    The last `size` ticker samples of one pair: server time (ms) plus the
+    `FIELDS` columns, preallocated once; appends overwrite the oldest row.
+    """
+
+    def __init__(self, size: int = RING_SIZE):
+        self.size  = size
+        self._ts   = np.zeros(size, dtype=np.int64)
+        self._rows = np.zeros((size, len(FIELDS)), dtype=np.float64)
+        self._next = 0                      # slot the next sample goes to
+        self._n    = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self._n
+
+    def append(self, ts_ms: int, ticker: dict) -> bool:
+        """Add one snapshot; a repeat of the newest server time is ignored."""
+        row = [float(ticker.get(f) or 0.0) for f in FIELDS]
+        with self._lock:
+            if self._n and self._ts[(self._next - 1) % self.size] >= ts_ms:
+                return False
+            self._ts[self._next]   = ts_ms
+            self._rows[self._next] = row
+            self._next = (self._next + 1) % self.size
+            self._n    = min(self._n + 1, self.size)
+        return True
+
+    def window(self, since_ms: int = 0) -> tuple[np.ndarray, np.ndarray]:
+        """(timestamps, rows) with ts ≥ `since_ms`, oldest first (copies)."""
+        with self._lock:
+            if self._n < self.size:
+                ts, rows = self._ts[: self._n].copy(), self._rows[: self._n].copy()
+            else:
+                order = np.r_[self._next: self.size, 0: self._next]
+                ts, rows = self._ts[order], self._rows[order]
+        start = int(np.searchsorted(ts, since_ms, side="left"))
+        return ts[start:], rows[start:]
+
+
+# ── windowed statistics ───────────────────────────────────────────────
+def _round(x: float) -> Optional[float]:
+    return None if not math.isfinite(x) else float(f"{x:.10g}")
+
+
+def compute_stats(ts: np.ndarray, rows: np.ndarray) -> Dict[str, Optional[float]]:
+    """
+    VWAP, simple return, volatility and range for the samples given.
+
+    Volume per interval is the increase of the exchange's rolling 24 h coin
+    volume between samples (negative steps – volume leaving the 24 h window
+    – count as 0); without any traded volume VWAP falls back to the mean
+    last price.  Volatility is the stdev of per‑sample log returns, also
+    scaled to one hour.
+    """
+    px = rows[:, _LAST]
+    out: Dict[str, Optional[float]] = {
+        "samples": int(len(px)), "first": None, "last": None, "high": None, "low": None,
+        "vwap": None, "return_pct": None, "volatility": None, "volatility_1h": None,
+        "spread_pct": None,
+    }
+    if not len(px):
+        return out
+
+    vol = np.clip(np.diff(rows[:, _VOL]), 0.0, None)
+    weights = vol.sum()
+    vwap = float((px[1:] * vol).sum() / weights) if weights > 0 else float(px.mean())
+    bid, ask = rows[-1, _BID], rows[-1, _ASK]
+    out.update(first=_round(px[0]), last=_round(px[-1]), high=_round(px.max()),
+               low=_round(px.min()), vwap=_round(vwap))
+    if px[0] > 0:
+        out["return_pct"] = _round((px[-1] / px[0] - 1.0) * 100)
+    if bid > 0 and ask > 0:
+        out["spread_pct"] = _round((ask - bid) / ((ask + bid) / 2) * 100)
+    if len(px) > 2 and (px > 0).all():
+        r = np.diff(np.log(px))
+        sd = float(r.std(ddof=1))
+        step_s = float(np.diff(ts).mean()) / 1000
+        out["volatility"] = _round(sd)
+        if step_s > 0:
+            out["volatility_1h"] = _round(sd * math.sqrt(3600 / step_s))
+    return out
+
+
+# ── poller ────────────────────────────────────────────────────────────
+class MarketData:
+    """Watch‑list poller feeding per‑pair ring buffers and the ticker cache."""
+
+    def __init__(self, pairs: Iterable[str] = WATCHLIST, poll_s: float = POLL_S,
+                 size: int = RING_SIZE, fetch=None):
+        self.pairs   = list(dict.fromkeys(pairs))
+        self.poll_s  = poll_s
+        self.buffers: Dict[str, RingBuffer] = {p: RingBuffer(size) for p in self.pairs}
+        self._fetch  = fetch or self._fetch_tickers
+        self._stop   = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.ticks = self.failures = 0
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def _fetch_tickers(self) -> dict:
+        params = {"pair": self.pairs[0]} if len(self.pairs) == 1 else None
+        return w._request("GET", "ticker", params, timestamp=True)
+
+    def poll_once(self) -> int:
+        """One sample of every watched pair; returns how many were new."""
+        resp = w.tickers._store(self._fetch(), self.pairs)
+        st, data = int(resp.get("ServerTime", 0)), resp.get("Data") or {}
+        added = sum(self.buffers[p].append(st, data[p]) for p in self.pairs if p in data)
+        self.ticks += 1
+        return added
+
+    def _run(self) -> None:
+        next_at = time.monotonic()
+        while not self._stop.is_set():
+            try:
+                self.poll_once()
+            except w.RoostooError as exc:
+                self.failures += 1
+                log.warning("market poll failed: %s", exc)
+            except Exception:
+                self.failures += 1
+                log.exception("market poll failed")
+            # fixed cadence: a slow response shortens the wait; an overrun
+            # skips ticks instead of bursting to catch up
+            next_at = max(next_at + self.poll_s, time.monotonic())
+            self._stop.wait(next_at - time.monotonic())
+
+    def start(self) -> bool:
+        """Start polling (no‑op without a watch‑list or when already running)."""
+        if not self.pairs or self.running:
+            return False
+        for p in self.pairs:                # served from the poller's snapshots
+            w.tickers.set_budget(p, max(w.tickers.budgets.get(p, w.tickers.default_ttl_s),
+                                        2 * self.poll_s))
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="roostoo-market", daemon=True)
+        self._thread.start()
+        return True
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    # -- reads ---------------------------------------------------------
+    def _buffer(self, pair: str) -> RingBuffer:
+        buf = self.buffers.get(pair.upper())
+        if buf is None:
+            raise w.RoostooError(f"{pair} is not on the market‑data watch‑list "
+                                 f"({', '.join(self.pairs) or 'R0_WATCHLIST is empty'})")
+        return buf
+
+    def _since(self, buf: RingBuffer, window_s: float) -> tuple[np.ndarray, np.ndarray]:
+        ts, rows = buf.window()
+        if not len(ts):
+            return ts, rows
+        start = int(np.searchsorted(ts, ts[-1] - window_s * 1000, side="left"))
+        return ts[start:], rows[start:]
+
+    def stats(self, pair: str, window_s: float = 300) -> dict:
+        """Windowed figures over the last `window_s` seconds of samples."""
+        ts, rows = self._since(self._buffer(pair), window_s)
+        out = {"pair": pair.upper(), "window_s": window_s, **compute_stats(ts, rows)}
+        if len(ts):
+            out["from"], out["to"] = int(ts[0]), int(ts[-1])
+        return out
+
+    def history(self, pair: str, window_s: float = 300, points: int = 30) -> dict:
+        """Last prices over the window, downsampled to at most `points`."""
+        ts, rows = self._since(self._buffer(pair), window_s)
+        idx = np.unique(np.linspace(0, len(ts) - 1, min(points, len(ts))).astype(int))
+        return {"pair": pair.upper(), "window_s": window_s,
+                "points": [[int(ts[i]), _round(rows[i, _LAST])] for i in idx]}
+
+
+market = MarketData()
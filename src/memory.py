@@ -2,48 +2,569 @@
 """
 Long‑term vector memory for R0
 ------------------------------
-Uses Pinecone’s serverless index + OpenAI embeddings.
+`save_memory` / `retrieve_memory` sit on a pluggable `MemoryBackend`:
+
+* **pinecone** (default) – Pinecone serverless index + OpenAI embeddings.
+* **local**              – `src.vectorstore.LocalVectorStore`: NumPy
+  cosine top‑k over a memory‑mapped float32 matrix + append log, so
+  recall is in‑process and works offline.
+
+Embeddings go through a content‑hash LRU (`CachedEmbeddings`) so identical
+prompts and snippets are only ever embedded once per process.
+
+Writes are off the critical path: `save_memory` enqueues onto a bounded
+queue and a background `MemoryWriter` batch‑embeds / batch‑upserts by
+size or time window (blocking producers only when the queue is full).
+
+Index hygiene (the README's "vector pruning"): near‑duplicate writes are
+suppressed at write time, and `compact_memory()` clusters the stored
+embeddings and keeps only the newest member of each cluster, reporting
+index size and recall latency before / after.
 
 ENV VARS required (already in .env):
     OPENAI_API_KEY     = sk‑...
-    PINECONE_API_KEY   = pc‑...
+    PINECONE_API_KEY   = pc‑...           # pinecone backend only
     PINECONE_ENV       = us-east-1        # ← region where index lives
     PINECONE_INDEX     = r0-memory        # ← exact index name
+
+Optional:
+    R0_MEMORY_BACKEND   = pinecone        # ← or "local"
+    R0_MEMORY_PATH      = .r0_memory      # ← local store dir ("" = RAM only)
+    R0_EMBEDDINGS       = openai          # ← or "hash" (offline, no API key)
+    R0_EMBED_CACHE_SIZE = 2048            # ← embedding LRU entries
+    R0_MEMORY_QUEUE     = 1024            # ← pending writes before backpressure
+    R0_MEMORY_BATCH     = 32              # ← max texts per embed/upsert
+    R0_MEMORY_WINDOW_S  = 0.5             # ← max wait to fill a batch
+    R0_MEMORY_DEDUP     = 0.97            # ← skip writes this similar to a memory
+    R0_MEMORY_DEDUP_CONCURRENCY = 8       # ← parallel Pinecone lookups per batch
+    R0_MEMORY_COMPACT_SIM = 0.95          # ← compaction cluster radius (cosine)
+    R0_MEMORY_COMPACT_S = 0               # ← run compaction every N s (0 = off)
+    R0_MEMORY_COMPACT_MAX = 20000         # ← vectors per Pinecone compaction pass
+
+Compaction can also be run by hand / from cron:
+    python -m src.memory compact
 """
 
 from __future__ import annotations
 
-import os, uuid
-from typing import List
+import os, re, uuid, hashlib, threading, queue, time, atexit, asyncio, logging
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, asdict
+from typing import Callable, List
 from dotenv import load_dotenv
 
 # ---- 1. load .env early ----------------------------------------------------
 load_dotenv(".env", override=True)
 
 # ---- 2. third‑party libs ---------------------------------------------------
-from pinecone import Pinecone                    # v3 client
-from langchain_openai import OpenAIEmbeddings
-from langchain_pinecone import PineconeVectorStore
+from langchain_core.embeddings import Embeddings
+
+import numpy as np
+
+from src.vectorstore import LocalVectorStore, novel_mask, redundant_rows
+from src.telemetry import span, count
 
 # ---- 3. config -------------------------------------------------------------
-API_KEY = os.environ["PINECONE_API_KEY"]
-ENV     = os.environ["PINECONE_ENV"]
-INDEX   = os.environ["PINECONE_INDEX"]
+BACKEND          = os.getenv("R0_MEMORY_BACKEND", "pinecone").lower()
+MEMORY_PATH      = os.getenv("R0_MEMORY_PATH", ".r0_memory")
+EMBEDDINGS       = os.getenv("R0_EMBEDDINGS", "openai").lower()
+EMBED_CACHE_SIZE = int(os.getenv("R0_EMBED_CACHE_SIZE", "2048"))
+WRITE_QUEUE      = int(os.getenv("R0_MEMORY_QUEUE", "1024"))
+WRITE_BATCH      = int(os.getenv("R0_MEMORY_BATCH", "32"))
+WRITE_WINDOW_S   = float(os.getenv("R0_MEMORY_WINDOW_S", "0.5"))
+DEDUP_SIM        = float(os.getenv("R0_MEMORY_DEDUP", "0.97"))       # ≤0 disables
+DEDUP_LOOKUPS    = int(os.getenv("R0_MEMORY_DEDUP_CONCURRENCY", "8"))
+COMPACT_SIM      = float(os.getenv("R0_MEMORY_COMPACT_SIM", "0.95"))
+COMPACT_EVERY_S  = float(os.getenv("R0_MEMORY_COMPACT_S", "0"))      # 0 = no timer
+COMPACT_MAX      = int(os.getenv("R0_MEMORY_COMPACT_MAX", "20000"))   # Pinecone rows per pass
+
+log = logging.getLogger(__name__)
+
+# ---- 4. embeddings -------------------------------------------------------
+class CachedEmbeddings(Embeddings):
+    """
+    LRU front for any `Embeddings`, keyed by the SHA‑256 of the text.
+    Only cache misses are sent to the wrapped model (batched).
+    """
+
+    def __init__(self, inner: Embeddings, maxsize: int = EMBED_CACHE_SIZE):
+        self.inner   = inner
+        self.maxsize = maxsize
+        self._lru: OrderedDict[str, List[float]] = OrderedDict()
+        self._lock   = threading.Lock()
+        self.hits = self.misses = 0
+
+    @staticmethod
+    def _key(text: str) -> str:
+        return hashlib.sha256(text.encode()).hexdigest()
+
+    def _lookup(self, keys: List[str]) -> List[List[float] | None]:
+        out = []
+        with self._lock:
+            for k in keys:
+                vec = self._lru.get(k)
+                if vec is not None:
+                    self._lru.move_to_end(k)
+                out.append(vec)
+            hit = sum(v is not None for v in out)
+            self.hits, self.misses = self.hits + hit, self.misses + len(out) - hit
+        return out
+
+    def _insert(self, keys: List[str], vecs: List[List[float]]) -> None:
+        with self._lock:
+            for k, v in zip(keys, vecs):
+                self._lru[k] = v
+                self._lru.move_to_end(k)
+            while len(self._lru) > self.maxsize:
+                self._lru.popitem(last=False)
+
+    def _split(self, texts: List[str]):
+        """→ keys, cached vectors (None on miss), {key: text} still to embed."""
+        keys = [self._key(t) for t in texts]
+        vecs = self._lookup(keys)
+        todo = {k: t for k, t, v in zip(keys, texts, vecs) if v is None}
+        return keys, vecs, todo
+
+    def _fill(self, keys, vecs, todo: dict, fresh) -> List[List[float]]:
+        self._insert(list(todo), fresh)
+        got = dict(zip(todo, fresh))
+        return [v if v is not None else got[k] for k, v in zip(keys, vecs)]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys, vecs, todo = self._split(texts)
+        if not todo:
+            return vecs
+        with span("embed", op="documents"):
+            fresh = self.inner.embed_documents(list(todo.values()))
+        count("r0_embed_texts_total", len(todo))
+        return self._fill(keys, vecs, todo, fresh)
+
+    def embed_query(self, text: str) -> List[float]:
+        key = self._key(text)
+        vec = self._lookup([key])[0]
+        if vec is None:
+            with span("embed", op="query"):
+                vec = self.inner.embed_query(text)
+            count("r0_embed_texts_total", 1)
+            self._insert([key], [vec])
+        return vec
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys, vecs, todo = self._split(texts)
+        if not todo:
+            return vecs
+        with span("embed", op="documents"):
+            fresh = await self.inner.aembed_documents(list(todo.values()))
+        count("r0_embed_texts_total", len(todo))
+        return self._fill(keys, vecs, todo, fresh)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        key = self._key(text)
+        vec = self._lookup([key])[0]
+        if vec is None:
+            with span("embed", op="query"):
+                vec = await self.inner.aembed_query(text)
+            count("r0_embed_texts_total", 1)
+            self._insert([key], [vec])
+        return vec
+
+
+class HashEmbeddings(Embeddings):
+    """
+    Deterministic feature‑hashing embeddings (word uni‑ + bi‑grams).
+    No network, no model – for offline runs, tests and benchmarks.
+    """
+
+    def __init__(self, dim: int = 384):
+        self.dim = dim
+
+    def embed_query(self, text: str) -> List[float]:
+        vec   = [0.0] * self.dim
+        words = re.findall(r"\w+", text.lower())
+        for tok in words + [f"{a} {b}" for a, b in zip(words, words[1:])]:
+            h = int.from_bytes(hashlib.blake2b(tok.encode(), digest_size=8).digest(), "little")
+            vec[h % self.dim] += 1.0 if (h >> 63) else -1.0
+        return vec
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self.embed_query(t) for t in texts]
+
+
+# ---- 5. storage backends ---------------------------------------------------
+class MemoryBackend(ABC):
+    """
+    Where memories live.  `add` embeds a batch once, drops texts that are
+    ≥ `dedup` cosine‑similar to an existing memory or to an earlier text of
+    the same batch, and hands the rest to `_insert`.  Subclasses implement
+    `_best_existing`, `_insert`, `search`, `size` and `compact`.
+    """
+
+    def __init__(self, embedding: Embeddings, dedup: float = DEDUP_SIM):
+        self.embedding = embedding
+        self.dedup     = dedup
+        self.skipped   = 0                  # near‑duplicates suppressed so far
+
+    def add(self, texts: List[str], metas: List[dict]) -> None:
+        vecs  = self.embedding.embed_documents(texts)
+        metas = [{**m, "ts": time.time()} for m in metas]
+        if self.dedup > 0:
+            mask  = novel_mask(np.asarray(vecs, dtype=np.float32),
+                               self._best_existing(vecs), self.dedup)
+            self.skipped += int((~mask).sum())
+            keep  = np.flatnonzero(mask)
+            texts = [texts[i] for i in keep]
+            vecs  = [vecs[i] for i in keep]
+            metas = [metas[i] for i in keep]
+        if texts:
+            self._insert(vecs, texts, metas)
+
+    @abstractmethod
+    def _best_existing(self, vecs: List[List[float]]) -> np.ndarray:
+        """Highest cosine similarity of each vector to a stored memory."""
+
+    @abstractmethod
+    def _insert(self, vecs: List[List[float]], texts: List[str], metas: List[dict]) -> None:
+        """Store already‑embedded, already‑deduplicated memories."""
+
+    @abstractmethod
+    def search(self, query: str, k: int) -> List[str]:
+        """Texts of the `k` memories closest to `query`."""
+
+    async def asearch(self, query: str, k: int) -> List[str]:
+        return await asyncio.to_thread(self.search, query, k)
+
+    @abstractmethod
+    def size(self) -> int:
+        """Number of stored memories."""
+
+    @abstractmethod
+    def compact(self, threshold: float) -> int:
+        """Collapse clusters of near‑identical memories; returns rows removed."""
+
+
+class PineconeBackend(MemoryBackend):
+    """Pinecone serverless index via `langchain_pinecone`."""
+
+    def __init__(self, embedding: Embeddings, dedup: float = DEDUP_SIM):
+        super().__init__(embedding, dedup)
+        from pinecone import Pinecone                    # v3 client
+        from langchain_pinecone import PineconeVectorStore
+
+        pc  = Pinecone(api_key=os.environ["PINECONE_API_KEY"])
+        self.idx = pc.Index(os.environ["PINECONE_INDEX"],
+                            environment=os.environ["PINECONE_ENV"])  # raises if index missing
+        self.vs  = PineconeVectorStore(index=self.idx, embedding=embedding)  # v3‑native wrapper
+        self._lookups = ThreadPoolExecutor(DEDUP_LOOKUPS, thread_name_prefix="r0-dedup")
+
+    def _best_existing(self, vecs: List[List[float]]) -> np.ndarray:
+        # one top‑1 query per text – issued concurrently so a full batch
+        # costs about one round trip, not one per text
+        best = self._lookups.map(
+            lambda v: self.vs.similarity_search_by_vector_with_score(v, k=1), vecs)
+        return np.array([hits[0][1] if hits else -1.0 for hits in best], dtype=np.float32)
+
+    def _insert(self, vecs: List[List[float]], texts: List[str], metas: List[dict]) -> None:
+        # add_texts re‑embeds, but every text is a CachedEmbeddings hit by now
+        self.vs.add_texts(texts, metadatas=metas, ids=[str(uuid.uuid4()) for _ in texts])
+
+    def search(self, query: str, k: int) -> List[str]:
+        return [d.page_content for d in self.vs.similarity_search(query, k=k)]
+
+    async def asearch(self, query: str, k: int) -> List[str]:
+        return [d.page_content for d in await self.vs.asimilarity_search(query, k=k)]
+
+    def size(self) -> int:
+        return int(self.idx.describe_index_stats().total_vector_count)
+
+    def compact(self, threshold: float, max_rows: int = COMPACT_MAX) -> int:
+        """
+        Page through the index (one `list` page, then one `fetch` of at most
+        100 ids, at a time) and cluster at most `max_rows` vectors per pass,
+        so memory stays bounded by the cap, not the index size.  Vectors
+        past the cap are left for a later pass.
+        """
+        ts, ids, vecs = [], [], []
+        for page in self.idx.list():
+            page = list(page)[: max_rows - len(ids)]
+            for start in range(0, len(page), 100):
+                fetched = self.idx.fetch(ids=page[start : start + 100]).vectors
+                for vid, v in fetched.items():
+                    ts.append(float((v.metadata or {}).get("ts", 0)))
+                    ids.append(vid)
+                    vecs.append(np.asarray(v.values, dtype=np.float32))
+            if len(ids) >= max_rows:
+                break
+        if len(ids) < 2:
+            return 0
+
+        order = np.argsort(np.asarray(ts), kind="stable")   # oldest → newest
+        mat   = np.stack([vecs[i] for i in order])
+        mat  /= np.maximum(np.linalg.norm(mat, axis=1, keepdims=True), 1e-12)
+        drop  = [ids[order[i]] for i in redundant_rows(mat, threshold)]
+        for start in range(0, len(drop), 1000):
+            self.idx.delete(ids=drop[start : start + 1000])
+        return len(drop)
+
+
+class LocalBackend(MemoryBackend):
+    """In‑process NumPy index (see `src.vectorstore`)."""
+
+    def __init__(self, embedding: Embeddings, path: str | None = MEMORY_PATH,
+                 dedup: float = DEDUP_SIM):
+        super().__init__(embedding, dedup)
+        self.store = LocalVectorStore(path or None)
 
-# ---- 4. connect to data‑plane ----------------------------------------------
-pc   = Pinecone(api_key=API_KEY)
-idx  = pc.Index(INDEX, environment=ENV)          # raises if index missing
+    def _best_existing(self, vecs: List[List[float]]) -> np.ndarray:
+        return self.store.max_similarity(vecs)
 
-# ---- 5. langchain vector store ---------------------------------------------
-emb  = OpenAIEmbeddings(model="text-embedding-3-small")
-vs   = PineconeVectorStore(index=idx, embedding=emb)  # v3‑native wrapper
+    def _insert(self, vecs: List[List[float]], texts: List[str], metas: List[dict]) -> None:
+        self.store.add(vecs, texts, metas)
 
-# ---- 6. tiny helpers -------------------------------------------------------
+    def search(self, query: str, k: int) -> List[str]:
+        return [t for _, t, _ in self.store.search(self.embedding.embed_query(query), k)]
+
+    async def asearch(self, query: str, k: int) -> List[str]:
+        vec = await self.embedding.aembed_query(query)
+        return [t for _, t, _ in self.store.search(vec, k)]
+
+    def size(self) -> int:
+        return len(self.store)
+
+    def compact(self, threshold: float) -> int:
+        return self.store.compact(threshold)
+
+
+def _make_embeddings() -> Embeddings:
+    if EMBEDDINGS == "hash":
+        return HashEmbeddings()
+    from langchain_openai import OpenAIEmbeddings
+    return OpenAIEmbeddings(model="text-embedding-3-small")
+
+
+def _make_backend(embedding: Embeddings) -> MemoryBackend:
+    if BACKEND == "local":
+        return LocalBackend(embedding)
+    if BACKEND == "pinecone":
+        return PineconeBackend(embedding)
+    raise ValueError(f"Unknown R0_MEMORY_BACKEND: {BACKEND!r}")
+
+
+# Built on first use – importing this module never touches the network.
+emb: CachedEmbeddings | None = None
+backend: MemoryBackend | None = None
+_init_lock = threading.Lock()
+
+
+def get_backend() -> MemoryBackend:
+    global emb, backend
+    if backend is None:
+        with _init_lock:
+            if backend is None:
+                emb     = CachedEmbeddings(_make_embeddings())
+                backend = _make_backend(emb)
+    return backend
+
+# ---- 6. background write pipeline ------------------------------------------
+_STOP = object()
+
+
+class MemoryWriter:
+    """
+    Bounded queue + one worker thread in front of a batch `sink(texts, metas)`.
+
+    The worker takes the first pending item, then keeps collecting until it
+    has `batch` items or `window_s` has passed, and writes them in one call
+    (→ one embedding request + one upsert).  `put` blocks when the queue is
+    full, which pushes back on producers instead of growing without bound.
+    """
+
+    def __init__(self, sink: Callable[[List[str], List[dict]], None],
+                 maxsize: int = WRITE_QUEUE, batch: int = WRITE_BATCH,
+                 window_s: float = WRITE_WINDOW_S):
+        self.sink     = sink
+        self.batch    = batch
+        self.window_s = window_s
+        self._q: queue.Queue = queue.Queue(maxsize)
+        self._thread: threading.Thread | None = None
+        self._lock    = threading.Lock()
+        self.batches = self.written = self.failed = 0
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="r0-memory-writer",
+                                                daemon=True)
+                self._thread.start()
+
+    def put(self, text: str, meta: dict | None = None) -> None:
+        self._ensure_started()
+        self._q.put((text, meta or {}))               # blocks when full
+
+    async def aput(self, text: str, meta: dict | None = None) -> None:
+        self._ensure_started()
+        try:
+            self._q.put_nowait((text, meta or {}))
+        except queue.Full:                            # backpressure, off‑loop
+            await asyncio.to_thread(self._q.put, (text, meta or {}))
+
+    @property
+    def pending(self) -> int:
+        return self._q.qsize()
+
+    def flush(self) -> None:
+        """Block until everything queued so far has been written."""
+        if self._thread is not None:
+            self._q.join()
+
+    def close(self) -> None:
+        """Flush, then stop the worker (idempotent; registered with atexit)."""
+        if self._thread is None or not self._thread.is_alive():
+            return
+        self._q.put(_STOP)
+        self._thread.join()
+
+    def _run(self) -> None:
+        while True:
+            item = self._q.get()
+            if item is _STOP:
+                self._q.task_done()
+                return
+
+            items, stop = [item], False
+            deadline = time.monotonic() + self.window_s
+            while len(items) < self.batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    nxt = self._q.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if nxt is _STOP:
+                    stop = True
+                    self._q.task_done()
+                    break
+                items.append(nxt)
+
+            self._write(items)
+            for _ in items:
+                self._q.task_done()
+            if stop:
+                return
+
+    def _write(self, items: list) -> None:
+        texts, metas = [t for t, _ in items], [m for _, m in items]
+        try:
+            self.sink(texts, metas)
+            self.batches += 1
+            self.written += len(items)
+        except Exception:                             # never kill the worker
+            self.failed += len(items)
+            log.exception("memory write of %d item(s) failed", len(items))
+
+
+writer = MemoryWriter(lambda texts, metas: get_backend().add(texts, metas))
+atexit.register(writer.close)
+
+
+# ---- 7. tiny helpers -------------------------------------------------------
 def save_memory(text: str, meta: dict | None = None) -> None:
-    """Store a piece of text with optional metadata."""
-    vs.add_texts([text], metadatas=[meta or {}], ids=[str(uuid.uuid4())])
+    """Queue a piece of text (with optional metadata) for background storage."""
+    _ensure_compactor()
+    writer.put(text, meta)
 
 def retrieve_memory(query: str, k: int = 4) -> List[str]:
     """Return up to *k* semantically similar memory snippets."""
-    docs = vs.similarity_search(query, k=k)
-    return [d.page_content for d in docs]
+    store = get_backend()
+    with span("vector", backend=BACKEND):
+        return store.search(query, k)
+
+async def asave_memory(text: str, meta: dict | None = None) -> None:
+    """Async twin of `save_memory` – never blocks the event loop."""
+    _ensure_compactor()
+    await writer.aput(text, meta)
+
+async def aretrieve_memory(query: str, k: int = 4) -> List[str]:
+    """Async twin of `retrieve_memory`."""
+    store = get_backend()
+    with span("vector", backend=BACKEND):
+        return await store.asearch(query, k)
+
+
+# ---- 8. compaction -----------------------------------------------------------
+PROBE_QUERIES = (
+    "server time", "BTC/USD price", "my balance", "pending orders",
+    "last order I placed", "exchange info for ETH/USD",
+)
+
+
+@dataclass
+class CompactionReport:
+    size_before: int
+    size_after: int
+    removed: int
+    recall_ms_before: float             # mean retrieve_memory latency, warm
+    recall_ms_after: float
+    took_s: float
+
+
+def _recall_ms(k: int = 4, rounds: int = 3) -> float:
+    backend = get_backend()
+    for q in PROBE_QUERIES:                             # warm embedding cache
+        backend.search(q, k)
+    t0 = time.perf_counter()
+    for _ in range(rounds):
+        for q in PROBE_QUERIES:
+            backend.search(q, k)
+    return (time.perf_counter() - t0) * 1000 / (rounds * len(PROBE_QUERIES))
+
+
+def compact_memory(threshold: float = COMPACT_SIM) -> CompactionReport:
+    """Flush pending writes, collapse redundant memories and report the effect."""
+    t0 = time.perf_counter()
+    writer.flush()
+    backend = get_backend()
+    size_before, ms_before = backend.size(), _recall_ms()
+    removed = backend.compact(threshold)
+    report = CompactionReport(
+        size_before=size_before,
+        size_after=backend.size(),
+        removed=removed,
+        recall_ms_before=round(ms_before, 3),
+        recall_ms_after=round(_recall_ms(), 3),
+        took_s=round(time.perf_counter() - t0, 3),
+    )
+    log.info("memory compaction: %s", report)
+    return report
+
+
+_compactor: threading.Thread | None = None
+
+
+def _ensure_compactor() -> None:
+    """Start the periodic compaction thread once, if R0_MEMORY_COMPACT_S > 0."""
+    global _compactor
+    if COMPACT_EVERY_S <= 0 or _compactor is not None:
+        return
+
+    def loop() -> None:
+        while True:
+            time.sleep(COMPACT_EVERY_S)
+            try:
+                compact_memory()
+            except Exception:
+                log.exception("memory compaction failed")
+
+    _compactor = threading.Thread(target=loop, name="r0-memory-compactor", daemon=True)
+    _compactor.start()
+
+
+if __name__ == "__main__":
+    import sys, json
+    if sys.argv[1:] != ["compact"]:
+        sys.exit("usage: python -m src.memory compact")
+    print(json.dumps(asdict(compact_memory()), indent=2))
@@ -3,25 +3,43 @@
 Brain nodes for R0, the Roostoo‑trading agent.
 
 • think_node – talks to GPT‑4o mini with tool schemas; returns either
-  {"action": {...}} or {"result": "..."}.
-• act_node   – executes the selected tool and stores the JSON response.
+  {"actions": [{...}, …]} (one or more parallel tool calls) or
+  {"result": "..."}.
+• act_node   – executes the queued tool calls (read‑only ones concurrently)
+  and stores the JSON response(s).
+• route_node – fast path in front of think_node: trivial lookups ("server
+  time", "BTC/USD price" …) are answered from a template, no LLM call.
+• cache_node – entry point: repeats of a recent read‑only turn are served
+  from `src.response_cache`; think / route store the answers they produce.
+• execute_node – runs the `runStrategy` plans think queued, step by step
+  in‑process (src.strategy); think only summarises the report.
+
+Every node has an `a…` coroutine twin so the graph can run under
+`ainvoke` / `astream` directly on the event loop.
+
+The LLM client and tool schemas are built on first use (`get_llm`), so
+importing this module stays cheap; assign `nodes.llm` to override.
 """
 from __future__ import annotations
 from typing import Dict, Any
 from functools import wraps
-import json
+from concurrent.futures import ThreadPoolExecutor
+import os, json, time, inspect, asyncio, logging, threading
 from datetime import datetime
 
-from langchain_openai import ChatOpenAI
 from langchain.schema import SystemMessage, HumanMessage, AIMessage
-from langchain_core.utils.function_calling import convert_to_openai_function
 
-from src.memory import save_memory, retrieve_memory
-from src.tools import TOOLS, tool_runner
+from src.memory import save_memory, retrieve_memory, asave_memory, aretrieve_memory
+from src.tools import TOOLS, READ_ONLY_TOOLS, run_tool_calls, arun_tool_calls
+from src import strategy
 from src.agent_state import State
+from src.context import build_messages as build_context
+from src.router import Route, match as match_route, answer as route_answer
+from src.response_cache import responses, cacheable
+from src.telemetry import span, llm_usage, propagate
+from src import cassette
 
-class RoostooError(RuntimeError):
-    """Raised when the exchange rejects the request or returns non‑200."""
+log = logging.getLogger(__name__)
 
 # ── 1. SYSTEM PROMPT & TOOL SCHEMAS ───────────────────────────────────
 SYSTEM_MSG = (
@@ -29,99 +47,261 @@ SYSTEM_MSG = (
     # … (prompt text unchanged, clipped for brevity) …
     "❌ If the user requests anything outside these capabilities, politely refuse.\n"
 )
-FUNCTION_SCHEMAS = [convert_to_openai_function(t) for t in TOOLS]
 
-llm = ChatOpenAI(
-    model="gpt-4.1",
-    temperature=0,
-    max_tokens=4096,
-    model_kwargs={"functions": FUNCTION_SCHEMAS},
-)
+llm = None                                  # built lazily by get_llm()
+_llm_lock = threading.Lock()
+
 
-# ── 2. SIMPLE LOGGING DECORATOR (prints *after* the node runs) ─────────
-def log_node(label: str):
+def get_llm():
+    """The tool‑bound chat model, constructed on first call."""
+    global llm
+    if llm is None:
+        with _llm_lock:
+            if llm is None:
+                from langchain_openai import ChatOpenAI
+                from langchain_core.utils.function_calling import convert_to_openai_function
+
+                schemas = [convert_to_openai_function(t) for t in TOOLS]
+                # `tools=` (not legacy `functions=`) so the model can emit parallel calls
+                llm = ChatOpenAI(
+                    model="gpt-4.1",
+                    temperature=0,
+                    max_tokens=4096,
+                ).bind_tools(schemas)
+    return llm
+
+# ── 2. NODE SPANS (latency histogram per node, see src.telemetry) ─────
+def traced_node(label: str):
     def decorator(fn):
+        if inspect.iscoroutinefunction(fn):
+            @wraps(fn)
+            async def awrapper(state: State, *args, **kwargs):
+                with span("node", node=label):
+                    new_state = await fn(state, *args, **kwargs)
+                log.debug("%-6s %s", label, new_state.get("actions"))
+                return new_state
+            return awrapper
+
         @wraps(fn)
         def wrapper(state: State, *args, **kwargs):
-            new_state = fn(state, *args, **kwargs)
-            print(f"  ↳ {label:<6}", new_state.get("action"))
+            with span("node", node=label):
+                new_state = fn(state, *args, **kwargs)
+            log.debug("%-6s %s", label, new_state.get("actions"))
             return new_state
         return wrapper
     return decorator
 
+
+def _llm_request(state: State) -> Dict[str, Any]:
+    """Cassette key of a think pass: what the decision depends on (src.cassette)."""
+    return {"text": state["text"], "history": state.get("history") or [],
+            "tools": state.get("tools_used") or [], "last": state.get("last_actions") or [],
+            "error": state.get("error")}
+
+
+def _llm_call(state: State) -> AIMessage:
+    def live() -> AIMessage:
+        with span("llm", node="think"):
+            resp = get_llm().invoke(_build_messages(state))
+        llm_usage(resp)
+        return resp
+    return cassette.tape.call("llm", _llm_request(state), live,
+                              encode=cassette.encode_message, decode=cassette.decode_message)
+
+
+async def _allm_call(state: State) -> AIMessage:
+    async def live() -> AIMessage:
+        with span("llm", node="think"):
+            resp = await get_llm().ainvoke(_build_messages(state))
+        llm_usage(resp)
+        return resp
+    return await cassette.tape.acall("llm", _llm_request(state), live,
+                                     encode=cassette.encode_message,
+                                     decode=cassette.decode_message)
+
 # ── 3. THINK NODE ─────────────────────────────────────────────────────
-@log_node("think")
+@traced_node("think")
 def think_node(state: State) -> Dict[str, Any]:
     """
     Decide the next step.  If we already executed an action in the previous
     loop and the LLM wants to call the *same* tool again, suppress the repeat
     and just return its textual response instead.
+
+    Memory recall runs once per user turn: on the first pass it is started
+    alongside the LLM call and the snippets are kept in state for every
+    later loop of the same turn.  Follow‑ups in a session skip it and rely
+    on the checkpointed `history` instead.
     """
-    messages = [SystemMessage(content=SYSTEM_MSG)]
+    if not _needs_recall(state):
+        resp = _llm_call(state)
+        return _cache_answer(state, _interpret(resp, state))
 
-    # 1 ▸ recalled memories (oldest → newest)
-    for chunk in state.get("recalled", []):
-        messages.append(AIMessage(content=chunk))
+    recall = _recall_pool.submit(propagate(retrieve_memory), state["text"], RECALL_K)
+    update = _interpret(_llm_call(state), state)
+    return _cache_answer(state, {**update, "recalled": recall.result(),
+                                 "recalled_for": state["text"]})
 
-    # 2 ▸ previous tool result (if any)
-    if state.get("result") is not None:
-        messages.append(AIMessage(content=str(state["result"])))
-        
-    if state.get("error"):
-        messages.append(AIMessage(content=f"⚠️ ERROR: {state['error']}"))
 
-    # 3 ▸ newest user prompt
-    messages.append(HumanMessage(content=state["text"]))
+@traced_node("think")
+async def athink_node(state: State) -> Dict[str, Any]:
+    """Async twin of `think_node`."""
+    if not _needs_recall(state):
+        resp = await _allm_call(state)
+        return _cache_answer(state, _interpret(resp, state))
+
+    resp, recalls = await asyncio.gather(
+        _allm_call(state),
+        aretrieve_memory(state["text"], k=RECALL_K),
+    )
+    return _cache_answer(state, {**_interpret(resp, state), "recalled": recalls,
+                                 "recalled_for": state["text"]})
 
-    # 4 ▸ call the model
-    resp = llm.invoke(messages)
-    fc = resp.additional_kwargs.get("function_call")
 
-    last_act = state.get("last_action")           # may be None
+RECALL_K = 4
+HISTORY_TURNS = int(os.getenv("R0_HISTORY_TURNS", "4"))    # short‑term window
+_recall_pool = ThreadPoolExecutor(4, thread_name_prefix="r0-recall")
+
+
+def _needs_recall(state: State) -> bool:
+    return not state.get("history") and state.get("recalled_for") != state["text"]
+
+
+def _build_messages(state: State) -> list:
+    # recalled memories · session history · last tool result · error ·
+    # newest prompt – fitted to the context token budget (src.context)
+    messages, _report = build_context(state, SYSTEM_MSG)
+    return messages
+
+
+def _interpret(resp: AIMessage, state: State) -> Dict[str, Any]:
+    # ▸ read the model's decision – parallel tool_calls, or the legacy
+    #     single function_call as a fallback
+    calls = [{"name": tc["name"], "arguments": tc["args"]} for tc in resp.tool_calls]
+    if not calls and resp.additional_kwargs.get("function_call"):
+        calls = [resp.additional_kwargs["function_call"]]
 
     # ‑‑‑ suppress identical repeat calls ‑‑‑‑‑‑‑‑‑‑‑‑‑‑‑‑‑‑‑‑‑‑‑‑‑‑‑‑‑‑
-    if (
-        fc
-        and last_act
-        and fc.get("name") == last_act.get("name")
-        and fc.get("arguments") == last_act.get("arguments")
-    ):
-        # treat this as the LLM's natural language answer
-        return {"action": None, "result": resp.content.strip()}
+    done  = {_call_key(c) for c in state.get("last_actions") or []}
+    fresh = [c for c in calls if _call_key(c) not in done]
+
+    if fresh:
+        return {"actions": fresh}
+
+    # no (new) call → treat this as the LLM's natural language answer
+    answer = resp.content.strip()
+    return {"actions": [], "result": answer, "history": _remember(state, answer)}
 
-    return {"action": fc} if fc else {"result": resp.content.strip()}
+
+def _remember(state: State, answer: str) -> list:
+    turns = state.get("history", []) + [{"user": state["text"], "assistant": answer}]
+    return turns[-HISTORY_TURNS:] if HISTORY_TURNS > 0 else []
+
+
+def _call_key(call: Dict[str, Any]) -> tuple[str, str]:
+    return call["name"], json.dumps(_parse_args(call), sort_keys=True)
 
 # ── 4. ACT NODE ───────────────────────────────────────────────────────
-@log_node("act")
+@traced_node("act")
 def act_node(state: State) -> Dict[str, Any]:
-    action = state.get("action")
-    if not action:
-        return {"action": None}
+    actions = state.get("actions") or []
+    if not actions:
+        return {"actions": []}
+
+    # 1 ▸ normalise args · 2 ▸ run the batch, catching exchange errors per call
+    outcomes = run_tool_calls(
+        [{"tool": a["name"], "args": _parse_args(a)} for a in actions])
+    return _act_update(state, actions, outcomes)
+
+
+@traced_node("act")
+async def aact_node(state: State) -> Dict[str, Any]:
+    """Async twin of `act_node`."""
+    actions = state.get("actions") or []
+    if not actions:
+        return {"actions": []}
+
+    outcomes = await arun_tool_calls(
+        [{"tool": a["name"], "args": _parse_args(a)} for a in actions])
+    return _act_update(state, actions, outcomes)
 
-    # 1 ▸ normalise args
+
+def _parse_args(action: Dict[str, Any]) -> Dict[str, Any]:
     raw_args = action["arguments"]
-    args = json.loads(raw_args) if isinstance(raw_args, str) else raw_args
+    return json.loads(raw_args) if isinstance(raw_args, str) else raw_args
+
 
-    # 2 ▸ run the tool, catching exchange errors
-    try:
-        result = tool_runner({"tool": action["name"], "args": args})
-        error  = None
-    except RoostooError as exc:
-        result = None
-        error  = str(exc)
+def _act_update(state: State, actions: list, outcomes: list) -> Dict[str, Any]:
+    # 3 ▸ merge the whole batch back in one step.  A single call keeps the
+    #     old shape (raw JSON / error string); a batch yields one outcome
+    #     dict per call plus the joined error text.
+    if len(outcomes) == 1:
+        result, error = outcomes[0]["result"], outcomes[0]["error"]
+    else:
+        result = outcomes
+        error  = "; ".join(f"{o['tool']}: {o['error']}" for o in outcomes if o["error"]) or None
+
+    used = [o["tool"] for o in outcomes]
+    if any(t not in READ_ONLY_TOOLS for t in used):
+        responses.note_mutation()   # cached account answers are stale now
 
-    # 3 ▸ return **both** result *or* error, plus bookkeeping
     return {
-        "result": result,           # dict | None
+        "result": result,           # dict | list | None
         "error":  error,            # str  | None
-        "action": None,
-        "last_action": action,
+        "actions": [],
+        "last_actions": actions,
+        "tools_used": (state.get("tools_used") or []) + used,
     }
 
+# ── 4b. EXECUTE NODE (strategy executor, see src.strategy) ────────────
+@traced_node("execute")
+def execute_node(state: State) -> Dict[str, Any]:
+    """Run each queued `runStrategy` plan without going back to the LLM."""
+    actions = state.get("actions") or []
+    if not actions:
+        return {"actions": []}
+    outcomes = []
+    for a in actions:
+        call, t0 = _strategy_call(a), time.perf_counter()
+        try:
+            report = strategy.run(call["args"]["strategy"], call["args"].get("params"))
+        except (KeyError, ValueError) as exc:
+            outcomes.append(_strategy_outcome(call, None, str(exc), t0))
+            continue
+        outcomes.append(_strategy_outcome(call, report, report["error"], t0))
+    return _act_update(state, actions, outcomes)
+
+
+@traced_node("execute")
+async def aexecute_node(state: State) -> Dict[str, Any]:
+    """Async twin of `execute_node`."""
+    actions = state.get("actions") or []
+    if not actions:
+        return {"actions": []}
+    outcomes = []
+    for a in actions:
+        call, t0 = _strategy_call(a), time.perf_counter()
+        try:
+            report = await strategy.arun(call["args"]["strategy"], call["args"].get("params"))
+        except (KeyError, ValueError) as exc:
+            outcomes.append(_strategy_outcome(call, None, str(exc), t0))
+            continue
+        outcomes.append(_strategy_outcome(call, report, report["error"], t0))
+    return _act_update(state, actions, outcomes)
+
+
+def _strategy_call(action: Dict[str, Any]) -> Dict[str, Any]:
+    return {"tool": action["name"], "args": _parse_args(action)}
+
+
+def _strategy_outcome(call: Dict[str, Any], report: Any, error: str | None,
+                      started: float) -> Dict[str, Any]:
+    # same shape as a tool outcome, so _act_update / think see no difference
+    return {**call, "result": report, "error": error,
+            "ms": round((time.perf_counter() - started) * 1000, 2)}
+
 # ── 5. MEMORY NODE ────────────────────────────────────────────────────
-@log_node("memory")
+@traced_node("memory")
 def memory_node(state: State) -> Dict[str, Any]:
-    text   = state["text"]
     result = state.get("result")
 
     # ① store only successful results
@@ -130,12 +310,100 @@ def memory_node(state: State) -> Dict[str, Any]:
     if state.get("error"):
         save_memory(state["error"])
 
-    recalls = retrieve_memory(text, k=4)
+    return _memory_update(state, result)
+
+
+@traced_node("memory")
+async def amemory_node(state: State) -> Dict[str, Any]:
+    """Async twin of `memory_node`."""
+    result = state.get("result")
+
+    if result is not None:
+        await asave_memory(str(result))
+    if state.get("error"):
+        await asave_memory(state["error"])
 
+    return _memory_update(state, result)
+
+
+def _memory_update(state: State, result: Any) -> Dict[str, Any]:
+    # recall already happened once for this turn (see think_node)
     return {
         "result":   result,
-        "recalled": recalls,
         "loop_count": state.get("loop_count", 0) + 1,
-        "last_action": state.get("last_action"),  # carry forward
-        "action": None,                           # stay explicit
+        "last_actions": state.get("last_actions"),  # carry forward
+        "actions": [],                              # stay explicit
     }
+
+# ── 6. ROUTE NODE (LLM‑free fast path, see src.router) ────────────────
+@traced_node("route")
+def route_node(state: State) -> Dict[str, Any]:
+    """Answer trivial lookups from a template; `{}` hands the turn to think."""
+    route = match_route(state["text"])
+    if route is None:
+        return {}
+    outcomes = run_tool_calls(route.calls)
+    update = _route_update(state, route, outcomes)
+    if update.get("routed"):
+        save_memory(str(outcomes[0]["result"]))
+    return update
+
+
+@traced_node("route")
+async def aroute_node(state: State) -> Dict[str, Any]:
+    """Async twin of `route_node`."""
+    route = match_route(state["text"])
+    if route is None:
+        return {}
+    outcomes = await arun_tool_calls(route.calls)
+    update = _route_update(state, route, outcomes)
+    if update.get("routed"):
+        await asave_memory(str(outcomes[0]["result"]))
+    return update
+
+
+def _route_update(state: State, route: Route, outcomes: list) -> Dict[str, Any]:
+    actions = [{"name": c["tool"], "arguments": c["args"]} for c in route.calls]
+    answer  = route_answer(route, outcomes)
+    if answer is None:
+        # tool failed or odd shape: give think_node the outcome (and mark the
+        # call as done) instead of making it call the same tool again
+        return _act_update(state, actions, outcomes)
+    update = {"result": answer, "routed": route.intent, "last_actions": actions,
+              "tools_used": [c["tool"] for c in route.calls],
+              "history": _remember(state, answer)}
+    return _cache_answer({**state, "tools_used": update["tools_used"]}, update)
+
+
+# ── 7. CACHE NODE (turn‑level response cache, see src.response_cache) ─
+@traced_node("cache")
+def cache_node(state: State) -> Dict[str, Any]:
+    """Serve a fresh cached answer for this prompt; `{}` runs the turn."""
+    if not cacheable(state):
+        return {}
+    return _cache_hit(state, responses.lookup(state["text"]))
+
+
+@traced_node("cache")
+async def acache_node(state: State) -> Dict[str, Any]:
+    """Async twin of `cache_node` (a semantic lookup embeds off‑loop)."""
+    if not cacheable(state):
+        return {}
+    if responses.semantic_sim > 0:
+        return _cache_hit(state, await asyncio.to_thread(responses.lookup, state["text"]))
+    return _cache_hit(state, responses.lookup(state["text"]))
+
+
+def _cache_hit(state: State, entry) -> Dict[str, Any]:
+    if entry is None:
+        return {}
+    return {"result": entry.answer, "recalled": entry.recalled, "cached": True,
+            "history": _remember(state, entry.answer)}
+
+
+def _cache_answer(state: State, update: Dict[str, Any]) -> Dict[str, Any]:
+    """Store a final answer (no further actions) built from read‑only data."""
+    if not update.get("actions") and isinstance(update.get("result"), str) and cacheable(state):
+        responses.store(state["text"], update["result"], state.get("tools_used") or [],
+                        update.get("recalled", state.get("recalled")))
+    return update
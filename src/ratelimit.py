@@ -0,0 +1,234 @@
+# src/ratelimit.py
+"""
+Client‑side rate governor for the Roostoo API
+---------------------------------------------
+Every request in `src.wrappers` takes a token before it is sent, so bursts
+from the server's threadpool / event loop are smoothed to what the
+exchange accepts instead of being answered with 429s.
+
+* Token buckets per traffic class – `public` (market data), `signed`
+  (balance, query…) and `order` (place / cancel) – plus one `global`
+  bucket every request also draws from.
+* Order traffic has priority on the global bucket: reads leave
+  `ORDER_RESERVE` of its burst untouched, so an order never queues
+  behind a burst of market‑data reads.
+* Feedback: 429 / 451 (or an exchange "rate limit" error) empties the
+  bucket, halves its rate and honours `Retry-After`; each success then
+  wins back a tenth of the configured rate (AIMD).
+* The same buckets serve threads (`acquire`) and coroutines
+  (`aacquire`); state changes are guarded by one `threading.Lock`, the
+  waiting itself is `time.sleep` / `asyncio.sleep`.
+
+    ROOSTOO_RATE_LIMIT=1          # 0 = no client‑side limiting
+    ROOSTOO_RATE_PUBLIC=10        # requests / s per class …
+    ROOSTOO_RATE_SIGNED=5
+    ROOSTOO_RATE_ORDER=5
+    ROOSTOO_RATE_GLOBAL=15        # … and across all classes
+    ROOSTOO_RATE_BURST_S=1        # bucket depth in seconds of rate
+    ROOSTOO_RATE_MAX_WAIT_S=30    # give up (RateLimited) beyond this wait
+"""
+
+from __future__ import annotations
+
+import os, re, time, asyncio, threading
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+
+ENABLED       = os.getenv("ROOSTOO_RATE_LIMIT", "1") == "1"
+RATES = {
+    "public": float(os.getenv("ROOSTOO_RATE_PUBLIC", "10")),
+    "signed": float(os.getenv("ROOSTOO_RATE_SIGNED", "5")),
+    "order":  float(os.getenv("ROOSTOO_RATE_ORDER", "5")),
+    "global": float(os.getenv("ROOSTOO_RATE_GLOBAL", "15")),
+}
+BURST_S       = float(os.getenv("ROOSTOO_RATE_BURST_S", "1"))
+MAX_WAIT_S    = float(os.getenv("ROOSTOO_RATE_MAX_WAIT_S", "30"))
+ORDER_RESERVE = 0.25            # share of the global burst only orders may use
+PENALTY_S     = 1.0             # pause after a throttle without Retry-After
+MIN_RATE      = 0.1             # never slow a bucket below this (req/s)
+
+THROTTLE_STATUS = frozenset({429, 451})
+_THROTTLE_TEXT  = re.compile(r"rate.?limit|too many requests", re.I)
+_FAILED         = re.compile(r'"Success"\s*:\s*false')
+ORDER_ENDPOINTS = frozenset({"place_order", "cancel_order"})
+
+
+class RateLimited(Exception):
+    """The wait for a token would exceed `max_wait_s`."""
+
+    def __init__(self, traffic: str, wait_s: float):
+        super().__init__(f"client rate limit: {traffic} traffic would wait {wait_s:.1f}s")
+        self.traffic, self.wait_s = traffic, wait_s
+
+
+def traffic_class(endpoint: str, signed: bool) -> str:
+    if endpoint in ORDER_ENDPOINTS:
+        return "order"
+    return "signed" if signed else "public"
+
+
+def retry_after_s(value: Optional[str]) -> Optional[float]:
+    """`Retry-After` as seconds (delta‑seconds or HTTP date), None if absent / bad."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def is_throttle(status: int, text: str = "") -> bool:
+    """429 / 451, or an error response whose message is about rate limits."""
+    if status in THROTTLE_STATUS:
+        return True
+    failed = status >= 400 or _FAILED.search(text[:128]) is not None
+    return failed and _THROTTLE_TEXT.search(text[:512]) is not None
+
+
+class TokenBucket:
+    """Refill‑on‑read token bucket with an adaptive rate (callers hold the lock)."""
+
+    def __init__(self, name: str, rate: float, burst_s: float = BURST_S):
+        self.name      = name
+        self.base_rate = rate
+        self.rate      = rate
+        self.burst     = max(1.0, rate * burst_s)
+        self.tokens    = self.burst
+        self.blocked_until = 0.0
+        self._stamp    = time.monotonic()
+        self.throttles = 0
+
+    def refill(self, now: float) -> None:
+        self.tokens = min(self.burst, self.tokens + (now - self._stamp) * self.rate)
+        self._stamp = now
+
+    def wait_s(self, now: float, floor: float = 0.0) -> float:
+        """Seconds until a token above `floor` is available (0 = now)."""
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        need = floor + 1.0 - self.tokens
+        return 0.0 if need <= 0 else need / self.rate
+
+    def penalise(self, now: float, pause_s: Optional[float]) -> None:
+        self.throttles += 1
+        self.rate    = max(MIN_RATE, self.rate / 2)
+        self.tokens  = 0.0
+        self.blocked_until = max(self.blocked_until, now + (PENALTY_S if pause_s is None else pause_s))
+
+    def recover(self) -> None:
+        if self.rate < self.base_rate:
+            self.rate = min(self.base_rate, self.rate + self.base_rate / 10)
+
+
+class RateGovernor:
+    """Shared buckets for all wrappers; see the module docstring."""
+
+    def __init__(self, rates: Dict[str, float] = RATES, burst_s: float = BURST_S,
+                 max_wait_s: float = MAX_WAIT_S, enabled: bool = ENABLED):
+        self.enabled    = enabled
+        self.max_wait_s = max_wait_s
+        self.buckets    = {name: TokenBucket(name, r, burst_s) for name, r in rates.items()}
+        self._lock      = threading.Lock()
+        self._waiting: Dict[str, int] = {name: 0 for name in rates}
+
+    # -- core (non‑blocking) ------------------------------------------
+    def _take(self, traffic: str) -> float:
+        """Take a token now (→ 0) or return how long to wait before retrying."""
+        now = time.monotonic()
+        own, shared = self.buckets[traffic], self.buckets["global"]
+        with self._lock:
+            own.refill(now)
+            shared.refill(now)
+            # reads must leave the order reserve in the global bucket
+            floor = 0.0 if traffic == "order" else min(shared.burst * ORDER_RESERVE,
+                                                       shared.burst - 1.0)
+            wait = max(own.wait_s(now), shared.wait_s(now, floor))
+            if wait <= 0:
+                own.tokens    -= 1
+                shared.tokens -= 1
+            return wait
+
+    def _enter(self, traffic: str, delta: int) -> None:
+        with self._lock:
+            self._waiting[traffic] += delta
+
+    def _check(self, traffic: str, since: float, wait: float) -> None:
+        waited = time.monotonic() - since
+        if waited + wait > self.max_wait_s:
+            raise RateLimited(traffic, waited + wait)
+
+    # -- blocking ------------------------------------------------------
+    def acquire(self, traffic: str) -> float:
+        """Block the calling thread until `traffic` may send; returns seconds waited."""
+        if not self.enabled:
+            return 0.0
+        wait = self._take(traffic)
+        if wait <= 0:
+            return 0.0
+        since = time.monotonic()
+        self._enter(traffic, 1)
+        try:
+            while wait > 0:
+                self._check(traffic, since, wait)
+                time.sleep(wait)
+                wait = self._take(traffic)
+        finally:
+            self._enter(traffic, -1)
+        return time.monotonic() - since
+
+    async def aacquire(self, traffic: str) -> float:
+        """Async twin of `acquire` – waits without blocking the event loop."""
+        if not self.enabled:
+            return 0.0
+        wait = self._take(traffic)
+        if wait <= 0:
+            return 0.0
+        since = time.monotonic()
+        self._enter(traffic, 1)
+        try:
+            while wait > 0:
+                self._check(traffic, since, wait)
+                await asyncio.sleep(wait)
+                wait = self._take(traffic)
+        finally:
+            self._enter(traffic, -1)
+        return time.monotonic() - since
+
+    # -- feedback ------------------------------------------------------
+    def observe(self, traffic: str, status: int, retry_after: Optional[str] = None,
+                text: str = "") -> bool:
+        """Feed one response back; returns True if it was a throttle."""
+        if not self.enabled:
+            return False
+        now = time.monotonic()
+        with self._lock:
+            if is_throttle(status, text):
+                pause = retry_after_s(retry_after)
+                self.buckets[traffic].penalise(now, pause)
+                if pause is not None:                    # the server named a time: everyone waits
+                    self.buckets["global"].blocked_until = max(
+                        self.buckets["global"].blocked_until, now + pause)
+                return True
+            if status < 400:
+                self.buckets[traffic].recover()
+        return False
+
+    def levels(self) -> Dict[str, Dict[str, float]]:
+        """Current state of every bucket (for dashboards / metrics)."""
+        now = time.monotonic()
+        with self._lock:
+            out = {}
+            for name, b in self.buckets.items():
+                b.refill(now)
+                out[name] = {"tokens": round(b.tokens, 3), "burst": b.burst,
+                             "rate": round(b.rate, 3), "base_rate": b.base_rate,
+                             "blocked_s": round(max(0.0, b.blocked_until - now), 3),
+                             "waiting": self._waiting.get(name, 0), "throttles": b.throttles}
+            return out
+
+
+governor = RateGovernor()
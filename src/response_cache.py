@@ -0,0 +1,178 @@
+# src/response_cache.py
+"""
+Turn‑level response cache
+-------------------------
+Identical read‑only questions asked within seconds of each other are
+answered from the previous turn instead of re‑running LLM + tools.
+
+* **Key** – the prompt, normalised (case, whitespace, punctuation).  With
+  `R0_RESPONSE_CACHE_SIM` > 0 a miss also tries the nearest cached prompt
+  by embedding cosine (the memory embeddings, so repeats are LRU hits).
+* **Dependencies** – every entry remembers which tools its answer was
+  built from and expires when the freshest of them would: tickers after
+  the ticker budget, exchangeInfo after its TTL, account reads after
+  `R0_RESPONSE_CACHE_ACCOUNT_TTL_S` *or* as soon as any order‑mutating
+  tool runs (`note_mutation`).  Answers that used no tool live for
+  `R0_RESPONSE_CACHE_TTL_S`.
+* **Never cached** – turns that ran a mutating tool (`placeOrder`,
+  `cancelOrder`, anything outside `READ_ONLY_TOOLS`), turns that ended in
+  an error, and `getServerTime` answers.
+
+Only turns without session history are cached; a follow‑up means
+something different in every conversation.
+
+    R0_RESPONSE_CACHE=1               # 0 = off
+    R0_RESPONSE_CACHE_SIZE=512
+    R0_RESPONSE_CACHE_TTL_S=30        # LLM‑only answers
+    R0_RESPONSE_CACHE_ACCOUNT_TTL_S=10
+    R0_RESPONSE_CACHE_SIM=0           # e.g. 0.97 to enable semantic hits
+"""
+
+from __future__ import annotations
+
+import os, re, time, threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+import src.wrappers as w
+from src.tools import READ_ONLY_TOOLS
+
+ENABLED        = os.getenv("R0_RESPONSE_CACHE", "1") == "1"
+MAX_ENTRIES    = int(os.getenv("R0_RESPONSE_CACHE_SIZE", "512"))
+PLAIN_TTL_S    = float(os.getenv("R0_RESPONSE_CACHE_TTL_S", "30"))
+ACCOUNT_TTL_S  = float(os.getenv("R0_RESPONSE_CACHE_ACCOUNT_TTL_S", "10"))
+SEMANTIC_SIM   = float(os.getenv("R0_RESPONSE_CACHE_SIM", "0"))
+
+ACCOUNT_TOOLS = frozenset({"getBalance", "getPendingCount", "queryOrder", "getOrderSummary"})
+
+
+def tool_ttl(tool: str) -> float:
+    """How long an answer built from `tool` stays valid (0 = never cache)."""
+    if tool not in READ_ONLY_TOOLS or tool == "getServerTime":
+        return 0.0
+    if tool in ("getTicker", "getTickers", "getPriceStats", "getPriceHistory"):
+        return w.tickers.default_ttl_s
+    if tool in ("getExchangeInfo", "getPairInfo"):
+        return w.EXINFO_TTL_S
+    if tool in ACCOUNT_TOOLS:
+        return ACCOUNT_TTL_S
+    return 0.0                                          # unknown read: be safe
+
+
+def normalise(text: str) -> str:
+    return " ".join(re.sub(r"[^\w/.%-]+", " ", text.lower()).split())
+
+
+@dataclass
+class Entry:
+    answer: str
+    recalled: List[str]
+    tools: frozenset
+    expires: float                                      # time.monotonic()
+    generation: int                                     # account generation at store
+    vector: Optional[np.ndarray] = field(default=None, repr=False)
+
+
+class ResponseCache:
+    """LRU of finished read‑only turns, invalidated by freshness and mutations."""
+
+    def __init__(self, maxsize: int = MAX_ENTRIES, semantic_sim: float = SEMANTIC_SIM,
+                 embed=None):
+        self.maxsize      = maxsize
+        self.semantic_sim = semantic_sim
+        self._embed       = embed                     # text → vector; default: memory embeddings
+        self._entries: "OrderedDict[str, Entry]" = OrderedDict()
+        self._lock        = threading.Lock()
+        self.generation   = 0                         # bumped by every mutating tool
+        self.hits = self.semantic_hits = self.misses = self.stored = 0
+
+    # ── writes ────────────────────────────────────────────────────────
+    def note_mutation(self) -> None:
+        """An order was placed / cancelled: account‑derived answers are stale."""
+        with self._lock:
+            self.generation += 1
+
+    def store(self, text: str, answer: str, tools: Iterable[str],
+              recalled: Optional[List[str]] = None) -> bool:
+        tools = frozenset(tools)
+        ttl = min((tool_ttl(t) for t in tools), default=PLAIN_TTL_S)
+        if ttl <= 0 or not answer:
+            return False
+        vector = self._vector(text) if self.semantic_sim > 0 else None
+        with self._lock:
+            self._entries[normalise(text)] = Entry(
+                answer, list(recalled or []), tools, time.monotonic() + ttl,
+                self.generation, vector)
+            self._entries.move_to_end(normalise(text))
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+            self.stored += 1
+        return True
+
+    # ── reads ─────────────────────────────────────────────────────────
+    def _valid(self, entry: Entry, now: float) -> bool:
+        if now > entry.expires:
+            return False
+        return not (entry.tools & ACCOUNT_TOOLS and entry.generation != self.generation)
+
+    def lookup(self, text: str) -> Optional[Entry]:
+        key, now = normalise(text), time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._valid(entry, now):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            if entry is not None:
+                del self._entries[key]
+        if self.semantic_sim > 0:
+            entry = self._nearest(text, now)
+            if entry is not None:
+                return entry
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def _nearest(self, text: str, now: float) -> Optional[Entry]:
+        with self._lock:
+            live = [e for e in self._entries.values()
+                    if e.vector is not None and self._valid(e, now)]
+        if not live:
+            return None
+        q = self._vector(text)
+        sims = np.stack([e.vector for e in live]) @ q
+        best = int(np.argmax(sims))
+        if sims[best] < self.semantic_sim:
+            return None
+        with self._lock:
+            self.hits += 1
+            self.semantic_hits += 1
+        return live[best]
+
+    def _vector(self, text: str) -> np.ndarray:
+        if self._embed is None:
+            from src.memory import get_backend
+            self._embed = get_backend().embedding.embed_query
+        vec = np.asarray(self._embed(normalise(text)), dtype=np.float32)
+        return vec / max(float(np.linalg.norm(vec)), 1e-12)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits,
+                    "semantic_hits": self.semantic_hits, "misses": self.misses,
+                    "stored": self.stored, "generation": self.generation}
+
+
+responses = ResponseCache()
+
+
+def cacheable(state: dict) -> bool:
+    """Turns without session history and without an error."""
+    return ENABLED and not state.get("history") and not state.get("error")
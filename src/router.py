@@ -0,0 +1,162 @@
+# src/router.py
+"""
+LLM‑free fast path for trivial intents
+--------------------------------------
+Runs before think_node.  Short, single‑purpose prompts such as "server
+time", "my balance", "BTC/USD price" or "pending orders" are matched by
+rules, the tool is called straight from `TOOL_MAP` (via the same batch
+runner act_node uses, so `tool_start` / `tool_end` still stream) and the
+answer is rendered from a template – no LLM round trip at all.
+
+The router only answers when it is sure: exactly one intent matches, the
+prompt is short, carries no trading / reasoning words, and the tool call
+succeeds.  Anything else falls through to think_node unchanged.
+
+    R0_FAST_PATH=0          # disable
+    R0_FAST_PATH_WORDS=10   # longer prompts always go to the LLM
+    R0_DEFAULT_QUOTE=USD    # "btc price" → BTC/USD
+"""
+
+from __future__ import annotations
+
+import os, re
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+import src.wrappers as w
+
+ENABLED       = os.getenv("R0_FAST_PATH", "1") == "1"
+MAX_WORDS     = int(os.getenv("R0_FAST_PATH_WORDS", "10"))
+DEFAULT_QUOTE = os.getenv("R0_DEFAULT_QUOTE", "USD").upper()
+
+# words that mean the user wants more than a lookup → let the LLM decide
+_UNSURE = re.compile(
+    r"\b(buy|sell|cancel|place|limit|market|trade|swap|convert|why|should|would|could|"
+    r"predict|forecast|compare|versus|vs|history|average|trend|chart|strategy|explain|"
+    r"remember|told|said|yesterday|last week|if|then|but)\b", re.I)
+
+_INTENTS: Dict[str, re.Pattern] = {
+    "server_time": re.compile(r"\b(server|exchange)\s*(time|clock)\b|\bwhat time\b", re.I),
+    "balance":     re.compile(r"\b(balances?|wallet|holdings|funds)\b", re.I),
+    "pending":     re.compile(r"\b(pending|open)\s+orders?\b|\borders?\s+pending\b", re.I),
+    "ticker":      re.compile(r"\b(price|prices|ticker|quote|trading at|worth)\b", re.I),
+}
+
+_PAIR_RE = re.compile(r"\b([A-Za-z0-9]{2,10})\s*/\s*([A-Za-z]{2,5})\b")
+_ALIASES = {"bitcoin": "BTC", "ether": "ETH", "ethereum": "ETH", "solana": "SOL",
+            "dogecoin": "DOGE", "ripple": "XRP", "litecoin": "LTC", "cardano": "ADA"}
+_STOP    = {"PRICE", "PRICES", "TICKER", "QUOTE", "WHAT", "WHATS", "IS", "THE", "OF", "FOR",
+            "ME", "MY", "NOW", "CURRENT", "SHOW", "GET", "TELL", "WORTH", "AT", "TRADING"}
+
+
+@dataclass
+class Route:
+    intent: str
+    calls: List[Dict[str, Any]]                          # {"tool", "args"} for run_tool_calls
+    render: Callable[[List[Dict[str, Any]]], str]
+
+
+# ── matching ──────────────────────────────────────────────────────────
+def _pairs(text: str) -> List[str]:
+    pairs = [f"{a.upper()}/{b.upper()}" for a, b in _PAIR_RE.findall(text)]
+    if pairs:
+        return list(dict.fromkeys(pairs))
+
+    listed = set(w.exchange_info.known_pairs())
+    for word in re.findall(r"[A-Za-z0-9]+", text):
+        coin = _ALIASES.get(word.lower()) or word.upper()
+        if coin in _STOP:
+            continue
+        pair = f"{coin}/{DEFAULT_QUOTE}"
+        # bare symbols: trust the cached pair list, else only ALLCAPS / known names
+        if pair in listed or (not listed and (word.lower() in _ALIASES
+                                              or (word.isupper() and 2 <= len(word) <= 6))):
+            pairs.append(pair)
+    return list(dict.fromkeys(pairs))
+
+
+def match(text: str) -> Optional[Route]:
+    """The single route `text` unambiguously asks for, else None."""
+    if not ENABLED or len(text.split()) > MAX_WORDS or _UNSURE.search(text):
+        return None
+    hits = [name for name, rx in _INTENTS.items() if rx.search(text)]
+    if len(hits) != 1:
+        return None
+
+    intent = hits[0]
+    if intent == "server_time":
+        return Route(intent, [{"tool": "getServerTime", "args": {}}], _render_time)
+    if intent == "balance":
+        return Route(intent, [{"tool": "getBalance", "args": {}}], _render_balance)
+    if intent == "pending":
+        return Route(intent, [{"tool": "getPendingCount", "args": {}}], _render_pending)
+
+    pairs = _pairs(text)
+    if len(pairs) == 1:
+        return Route(intent, [{"tool": "getTicker", "args": {"pair": pairs[0]}}], _render_ticker)
+    if len(pairs) > 1:
+        return Route(intent, [{"tool": "getTickers", "args": {"pairs": pairs}}], _render_tickers)
+    return None
+
+
+# ── templates ─────────────────────────────────────────────────────────
+def _num(x: Any) -> str:
+    return f"{x:,.8f}".rstrip("0").rstrip(".") if isinstance(x, float) else str(x)
+
+
+def _render_time(outcomes: List[Dict[str, Any]]) -> str:
+    ms = int(outcomes[0]["result"])
+    iso = datetime.fromtimestamp(ms / 1000, tz=timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+    return f"The exchange server time is {ms} ({iso} UTC)."
+
+
+def _render_balance(outcomes: List[Dict[str, Any]]) -> str:
+    res = outcomes[0]["result"]
+    wallet = res.get("Wallet") or res.get("SpotWallet") or {}
+    parts = []
+    for coin, bal in sorted(wallet.items()):
+        free, lock = bal.get("Free", 0), bal.get("Lock", 0)
+        if not free and not lock:
+            continue
+        parts.append(f"{coin} {_num(free)}" + (f" (+{_num(lock)} locked)" if lock else ""))
+    return "Your balance: " + ", ".join(parts) + "." if parts else "Your wallet is empty."
+
+
+def _render_pending(outcomes: List[Dict[str, Any]]) -> str:
+    res = outcomes[0]["result"]
+    total = int(res.get("TotalPending", 0))
+    if not total:
+        return "You have no pending orders."
+    per = ", ".join(f"{p} {n}" for p, n in sorted((res.get("OrderPairs") or {}).items()))
+    return f"You have {total} pending order{'s' if total != 1 else ''}" + (f": {per}." if per else ".")
+
+
+def _ticker_line(pair: str, t: Dict[str, Any]) -> str:
+    line = f"{pair} last price {_num(t['LastPrice'])}"
+    if "MaxBid" in t and "MinAsk" in t:
+        line += f" (bid {_num(t['MaxBid'])} / ask {_num(t['MinAsk'])}"
+        line += f", 24h {t['Change'] * 100:+.2f}%)" if "Change" in t else ")"
+    return line
+
+
+def _render_ticker(outcomes: List[Dict[str, Any]]) -> str:
+    (pair, t), = outcomes[0]["result"]["Data"].items()
+    return _ticker_line(pair, t) + "."
+
+
+def _render_tickers(outcomes: List[Dict[str, Any]]) -> str:
+    res = outcomes[0]["result"]
+    if any("error" in t for t in res.values()):
+        raise LookupError("unlisted pair")             # let the LLM explain it
+    return "; ".join(_ticker_line(p, t) for p, t in res.items()) + "."
+
+
+def answer(route: Route, outcomes: List[Dict[str, Any]]) -> Optional[str]:
+    """Template answer for successful outcomes, None to hand over to the LLM."""
+    if any(o["error"] for o in outcomes):
+        return None
+    try:
+        return route.render(outcomes)
+    except (LookupError, TypeError, ValueError, AttributeError):
+        return None                                     # unexpected shape → LLM
@@ -0,0 +1,136 @@
+# src/sessions.py
+"""
+Conversation sessions for R0
+----------------------------
+`ChatRequest.session` maps to a LangGraph `thread_id`; the graph state of
+each session (recalls, last result, short‑term history) is checkpointed so
+a follow‑up continues where the previous turn stopped instead of going
+back to vector recall.
+
+* **memory** (default) – `BoundedMemorySaver`: in‑process, keeps only the
+  newest checkpoints of each session, evicts the least‑recently‑used
+  session beyond `R0_SESSION_MAX` and any session idle for
+  `R0_SESSION_TTL_S` seconds.
+* **sqlite** – `R0_SESSION_STORE=sqlite:/path/to/sessions.db` persists to
+  disk via `langgraph-checkpoint-sqlite` (optional dependency).
+
+`SessionLocks` serialises turns of the same session.
+"""
+
+from __future__ import annotations
+
+import os, time, asyncio, threading, weakref
+from collections import OrderedDict
+from typing import Any
+
+from langgraph.checkpoint.base import BaseCheckpointSaver
+from langgraph.checkpoint.memory import InMemorySaver
+
+SESSION_STORE  = os.getenv("R0_SESSION_STORE", "memory")
+SESSION_MAX    = int(os.getenv("R0_SESSION_MAX", "1000"))
+SESSION_TTL_S  = float(os.getenv("R0_SESSION_TTL_S", "1800"))
+KEEP_CHECKPTS  = 2              # newest checkpoints retained per session
+
+
+class BoundedMemorySaver(InMemorySaver):
+    """
+    `InMemorySaver` with LRU + idle‑TTL eviction of whole sessions and
+    pruning of superseded checkpoints (and their blobs) inside a session.
+    The async methods of `InMemorySaver` delegate to the sync ones, so
+    overriding those covers both.
+    """
+
+    def __init__(self, max_sessions: int = SESSION_MAX, ttl_s: float = SESSION_TTL_S,
+                 keep: int = KEEP_CHECKPTS):
+        super().__init__()
+        self.max_sessions = max_sessions
+        self.ttl_s        = ttl_s
+        self.keep         = keep
+        self._seen: OrderedDict[str, float] = OrderedDict()   # thread_id → last use
+        self._lock        = threading.RLock()
+        self.evicted      = 0
+
+    @property
+    def active(self) -> int:                 # not __len__: an empty saver must stay truthy
+        return len(self._seen)
+
+    # ── bookkeeping ───────────────────────────────────────────────────
+    def _touch(self, config: dict) -> None:
+        tid = config["configurable"]["thread_id"]
+        now = time.monotonic()
+        with self._lock:
+            self._seen[tid] = now
+            self._seen.move_to_end(tid)
+            self._evict(now)
+
+    def _evict(self, now: float) -> None:
+        while self._seen:
+            tid, last = next(iter(self._seen.items()))
+            if len(self._seen) <= self.max_sessions and now - last <= self.ttl_s:
+                break
+            del self._seen[tid]
+            super().delete_thread(tid)
+            self.evicted += 1
+
+    def _prune(self, tid: str, ns: str) -> None:
+        ckpts = self.storage[tid][ns]
+        if len(ckpts) <= self.keep:
+            return
+        for cid in sorted(ckpts)[: -self.keep]:           # ids sort by time
+            del ckpts[cid]
+        for key in [k for k in self.writes if k[0] == tid and k[1] == ns and k[2] not in ckpts]:
+            del self.writes[key]
+
+        live = set()
+        for saved, _meta, _parent in ckpts.values():
+            live.update(self.serde.loads_typed(saved)["channel_versions"].items())
+        for key in [k for k in self.blobs if k[0] == tid and k[1] == ns
+                    and (k[2], k[3]) not in live]:
+            del self.blobs[key]
+
+    # ── saver API ─────────────────────────────────────────────────────
+    def get_tuple(self, config: dict):
+        self._touch(config)
+        return super().get_tuple(config)
+
+    def put(self, config: dict, checkpoint: Any, metadata: Any, new_versions: Any) -> dict:
+        with self._lock:
+            saved = super().put(config, checkpoint, metadata, new_versions)
+            self._prune(config["configurable"]["thread_id"],
+                        config["configurable"]["checkpoint_ns"])
+        self._touch(config)
+        return saved
+
+    def delete_thread(self, thread_id: str) -> None:
+        with self._lock:
+            self._seen.pop(thread_id, None)
+            super().delete_thread(thread_id)
+
+
+async def open_checkpointer(store: str = SESSION_STORE) -> BaseCheckpointSaver:
+    """Create the saver selected by `R0_SESSION_STORE` (must run inside the loop)."""
+    if store == "memory":
+        return BoundedMemorySaver()
+    if store.startswith("sqlite:"):
+        try:
+            import aiosqlite
+            from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+        except ImportError as exc:
+            raise RuntimeError("sqlite sessions need `pip install langgraph-checkpoint-sqlite`") from exc
+        saver = AsyncSqliteSaver(await aiosqlite.connect(store.removeprefix("sqlite:")))
+        await saver.setup()
+        return saver
+    raise ValueError(f"Unknown R0_SESSION_STORE: {store!r}")
+
+
+class SessionLocks:
+    """One asyncio.Lock per live session id; unused locks are garbage‑collected."""
+
+    def __init__(self):
+        self._locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+
+    def __call__(self, session: str) -> asyncio.Lock:
+        lock = self._locks.get(session)
+        if lock is None:
+            lock = self._locks[session] = asyncio.Lock()
+        return lock
@@ -0,0 +1,329 @@
+# src/strategy.py
+"""
+Strategy executor
+-----------------
+Runs multi‑step trading plans (`getBalance → calc qty → placeOrder`)
+in‑process instead of spending one LLM round trip on every step of the
+think / act / memory loop.  The model picks a registered strategy and its
+parameters with a single `runStrategy` call; the graph's execute node
+then
+
+1. runs every read the plan needs concurrently – balance, tickers and
+   pair rules, through `run_tool_calls`, so they stream, trace and record
+   like any other tool call,
+2. computes the orders locally – quantities from quote values, weights or
+   balances, rounded down to the pair's precision; orders worth less than
+   the pair's minimum are skipped,
+3. places them with `placeOrders`, phase by phase (sells before buys, so a
+   rebalance funds its own buys),
+
+and hands the model one report to summarise.  A failed read, a bad
+parameter or a rejected order stops the plan there: the report comes
+back with `error` set and later phases are never sent.
+
+Strategies (`params`):
+
+    orders     {"orders": [{pair, side, quantity | value | fraction, type?, price?}]}
+               value = quote amount; fraction = share of the free balance
+               (quote for BUY, coin for SELL)
+    rebalance  {"targets": {"BTC": 0.5, "ETH": 0.3, "USD": 0.2}, "quote"?, "tolerance"?}
+               weights are normalised; held coins not listed are sold
+    liquidate  {"coins"?: ["ETH", …], "quote"?}    default: every coin held
+
+Every strategy also takes `dry_run: true` – plan and report, place
+nothing.  Register more with `@strategy("name", pairs)`.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from decimal import ROUND_DOWN
+from typing import Any, Callable, Dict, List, Optional
+
+import src.wrappers as w
+from src.router import DEFAULT_QUOTE
+from src.telemetry import span
+from src.tools import run_tool_calls, arun_tool_calls
+
+_FEE_BUFFER = 0.002            # buys keep this share of the quote back for fees
+
+
+# ── market snapshot the plans are computed from ───────────────────────
+@dataclass
+class Snapshot:
+    quote: str
+    wallet: Dict[str, Dict[str, float]] = field(default_factory=dict)   # coin → Free / Lock
+    prices: Dict[str, float] = field(default_factory=dict)              # pair → last price
+    rules:  Dict[str, Dict[str, Any]] = field(default_factory=dict)     # pair → getPairInfo
+
+    def free(self, coin: str) -> float:
+        return float(self.wallet.get(coin, {}).get("Free", 0.0))
+
+    def price(self, pair: str) -> float:
+        if pair not in self.prices:
+            raise ValueError(f"no price for {pair}")
+        return self.prices[pair]
+
+    def pair(self, coin: str) -> str:
+        return f"{coin.upper()}/{self.quote}"
+
+    def held(self, priced: bool = False) -> List[str]:
+        """Coins other than the quote with a free balance (and, if `priced`,
+        a known price – coins without a pair in the quote are left alone)."""
+        return [c for c in self.wallet if c != self.quote and self.free(c) > 0
+                and (not priced or self.pair(c) in self.prices)]
+
+
+@dataclass
+class Strategy:
+    name: str
+    pairs: Callable[[Dict[str, Any], Optional[Snapshot]], List[str]]   # pairs to read
+    plan:  Callable[[Dict[str, Any], Snapshot], List[List[Dict[str, Any]]]]  # order phases
+
+
+STRATEGIES: Dict[str, Strategy] = {}
+
+
+def strategy(name: str, pairs: Callable[[Dict[str, Any], Optional[Snapshot]], List[str]]):
+    """Register `plan(params, snapshot) -> [[order, …], …]` under `name`.
+
+    `pairs(params, snapshot)` names the pairs whose ticker and rules the
+    plan needs; it is asked once before any read (snapshot None) and again
+    once the balance is in, for pairs only the wallet reveals."""
+    def decorator(fn):
+        STRATEGIES[name] = Strategy(name, pairs, fn)
+        return fn
+    return decorator
+
+
+def _quote(params: Dict[str, Any]) -> str:
+    return str(params.get("quote") or DEFAULT_QUOTE).upper()
+
+
+# ── built‑in strategies ───────────────────────────────────────────────
+@strategy("orders", lambda p, snap: [o["pair"] for o in p.get("orders") or []])
+def _orders(params: Dict[str, Any], snap: Snapshot) -> List[List[Dict[str, Any]]]:
+    specs = params.get("orders") or []
+    if not specs:
+        raise ValueError("orders: nothing to place")
+    sells, buys = [], []
+    for spec in specs:
+        pair, side = spec["pair"], str(spec.get("side") or "").upper()
+        if side not in ("BUY", "SELL"):
+            raise ValueError(f"{pair}: side must be BUY or SELL")
+        coin, unit = pair.split("/")
+        px = float(spec.get("price") or snap.price(pair))
+        if spec.get("quantity") is not None:
+            qty = float(spec["quantity"])
+        elif spec.get("value") is not None:
+            qty = float(spec["value"]) / px
+        elif spec.get("fraction") is not None:
+            share = float(spec["fraction"])
+            qty = share * (snap.free(unit) * (1 - _FEE_BUFFER) / px if side == "BUY"
+                           else snap.free(coin))
+        else:
+            raise ValueError(f"{pair}: give quantity, value or fraction")
+        order = {"pair": pair, "side": side, "quantity": qty,
+                 "type": str(spec.get("type") or "MARKET").upper()}
+        if spec.get("price") is not None:
+            order["price"] = float(spec["price"])
+        (buys if side == "BUY" else sells).append(order)
+    return [sells, buys]
+
+
+def _rebalance_pairs(params: Dict[str, Any], snap: Optional[Snapshot]) -> List[str]:
+    quote = _quote(params)
+    coins = [c.upper() for c in params.get("targets") or {}]
+    if snap is not None:
+        coins += snap.held()
+    return [f"{c}/{quote}" for c in dict.fromkeys(coins) if c != quote]
+
+
+@strategy("rebalance", _rebalance_pairs)
+def _rebalance(params: Dict[str, Any], snap: Snapshot) -> List[List[Dict[str, Any]]]:
+    targets = {c.upper(): float(v) for c, v in (params.get("targets") or {}).items()}
+    total_w = sum(targets.values())
+    if not targets or total_w <= 0 or min(targets.values()) < 0:
+        raise ValueError("rebalance: targets must be non‑negative weights per coin")
+    coins = [c for c in dict.fromkeys([*targets, *snap.held(priced=True)]) if c != snap.quote]
+    values = {c: snap.free(c) * snap.price(snap.pair(c)) for c in coins}
+    total = snap.free(snap.quote) + sum(values.values())
+    band = float(params.get("tolerance", 0.01)) * total
+
+    sells, buys = [], []
+    for c in coins:
+        diff = targets.get(c, 0.0) / total_w * total - values[c]
+        if abs(diff) <= band:
+            continue
+        px = snap.price(snap.pair(c))
+        order = {"pair": snap.pair(c), "side": "SELL" if diff < 0 else "BUY",
+                 "quantity": abs(diff) / px, "type": "MARKET"}
+        (sells if diff < 0 else buys).append(order)
+
+    # buys may spend the free quote plus what the sells raise, less fees
+    budget = (snap.free(snap.quote)
+              + sum(o["quantity"] * snap.price(o["pair"]) for o in sells)) * (1 - _FEE_BUFFER)
+    wanted = sum(o["quantity"] * snap.price(o["pair"]) for o in buys)
+    if wanted > budget > 0:
+        for o in buys:
+            o["quantity"] *= budget / wanted
+    return [sells, buys]
+
+
+def _liquidate_pairs(params: Dict[str, Any], snap: Optional[Snapshot]) -> List[str]:
+    quote = _quote(params)
+    coins = [c.upper() for c in params.get("coins") or []]
+    if not coins and snap is not None:
+        coins = snap.held()
+    return [f"{c}/{quote}" for c in coins if c != quote]
+
+
+@strategy("liquidate", _liquidate_pairs)
+def _liquidate(params: Dict[str, Any], snap: Snapshot) -> List[List[Dict[str, Any]]]:
+    coins = [c.upper() for c in params.get("coins") or []] or snap.held(priced=True)
+    return [[{"pair": snap.pair(c), "side": "SELL", "quantity": snap.free(c), "type": "MARKET"}
+             for c in coins if c != snap.quote and snap.free(c) > 0]]
+
+
+# ── executor ──────────────────────────────────────────────────────────
+def _read_calls(pairs: List[str], balance: bool) -> List[Dict[str, Any]]:
+    calls = [{"tool": "getBalance", "args": {}}] if balance else []
+    if pairs:
+        calls.append({"tool": "getTickers", "args": {"pairs": pairs}})
+        calls += [{"tool": "getPairInfo", "args": {"pair": p}} for p in pairs]
+    return calls
+
+
+def _absorb(snap: Snapshot, outcomes: List[Dict[str, Any]]) -> None:
+    """Fold read outcomes into the snapshot.  A failed balance or ticker
+    read raises; a pair without rules is only reported on its orders."""
+    for o in outcomes:
+        res = o["result"]
+        if o["tool"] == "getPairInfo":
+            snap.rules[o["args"]["pair"]] = {"error": o["error"]} if o["error"] else res
+        elif o["error"]:
+            raise ValueError(f"{o['tool']} failed: {o['error']}")
+        elif o["tool"] == "getBalance":
+            wallet = res.get("Wallet") or res.get("SpotWallet") or {}
+            snap.wallet = {c.upper(): {"Free": float(b.get("Free", 0)),
+                                       "Lock": float(b.get("Lock", 0))}
+                           for c, b in wallet.items()}
+        elif o["tool"] == "getTickers":
+            snap.prices.update({pair: float(t["LastPrice"])       # unlisted: no price
+                                for pair, t in res.items() if "LastPrice" in t})
+
+
+def _size(order: Dict[str, Any], snap: Snapshot) -> Optional[str]:
+    """Round the quantity down to the pair's precision in place; the reason
+    the order can't be placed, or None."""
+    rule = snap.rules.get(order["pair"]) or {"error": f"Unknown pair: {order['pair']}"}
+    if "error" in rule:
+        return rule["error"]
+    qty = w._quantize(order["quantity"], "quantity", int(rule["amount_precision"]), ROUND_DOWN)
+    order["quantity"] = str(qty)
+    value = float(qty) * float(order.get("price") or snap.price(order["pair"]))
+    if qty <= 0 or value < float(rule["min_order"]):
+        return f"order value {value:g} is below the minimum {float(rule['min_order']):g}"
+    if not rule.get("can_trade", True):
+        return f"{order['pair']} is not tradable right now"
+    return None
+
+
+def _phases(strat: Strategy, params: Dict[str, Any], snap: Snapshot,
+            report: Dict[str, Any]) -> List[List[Dict[str, Any]]]:
+    phases = []
+    for phase in strat.plan(params, snap):
+        keep = []
+        for order in phase:
+            reason = _size(order, snap)
+            if reason:
+                report["skipped"].append({**order, "reason": reason})
+            else:
+                keep.append(order)
+        if keep:
+            phases.append(keep)
+            report["orders"] += keep
+    return phases
+
+
+def _placed(report: Dict[str, Any], outcome: Dict[str, Any]) -> bool:
+    """Record one placeOrders outcome; False stops the plan."""
+    report["placed"].append(outcome["result"])
+    if outcome["error"]:
+        report["error"] = f"placeOrders failed: {outcome['error']}"
+        return False
+    bad = [r for r in outcome["result"]["results"] if not r["ok"]]
+    if bad:
+        report["error"] = "; ".join(f"{r['order'].get('pair')}: {r['error']}" for r in bad)
+        return False
+    return True
+
+
+def _start(name: str, params: Dict[str, Any]) -> tuple[Strategy, Dict[str, Any]]:
+    strat = STRATEGIES.get(name)
+    if strat is None:
+        raise ValueError(f"Unknown strategy: {name} (have {', '.join(STRATEGIES)})")
+    return strat, {"strategy": name, "params": params, "dry_run": bool(params.get("dry_run")),
+                   "prices": {}, "orders": [], "skipped": [], "placed": [], "error": None}
+
+
+def run(name: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Execute strategy `name` end to end and return its report:
+    `{"strategy", "params", "dry_run", "prices", "orders", "skipped",
+    "placed", "error"}` – `placed` holds one placeOrders result per phase
+    sent.  Unknown strategies raise ValueError; everything else that goes
+    wrong ends up in `error`.
+    """
+    params = params or {}
+    strat, report = _start(name, params)
+    snap = Snapshot(_quote(params))
+    report["prices"] = snap.prices
+    with span("strategy", strategy=name) as sp:
+        try:
+            first = strat.pairs(params, None)
+            _absorb(snap, run_tool_calls(_read_calls(first, True)))
+            more = [p for p in dict.fromkeys(strat.pairs(params, snap)) if p not in first]
+            if more:                                # pairs only the wallet named
+                _absorb(snap, run_tool_calls(_read_calls(more, False)))
+            phases = _phases(strat, params, snap, report)
+        except (ValueError, KeyError, TypeError) as exc:
+            sp.fail(exc)
+            report["error"] = str(exc)
+            return report
+        if not report["dry_run"]:
+            for phase in phases:
+                out = run_tool_calls([{"tool": "placeOrders", "args": {"orders": phase}}])
+                if not _placed(report, out[0]):
+                    break
+        if report["error"]:
+            sp.fail("rejected")
+    return report
+
+
+async def arun(name: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Async twin of `run`."""
+    params = params or {}
+    strat, report = _start(name, params)
+    snap = Snapshot(_quote(params))
+    report["prices"] = snap.prices
+    with span("strategy", strategy=name) as sp:
+        try:
+            first = strat.pairs(params, None)
+            _absorb(snap, await arun_tool_calls(_read_calls(first, True)))
+            more = [p for p in dict.fromkeys(strat.pairs(params, snap)) if p not in first]
+            if more:
+                _absorb(snap, await arun_tool_calls(_read_calls(more, False)))
+            phases = _phases(strat, params, snap, report)
+        except (ValueError, KeyError, TypeError) as exc:
+            sp.fail(exc)
+            report["error"] = str(exc)
+            return report
+        if not report["dry_run"]:
+            for phase in phases:
+                out = await arun_tool_calls([{"tool": "placeOrders", "args": {"orders": phase}}])
+                if not _placed(report, out[0]):
+                    break
+        if report["error"]:
+            sp.fail("rejected")
+    return report
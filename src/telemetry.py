@@ -0,0 +1,295 @@
+# src/telemetry.py
+"""
+Spans, latency histograms and counters
+--------------------------------------
+One cheap instrumentation layer for the whole agent:
+
+* `span(kind, **labels)` times a block (sync or async) and records it in
+  the histogram `r0_<kind>_seconds{labels}`; an exception escaping the
+  block, or `sp.fail(...)` for errors that are handled inside it, also
+  counts `r0_<kind>_errors_total{labels}`.  Kinds in use: `turn`, `node`,
+  `llm`, `tool`, `http`, `embed`, `vector`.
+* `count(name, n, **labels)` for plain counters (LLM tokens, embedded
+  texts …); `gauges(fn)` registers a callback sampled at scrape time
+  (names ending in `_total` are exposed as counters).
+* `registry.render()` is the Prometheus text exposition served by
+  `GET /metrics`.
+* Trace log: a `R0_TRACE_SAMPLE` share of root spans (a turn, or a
+  stray background call) is followed through its children – a context
+  variable carries the trace – and every finished span of it is written
+  as one JSON line to `R0_TRACE_PATH`, or to the `r0.trace` logger when
+  no path is set.
+
+Cost per span is two `perf_counter` calls, a context‑variable set/reset
+and one locked bucket increment; `R0_TELEMETRY=0` makes `span` a no‑op.
+
+    R0_TELEMETRY=1
+    R0_TRACE_SAMPLE=0             # e.g. 0.01 = trace one turn in a hundred
+    R0_TRACE_PATH=                # JSON lines file; empty = logging
+"""
+
+from __future__ import annotations
+
+import os, json, time, random, logging, threading, itertools, contextvars
+from bisect import bisect_left
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+ENABLED      = os.getenv("R0_TELEMETRY", "1") == "1"
+TRACE_SAMPLE = float(os.getenv("R0_TRACE_SAMPLE", "0"))
+TRACE_PATH   = os.getenv("R0_TRACE_PATH", "")
+
+# seconds; 1 ms … 30 s covers a cached lookup up to a slow LLM turn
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+HELP = {
+    "r0_turn_seconds":   "Agent turns (one graph run)",
+    "r0_node_seconds":   "Graph node executions",
+    "r0_llm_seconds":    "Chat model calls",
+    "r0_tool_seconds":   "Tool calls",
+    "r0_http_seconds":   "Exchange HTTP attempts",
+    "r0_embed_seconds":  "Embedding model calls (cache misses only)",
+    "r0_vector_seconds": "Memory vector searches (embedding included)",
+    "r0_strategy_seconds": "Strategy executor runs (reads, planning and orders)",
+    "r0_llm_tokens_total": "Chat model tokens by direction",
+    "r0_embed_texts_total": "Texts sent to the embedding model",
+}
+
+log       = logging.getLogger(__name__)
+trace_log = logging.getLogger("r0.trace")
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _key(labels: Dict[str, Any]) -> Labels:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+class Histogram:
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)      # last slot = +Inf
+        self.sum    = 0.0
+        self.count  = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(BUCKETS, value)] += 1
+        self.sum   += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """Upper bucket bound holding the q‑quantile (a histogram estimate)."""
+        rank, seen = q * self.count, 0
+        for bound, n in zip(BUCKETS + (float("inf"),), self.counts):
+            seen += n
+            if seen >= rank and n:
+                return bound
+        return 0.0
+
+
+class Registry:
+    """Histograms and counters by (name, labels); gauges are pulled on render."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.histograms: Dict[str, Dict[Labels, Histogram]] = {}
+        self.counters: Dict[str, Dict[Labels, float]] = {}
+        self._gauges: List[Callable[[], Iterable[Tuple[str, Dict[str, Any], float]]]] = []
+
+    def observe(self, name: str, value: float, labels: Labels) -> None:
+        with self._lock:
+            series = self.histograms.setdefault(name, {})
+            h = series.get(labels)
+            if h is None:
+                h = series[labels] = Histogram()
+            h.observe(value)
+
+    def inc(self, name: str, n: float, labels: Labels) -> None:
+        with self._lock:
+            series = self.counters.setdefault(name, {})
+            series[labels] = series.get(labels, 0.0) + n
+
+    def gauges(self, fn: Callable[[], Iterable[Tuple[str, Dict[str, Any], float]]]) -> None:
+        self._gauges.append(fn)
+
+    def reset(self) -> None:
+        with self._lock:
+            self.histograms.clear()
+            self.counters.clear()
+
+    def snapshot(self) -> Dict[str, Dict[str, Dict[str, float]]]:
+        """{metric: {"k=v,…": {"count", "sum_ms", "p50_ms", "p99_ms"} | value}}."""
+        name_of = lambda labels: ",".join(f"{k}={v}" for k, v in labels)
+        with self._lock:
+            out: Dict[str, Dict[str, Any]] = {}
+            for name, series in self.histograms.items():
+                out[name] = {name_of(l): {"count": h.count, "sum_ms": round(h.sum * 1000, 3),
+                                          "p50_ms": h.quantile(0.5) * 1000,
+                                          "p99_ms": h.quantile(0.99) * 1000}
+                             for l, h in series.items()}
+            for name, series in self.counters.items():
+                out[name] = {name_of(l): v for l, v in series.items()}
+            return out
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        lines: List[str] = []
+        with self._lock:
+            for name, series in sorted(self.histograms.items()):
+                lines += [f"# HELP {name} {HELP.get(name, name)}", f"# TYPE {name} histogram"]
+                for labels, h in sorted(series.items()):
+                    seen = 0
+                    for bound, n in zip(BUCKETS, h.counts):
+                        seen += n
+                        lines.append(f"{name}_bucket{_fmt(labels, le=f'{bound:g}')} {seen}")
+                    lines.append(f"{name}_bucket{_fmt(labels, le='+Inf')} {h.count}")
+                    lines.append(f"{name}_sum{_fmt(labels)} {h.sum:.6f}")
+                    lines.append(f"{name}_count{_fmt(labels)} {h.count}")
+            for name, series in sorted(self.counters.items()):
+                lines += [f"# HELP {name} {HELP.get(name, name)}", f"# TYPE {name} counter"]
+                lines += [f"{name}{_fmt(l)} {v:g}" for l, v in sorted(series.items())]
+        typed = set()
+        for fn in self._gauges:
+            try:
+                samples = list(fn())
+            except Exception:                       # a broken collector must not kill /metrics
+                log.exception("gauge collector failed")
+                continue
+            for name, labels, value in samples:
+                if name not in typed:                # cumulative stats keep their _total
+                    typed.add(name)
+                    lines.append(f"# TYPE {name} {'counter' if name.endswith('_total') else 'gauge'}")
+                lines.append(f"{name}{_fmt(_key(labels))} {float(value):g}")
+        return "\n".join(lines) + "\n"
+
+
+def _fmt(labels: Labels, **extra: str) -> str:
+    pairs = list(labels) + list(extra.items())
+    if not pairs:
+        return ""
+    esc = lambda v: v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return "{" + ",".join(f'{k}="{esc(v)}"' for k, v in pairs) + "}"
+
+
+registry = Registry()
+
+
+# ── spans ─────────────────────────────────────────────────────────────
+_current: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("r0_span", default=None)
+_ids = itertools.count(1)
+_trace_lock = threading.Lock()
+
+
+class Span:
+    """Timer + labels; use as `with span(...) as sp:` (also inside coroutines)."""
+
+    __slots__ = ("kind", "labels", "error", "trace", "id", "parent", "_t0", "_token")
+
+    def __init__(self, kind: str, labels: Dict[str, Any]):
+        self.kind, self.labels, self.error = kind, labels, None
+        self.trace = self.parent = None
+
+    def label(self, **labels: Any) -> None:
+        """Add labels known only once the block ran (e.g. an HTTP status)."""
+        self.labels.update(labels)
+
+    def fail(self, error: Any) -> None:
+        """Mark a handled error (the block itself does not raise)."""
+        self.error = error if isinstance(error, str) else type(error).__name__
+
+    def __enter__(self) -> "Span":
+        parent = _current.get()
+        if parent is not None:
+            self.trace, self.parent = parent.trace, parent.id
+        elif TRACE_SAMPLE and random.random() < TRACE_SAMPLE:
+            self.trace = f"{random.getrandbits(64):016x}"
+        self.id = next(_ids)
+        self._token = _current.set(self)
+        self._t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        elapsed = time.perf_counter() - self._t0
+        try:
+            _current.reset(self._token)
+        except ValueError:                          # exited in another context (generators)
+            _current.set(None)
+        if exc_type is not None and self.error is None and not issubclass(
+                exc_type, (GeneratorExit, StopAsyncIteration)):
+            self.error = exc_type.__name__
+        labels = _key(self.labels)
+        registry.observe(f"r0_{self.kind}_seconds", elapsed, labels)
+        if self.error is not None:
+            registry.inc(f"r0_{self.kind}_errors_total", 1, labels)
+        if self.trace is not None:
+            _write_trace({"trace": self.trace, "span": self.id, "parent": self.parent,
+                          "kind": self.kind, **self.labels, "ms": round(elapsed * 1000, 3),
+                          "error": self.error, "ts": round(time.time(), 3)})
+
+    async def __aenter__(self) -> "Span":          # for `async with a, span(...)`
+        return self.__enter__()
+
+    async def __aexit__(self, *exc) -> None:
+        self.__exit__(*exc)
+
+
+class _NoSpan:
+    error = None
+
+    def label(self, **labels: Any) -> None:
+        pass
+
+    def fail(self, error: Any) -> None:
+        pass
+
+    def __enter__(self) -> "_NoSpan":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        pass
+
+    async def __aenter__(self) -> "_NoSpan":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        pass
+
+
+_NOOP = _NoSpan()
+
+
+def span(kind: str, **labels: Any):
+    return Span(kind, labels) if ENABLED else _NOOP
+
+
+def count(name: str, n: float = 1, **labels: Any) -> None:
+    if ENABLED and n:
+        registry.inc(name, n, _key(labels))
+
+
+def gauges(fn: Callable[[], Iterable[Tuple[str, Dict[str, Any], float]]]) -> None:
+    """Register `fn() -> [(name, labels, value), …]`, sampled by `/metrics`."""
+    registry.gauges(fn)
+
+
+def propagate(fn: Callable[..., Any]) -> Callable[..., Any]:
+    """`fn` bound to a copy of the current context – hand it to a thread pool
+    so its spans join the caller's trace.  One copy per submitted call."""
+    ctx = contextvars.copy_context()
+    return lambda *a, **kw: ctx.run(fn, *a, **kw)
+
+
+def llm_usage(message: Any) -> None:
+    """Token counters from an AIMessage's `usage_metadata`, when the model reports it."""
+    usage = getattr(message, "usage_metadata", None) or {}
+    count("r0_llm_tokens_total", usage.get("input_tokens", 0), direction="input")
+    count("r0_llm_tokens_total", usage.get("output_tokens", 0), direction="output")
+
+
+def _write_trace(record: Dict[str, Any]) -> None:
+    line = json.dumps(record, default=str)
+    if not TRACE_PATH:
+        trace_log.info(line)
+        return
+    with _trace_lock, open(TRACE_PATH, "a") as f:
+        f.write(line + "\n")
@@ -6,21 +6,37 @@ Roostoo “tool belt” for the LangGraph agent
 * Each function is wrapped with @tool so the LLM can see its JSON schema
   via OpenAI / function‑calling.
 * TOOL_MAP  : convenient name → Tool lookup
-* TOOLS     : list of all Tool objects (pass to ChatOpenAI(functions=...))
+* TOOLS     : list of all Tool objects (pass to ChatOpenAI(...).bind_tools)
 * tool_runner() : executes the tool selected by the LLM and returns its JSON
+* atool_runner(): async twin – every tool also carries a native coroutine
+  (see ASYNC COUNTERPARTS) so `ainvoke` never blocks a thread on I/O
+* run_tool_calls() / arun_tool_calls() : execute a *batch* of parallel tool
+  calls – read‑only tools concurrently, order‑mutating tools one at a time;
+  each call reports `tool_start` / `tool_end` on the graph's custom stream
+* runStrategy : a whole trading plan in one call (src.strategy); the graph
+  sends it to its own execute node
 
 Usage in your graph
 -------------------
     from src.tools import TOOLS, tool_runner
-    llm = ChatOpenAI(model="gpt-4o-mini", functions=TOOLS, temperature=0)
+    llm = ChatOpenAI(model="gpt-4.1", temperature=0).bind_tools(TOOLS)
 """
 
 from __future__ import annotations
-from typing import Dict, Any
+import os, time, asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Iterator, List
 
 
 import src.wrappers as w
+from src.market import market
+from src.ledger import ledger
+from src.history import order_summary, aorder_summary
+from src.telemetry import span, propagate
+from src import cassette
 from langchain.tools import tool, StructuredTool
+from pydantic import BaseModel
+from langgraph.config import get_stream_writer
 
 # ──────────────────────── PUBLIC (no‑auth) TOOLS ──────────────────────────
 
@@ -36,24 +52,52 @@ def getExchangeInfo() -> dict:
     return w.get_exchange_info()
 
 
+@tool
+def getPairInfo(pair: str) -> dict:
+    """Return price/amount precision and minimum order value for one pair (e.g. "BTC/USD")."""
+    return w.get_pair_info(pair)
+
+
 @tool
 def getTicker(pair: str) -> dict:
     """Return last price, bid/ask and 24 h stats for a symbol (e.g. "BTC/USD")."""
     return w.get_ticker(pair)
 
 
+@tool
+def getTickers(pairs: list[str]) -> dict:
+    """Return ticker snapshots for several symbols at once → {pair: ticker}; unlisted pairs map to {"error": ...}."""
+    return w.get_tickers(pairs)
+
+
+# ─────────────────── MARKET‑DATA TOOLS (watch‑list only) ──────────────────
+# Answered from the background poller's ring buffers (src.market) – no
+# HTTP; registered only when R0_WATCHLIST is set.
+
+@tool
+def getPriceStats(pair: str, window_s: float = 300) -> dict:
+    """Return VWAP, % return, volatility, high/low and spread of a watched pair over the last `window_s` seconds."""
+    return market.stats(pair, window_s)
+
+
+@tool
+def getPriceHistory(pair: str, window_s: float = 300, points: int = 30) -> dict:
+    """Return [server_ms, last_price] samples of a watched pair over the last `window_s` seconds (at most `points`)."""
+    return market.history(pair, window_s, points)
+
+
 # ─────────────────────── ACCOUNT / ORDER TOOLS (signed) ───────────────────
 
 @tool
 def getBalance() -> dict:
     """Return wallet balances for all assets."""
-    return w.get_balance()
+    return ledger.balance() if ledger.enabled else w.get_balance()
 
 
 @tool
 def getPendingCount() -> dict:
     """Return the number of currently pending orders."""
-    return w.get_pending_count()
+    return ledger.pending_count() if ledger.enabled else w.get_pending_count()
 
 
 # ────────────────────── placeOrder tool (patched) ────────────────────
@@ -75,7 +119,28 @@ def placeOrder(
     • You may pass EITHER `type` (recommended) OR legacy `otype`.
     • For LIMIT orders you **must** supply `price`.
     """
-    # ── normalise inputs ────────────────────────────────────────────
+    side_uc, t = _normalise_order(side, type, otype)
+
+    # ── forward to wrapper (wrapper expects otype) ──────────────────
+    return _placed(w.place_order(pair, side_uc, t, quantity, price))
+
+
+def _placed(resp: dict) -> dict:
+    """Fold a place response into the local ledger (see src.ledger)."""
+    if ledger.enabled:
+        ledger.apply_order(resp)
+    return resp
+
+
+def _cancelled(resp: dict) -> dict:
+    if ledger.enabled:
+        ledger.apply_cancel(resp)
+    return resp
+
+
+def _normalise_order(side: str, type: str | None,
+                     otype: str | None) -> tuple[str, str]:
+    """Upper‑case `side`/`type` (accepting legacy `otype`) and validate."""
     side_uc  = side.upper()
     t        = (type or otype or "").upper()          # allow both keys
 
@@ -83,10 +148,36 @@ def placeOrder(
         raise ValueError("side must be BUY or SELL")
     if t not in {"MARKET", "LIMIT"}:
         raise ValueError("type must be MARKET or LIMIT")
+    return side_uc, t
 
-    # ── forward to wrapper (wrapper expects otype) ──────────────────
-    return w.place_order(pair, side_uc, t, quantity, price)
 
+class OrderSpec(BaseModel):
+    """One order of a placeOrders batch."""
+    pair: str
+    side: str                              # BUY or SELL
+    quantity: str
+    type: str = "MARKET"                   # MARKET or LIMIT
+    price: float | None = None             # required for LIMIT
+
+
+def _order_dicts(orders: list) -> list[dict]:
+    return [o.model_dump() if isinstance(o, BaseModel) else dict(o) for o in orders]
+
+
+@tool
+def placeOrders(orders: list[OrderSpec]) -> dict:
+    """
+    Place many orders at once (e.g. a rebalance).
+
+    • Each order is checked against the pair's precision / minimum value
+      first; quantity is rounded down and price to the pair's precision.
+    • Valid orders are sent concurrently; the result lists every order
+      with `ok` and either the exchange response or the error.
+    """
+    out = w.place_orders(_order_dicts(orders))
+    if ledger.enabled:
+        ledger.apply_orders(out)
+    return out
 
 
 @tool
@@ -101,9 +192,19 @@ def queryOrder(
     Query past or pending orders.
     • Provide order_id OR filters (pair / pending_only / limit).
     """
-    return w.query_order(order_id=order_id, pair=pair,
-                         offset=offset, limit=limit,
-                         pending_only=pending_only)
+    q = ledger.query if ledger.enabled else w.query_order
+    return q(order_id=order_id, pair=pair, offset=offset, limit=limit,
+             pending_only=pending_only)
+
+
+@tool
+def getOrderSummary(pair: str | None = None) -> dict:
+    """
+    Summarise the whole order history (or one pair): order counts by
+    status, filled buy / sell quantity and average prices, net quantity,
+    realised PnL and fees per pair.  Prefer this over paging queryOrder.
+    """
+    return order_summary(pair)
 
 
 @tool
@@ -115,7 +216,124 @@ def cancelOrder(
     Cancel one, many, or all pending orders.
     • Provide order_id OR pair, or omit both to cancel everything.
     """
-    return w.cancel_order(order_id=order_id, pair=pair)
+    return _cancelled(w.cancel_order(order_id=order_id, pair=pair))
+
+
+# ──────────────────── runStrategy (see src.strategy) ──────────────────
+STRATEGY_TOOL = "runStrategy"
+
+
+@tool
+def runStrategy(strategy: str, params: dict | None = None) -> dict:
+    """
+    Run a whole multi‑step trading plan in ONE call – balances, prices and
+    quantities are worked out locally, then the orders are placed.  Prefer
+    this over chaining getBalance / getTicker / placeOrder yourself.
+
+    • "orders"    – params {"orders": [{"pair", "side", and one of
+      "quantity" | "value" (quote amount) | "fraction" (of the free
+      balance), optional "type" / "price"}]}
+    • "rebalance" – params {"targets": {"BTC": 0.5, "USD": 0.5}, optional
+      "quote", "tolerance"}; held coins not listed are sold
+    • "liquidate" – params {"coins": [...]} (default: everything held)
+    • add "dry_run": true to params to preview the orders without placing.
+    Returns the orders placed or skipped and an `error` if a step failed.
+    """
+    from src.strategy import run            # src.strategy builds on this module
+    return run(strategy, params)
+
+
+# ─────────────────────────── ASYNC COUNTERPARTS ───────────────────────────
+# Same signatures as the sync tools above; attached as `Tool.coroutine` so
+# `tool.ainvoke(...)` awaits the httpx client instead of using a thread.
+
+async def _agetServerTime() -> int:
+    return await w.aget_server_time()
+
+async def _agetExchangeInfo() -> dict:
+    return await w.aget_exchange_info()
+
+async def _agetPairInfo(pair: str) -> dict:
+    return await w.aget_pair_info(pair)
+
+async def _agetTicker(pair: str) -> dict:
+    return await w.aget_ticker(pair)
+
+async def _agetTickers(pairs: list[str]) -> dict:
+    return await w.aget_tickers(pairs)
+
+async def _agetPriceStats(pair: str, window_s: float = 300) -> dict:
+    return market.stats(pair, window_s)                 # in‑memory, nothing to await
+
+async def _agetPriceHistory(pair: str, window_s: float = 300, points: int = 30) -> dict:
+    return market.history(pair, window_s, points)
+
+async def _agetBalance() -> dict:
+    return await (ledger.abalance() if ledger.enabled else w.aget_balance())
+
+async def _agetPendingCount() -> dict:
+    return await (ledger.apending_count() if ledger.enabled else w.aget_pending_count())
+
+async def _aplaceOrder(
+    pair: str,
+    side: str,
+    quantity: str,
+    type: str | None = None,
+    otype: str | None = None,
+    price: float | None = None,
+) -> dict:
+    side_uc, t = _normalise_order(side, type, otype)
+    return _placed(await w.aplace_order(pair, side_uc, t, quantity, price))
+
+async def _aplaceOrders(orders: list[OrderSpec]) -> dict:
+    out = await w.aplace_orders(_order_dicts(orders))
+    if ledger.enabled:
+        ledger.apply_orders(out)
+    return out
+
+async def _aqueryOrder(
+    order_id: str | None = None,
+    pair: str | None = None,
+    offset: int | None = None,
+    limit: int | None = None,
+    pending_only: bool | None = None,
+) -> dict:
+    q = ledger.aquery if ledger.enabled else w.aquery_order
+    return await q(order_id=order_id, pair=pair, offset=offset, limit=limit,
+                   pending_only=pending_only)
+
+async def _agetOrderSummary(pair: str | None = None) -> dict:
+    return await aorder_summary(pair)
+
+async def _arunStrategy(strategy: str, params: dict | None = None) -> dict:
+    from src.strategy import arun
+    return await arun(strategy, params)
+
+async def _acancelOrder(
+    order_id: str | None = None,
+    pair: str | None = None,
+) -> dict:
+    return _cancelled(await w.acancel_order(order_id=order_id, pair=pair))
+
+
+for _t, _coro in [
+    (getServerTime,   _agetServerTime),
+    (getExchangeInfo, _agetExchangeInfo),
+    (getPairInfo,     _agetPairInfo),
+    (getTicker,       _agetTicker),
+    (getTickers,      _agetTickers),
+    (getPriceStats,   _agetPriceStats),
+    (getPriceHistory, _agetPriceHistory),
+    (getBalance,      _agetBalance),
+    (getPendingCount, _agetPendingCount),
+    (placeOrder,      _aplaceOrder),
+    (placeOrders,     _aplaceOrders),
+    (queryOrder,      _aqueryOrder),
+    (getOrderSummary, _agetOrderSummary),
+    (cancelOrder,     _acancelOrder),
+    (runStrategy,     _arunStrategy),
+]:
+    _t.coroutine = _coro
 
 
 # ────────────────────────── TOOL REGISTRY & DISPATCH ──────────────────────
@@ -125,17 +343,42 @@ TOOL_MAP: Dict[str, Any] = {
     for t in [
         getServerTime,
         getExchangeInfo,
+        getPairInfo,
         getTicker,
+        getTickers,
         getBalance,
         getPendingCount,
         placeOrder,
+        placeOrders,
         queryOrder,
+        getOrderSummary,
         cancelOrder,
+        runStrategy,
     ]
 }
+if market.pairs:
+    TOOL_MAP.update({t.name: t for t in (getPriceStats, getPriceHistory)})
 
 TOOLS = list(TOOL_MAP.values())      # handy for ChatOpenAI(functions=...)
 
+# Tools that never change account state – safe to run side by side.
+READ_ONLY_TOOLS = frozenset({
+    "getServerTime",
+    "getExchangeInfo",
+    "getPairInfo",
+    "getTicker",
+    "getTickers",
+    "getPriceStats",
+    "getPriceHistory",
+    "getBalance",
+    "getPendingCount",
+    "queryOrder",
+    "getOrderSummary",
+})
+
+TOOL_CONCURRENCY = int(os.getenv("R0_TOOL_CONCURRENCY", "4"))
+_pool: ThreadPoolExecutor | None = None
+
 def tool_runner(action_json: Dict[str, Any]) -> Dict[str, Any]:
     """
     Execute the JSON function call produced by the LLM.
@@ -150,4 +393,132 @@ def tool_runner(action_json: Dict[str, Any]) -> Dict[str, Any]:
         raise ValueError(f"Unknown tool: {name}")
 
     # StructuredTool: .invoke(...) (or just tool(**args)) handles kwargs
-    return tool.invoke(args)             # <— changed line
+    return cassette.tape.call("tool", {"tool": name, "args": args},
+                              lambda: tool.invoke(args), errors=_CALL_ERRORS)
+
+
+async def atool_runner(action_json: Dict[str, Any]) -> Dict[str, Any]:
+    """Async twin of `tool_runner` – awaits the tool's native coroutine."""
+    name = action_json.get("tool")
+    args = action_json.get("args", {})
+
+    tool = TOOL_MAP.get(name)
+    if tool is None:
+        raise ValueError(f"Unknown tool: {name}")
+
+    return await cassette.tape.acall("tool", {"tool": name, "args": args},
+                                     lambda: tool.ainvoke(args), errors=_CALL_ERRORS)
+
+
+# ───────────────────────────── BATCH EXECUTION ────────────────────────────
+
+def _segments(calls: List[Dict[str, Any]]) -> Iterator[List[int]]:
+    """
+    Split a batch into runs that may execute together: consecutive
+    read‑only calls form one concurrent run; every mutating call is its own
+    run, so orders keep the sequence the model asked for.
+    """
+    run: List[int] = []
+    for i, call in enumerate(calls):
+        if call["tool"] in READ_ONLY_TOOLS:
+            run.append(i)
+            continue
+        if run:
+            yield run
+            run = []
+        yield [i]
+    if run:
+        yield run
+
+
+def _emit(event: str, **data: Any) -> None:
+    """Push a progress event to the graph's `custom` stream (no‑op outside a run)."""
+    try:
+        writer = get_stream_writer()
+    except RuntimeError:
+        return
+    writer({"event": event, **data})
+
+
+def _outcome(call: Dict[str, Any], result: Any = None, error: str | None = None,
+             started: float | None = None) -> Dict[str, Any]:
+    out = {"tool": call["tool"], "args": call.get("args", {}),
+           "result": result, "error": error}
+    if started is not None:
+        out["ms"] = round((time.perf_counter() - started) * 1000, 2)
+    return out
+
+
+def _emit_end(out: Dict[str, Any]) -> Dict[str, Any]:
+    _emit("tool_end", tool=out["tool"], ok=out["error"] is None, ms=out.get("ms"))
+    return out
+
+
+# a failing call becomes that call's `error`, never the whole batch's:
+# exchange rejections, plus bad arguments (pydantic ValidationError is a
+# ValueError, as are the wrappers' own argument checks)
+_CALL_ERRORS = (w.RoostooError, ValueError)
+
+
+def _run_one(call: Dict[str, Any]) -> Dict[str, Any]:
+    with span("tool", tool=call["tool"]) as sp:
+        t0 = time.perf_counter()
+        try:
+            return _outcome(call, result=tool_runner(call), started=t0)
+        except _CALL_ERRORS as exc:
+            sp.fail(exc)
+            return _outcome(call, error=str(exc), started=t0)
+
+
+async def _arun_one(call: Dict[str, Any], sem: asyncio.Semaphore) -> Dict[str, Any]:
+    async with sem:
+        _emit("tool_start", tool=call["tool"], args=call.get("args", {}))
+        with span("tool", tool=call["tool"]) as sp:
+            t0 = time.perf_counter()
+            try:
+                out = _outcome(call, result=await atool_runner(call), started=t0)
+            except _CALL_ERRORS as exc:
+                sp.fail(exc)
+                out = _outcome(call, error=str(exc), started=t0)
+        return _emit_end(out)
+
+
+def run_tool_calls(calls: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Execute several `{"tool": …, "args": …}` calls; returns one
+    `{"tool", "args", "result", "error"}` outcome per call, in input order.
+    Exchange errors and invalid arguments are captured per call instead of
+    failing the batch.
+    """
+    global _pool
+    out: List[Dict[str, Any]] = [None] * len(calls)      # type: ignore[list-item]
+    for run in _segments(calls):
+        # events are emitted from this thread – the pool has no graph context
+        for i in run:
+            _emit("tool_start", tool=calls[i]["tool"], args=calls[i].get("args", {}))
+        if len(run) == 1:
+            out[run[0]] = _emit_end(_run_one(calls[run[0]]))
+            continue
+        if _pool is None:
+            _pool = ThreadPoolExecutor(TOOL_CONCURRENCY, thread_name_prefix="r0-tool")
+        # each call runs in a copy of our context so its spans join the turn's trace
+        futures = [_pool.submit(propagate(_run_one), calls[i]) for i in run]
+        for i, fut in zip(run, futures):
+            out[i] = _emit_end(fut.result())
+    return out
+
+
+async def arun_tool_calls(calls: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Async twin of `run_tool_calls` (bounded by a semaphore, not threads)."""
+    sem = asyncio.Semaphore(TOOL_CONCURRENCY)
+    out: List[Dict[str, Any]] = [None] * len(calls)      # type: ignore[list-item]
+    for run in _segments(calls):
+        # let siblings finish before surfacing an unexpected error
+        results = await asyncio.gather(*(_arun_one(calls[i], sem) for i in run),
+                                       return_exceptions=True)
+        for res in results:
+            if isinstance(res, BaseException):
+                raise res
+        for i, res in zip(run, results):
+            out[i] = res
+    return out
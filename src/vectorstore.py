@@ -0,0 +1,298 @@
+# src/vectorstore.py
+"""
+Local vector index for R0's memory
+----------------------------------
+A tiny, dependency‑light alternative to Pinecone for single‑process use.
+
+* Embeddings live in one contiguous float32 matrix (rows L2‑normalised),
+  so cosine top‑k is a single mat‑vec product + `argpartition`.
+* With a `path`, the matrix is a memory‑mapped file (`vectors.f32`) and the
+  texts/metadata go to an append‑only JSONL log (`log.jsonl`); row *i* of
+  the matrix belongs to line *i* of the log.  Vectors are flushed before
+  their log lines are appended, so the log is authoritative: on load a
+  torn trailing line is cut off (and the log rewritten) and rows past the
+  last complete line are treated as free capacity.
+* `compact` never rewrites live files: it writes the compacted matrix and
+  log as a new generation (`vectors.<g>.f32`, `log.<g>.jsonl`) and then
+  switches `header.json` to it with one atomic rename – a crash at any
+  point leaves either the old or the new generation, never a mix.
+* Without a `path` everything stays in RAM (tests, benchmarks).
+* `novel_mask` / `redundant_rows` implement near‑duplicate suppression at
+  write time and clustering‑style compaction of an existing index.
+"""
+
+from __future__ import annotations
+
+import os, re, json, threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+_VECTORS = "vectors.f32"
+_LOG     = "log.jsonl"
+_HEADER  = "header.json"
+_GEN_RE  = re.compile(r"^(vectors|log)\.\d+\.(f32|jsonl)$")
+
+
+def _gen_name(name: str, gen: int) -> str:
+    """File name of `name` in generation `gen` (0 keeps the plain name)."""
+    stem, ext = name.split(".", 1)
+    return f"{stem}.{gen}.{ext}" if gen else name
+
+
+class LocalVectorStore:
+    """Cosine‑similarity index over a growable float32 matrix."""
+
+    def __init__(self, path: Optional[str] = None, initial_capacity: int = 1024):
+        self.path = path
+        self.dim: Optional[int] = None
+        self._gen = 0                                   # file generation, see compact
+        self.texts: List[str] = []
+        self.metas: List[Dict[str, Any]] = []
+        self._cap  = initial_capacity
+        self._mat: Optional[np.ndarray] = None
+        self._lock = threading.Lock()
+        if path:
+            os.makedirs(path, exist_ok=True)
+            self._load()
+
+    def __len__(self) -> int:
+        return len(self.texts)
+
+    # ── persistence ───────────────────────────────────────────────────
+    def _file(self, name: str, gen: Optional[int] = None) -> str:
+        if name in (_VECTORS, _LOG):
+            name = _gen_name(name, self._gen if gen is None else gen)
+        return os.path.join(self.path, name)            # type: ignore[arg-type]
+
+    def _write_header(self, gen: int) -> None:
+        """Atomically point the index at generation `gen` (the commit point)."""
+        tmp = self._file(_HEADER + ".tmp")
+        with open(tmp, "w") as f:
+            json.dump({"dim": self.dim, "gen": gen}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self._file(_HEADER))
+
+    def _sweep(self) -> None:
+        """Remove files of other generations (a compaction cut short)."""
+        live = {_gen_name(_VECTORS, self._gen), _gen_name(_LOG, self._gen)}
+        for name in os.listdir(self.path):
+            if (name in (_VECTORS, _LOG) or _GEN_RE.match(name)) and name not in live:
+                os.remove(os.path.join(self.path, name))
+
+    def _load(self) -> None:
+        if not os.path.exists(self._file(_HEADER)):
+            return
+        with open(self._file(_HEADER)) as f:
+            header = json.load(f)
+        self.dim  = int(header["dim"])
+        self._gen = int(header.get("gen", 0))
+        self._sweep()
+
+        rows: List[dict] = []
+        torn = False
+        if os.path.exists(self._file(_LOG)):
+            with open(self._file(_LOG), encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        if not line.endswith("\n"):
+                            raise ValueError("unterminated line")
+                        rows.append(json.loads(line))
+                    except ValueError:                  # torn write – drop the rest
+                        torn = True
+                        break
+
+        # the vectors file is preallocated, so its size is capacity, not rows
+        capacity = os.path.getsize(self._file(_VECTORS)) // (4 * self.dim) \
+            if os.path.exists(self._file(_VECTORS)) else 0
+        n = min(len(rows), capacity)
+        self.texts = [r["text"] for r in rows[:n]]
+        self.metas = [r.get("meta", {}) for r in rows[:n]]
+        self._cap  = max(capacity, self._cap)
+        self._map(self._cap)
+        if torn or n < len(rows):                       # never append after a fragment
+            self._rewrite_log()
+
+    def _map(self, cap: int) -> None:
+        """(Re)map the vectors file with room for `cap` rows."""
+        fn = self._file(_VECTORS)
+        need = cap * self.dim * 4                       # type: ignore[operator]
+        with open(fn, "ab") as f:
+            if f.tell() < need:
+                f.truncate(need)
+        self._mat = np.memmap(fn, dtype=np.float32, mode="r+", shape=(cap, self.dim))
+        self._cap = cap
+
+    def _rewrite_log(self) -> None:
+        tmp = self._file(_LOG + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            for t, m in zip(self.texts, self.metas):
+                f.write(json.dumps({"text": t, "meta": m}) + "\n")
+        os.replace(tmp, self._file(_LOG))
+
+    def _init_dim(self, dim: int) -> None:
+        self.dim = dim
+        if self.path:
+            self._write_header(self._gen)
+            self._map(self._cap)
+        else:
+            self._mat = np.zeros((self._cap, dim), dtype=np.float32)
+
+    def _grow(self, need: int) -> None:
+        cap = self._cap
+        while cap < need:
+            cap *= 2
+        if cap == self._cap:
+            return
+        if self.path:
+            self._mat.flush()                           # type: ignore[union-attr]
+            self._map(cap)
+        else:
+            mat = np.zeros((cap, self.dim), dtype=np.float32)
+            mat[: len(self)] = self._mat[: len(self)]   # type: ignore[index]
+            self._mat, self._cap = mat, cap
+
+    # ── writes ────────────────────────────────────────────────────────
+    def add(self, vectors: Sequence[Sequence[float]], texts: Sequence[str],
+            metas: Optional[Sequence[dict]] = None) -> None:
+        if not len(texts):
+            return
+        vecs  = _normalise(np.asarray(vectors, dtype=np.float32))
+        metas = list(metas or [{} for _ in texts])
+        with self._lock:
+            if self.dim is None:
+                self._init_dim(vecs.shape[1])
+            elif vecs.shape[1] != self.dim:
+                raise ValueError(f"embedding dim {vecs.shape[1]} ≠ index dim {self.dim}")
+
+            n = len(self)
+            self._grow(n + len(vecs))
+            self._mat[n : n + len(vecs)] = vecs         # type: ignore[index]
+            if self.path:
+                self._mat.flush()                       # type: ignore[union-attr]
+                with open(self._file(_LOG), "a", encoding="utf-8") as f:
+                    f.writelines(json.dumps({"text": t, "meta": m}) + "\n"
+                                 for t, m in zip(texts, metas))
+            self.texts.extend(texts)
+            self.metas.extend(metas)
+
+    # ── compaction ────────────────────────────────────────────────────
+    def compact(self, threshold: float) -> int:
+        """
+        Drop rows whose cosine similarity to a *newer* kept row is
+        ≥ `threshold` (see `redundant_rows`).  Returns the number removed.
+        """
+        with self._lock:
+            n = len(self)
+            if n < 2:
+                return 0
+            drop = redundant_rows(self._mat[:n], threshold)   # type: ignore[index]
+            if not len(drop):
+                return 0
+
+            keep  = np.setdiff1d(np.arange(n), drop)          # ascending = age order
+            vecs  = np.array(self._mat[keep])                 # type: ignore[index]
+            texts = [self.texts[i] for i in keep]
+            metas = [self.metas[i] for i in keep]
+            if self.path:
+                self._mat = self._write_generation(vecs, texts, metas)
+            else:
+                self._mat[: len(keep)] = vecs                 # type: ignore[index]
+                self._mat[len(keep) : n] = 0                  # type: ignore[index]
+            self.texts, self.metas = texts, metas
+            return len(drop)
+
+    def _write_generation(self, vecs: np.ndarray, texts: List[str],
+                          metas: List[dict]) -> np.ndarray:
+        """Write a complete next generation, fsync it, then switch the header."""
+        gen = self._gen + 1
+        for name in (_VECTORS, _LOG):                   # leftovers of a failed attempt
+            if os.path.exists(self._file(name, gen)):
+                os.remove(self._file(name, gen))
+        mat = np.memmap(self._file(_VECTORS, gen), dtype=np.float32, mode="w+",
+                        shape=(self._cap, self.dim))    # type: ignore[arg-type]
+        mat[: len(vecs)] = vecs
+        mat.flush()
+        with open(self._file(_LOG, gen), "w", encoding="utf-8") as f:
+            f.writelines(json.dumps({"text": t, "meta": m}) + "\n"
+                         for t, m in zip(texts, metas))
+            f.flush()
+            os.fsync(f.fileno())
+        self._write_header(gen)                         # commit point
+        old = self._gen
+        self._gen = gen
+        for name in (_VECTORS, _LOG):
+            os.remove(self._file(name, old))
+        return mat
+
+    # ── reads ─────────────────────────────────────────────────────────
+    def max_similarity(self, vectors: Sequence[Sequence[float]]) -> np.ndarray:
+        """Best cosine score of each vector against the index (‑1 if empty)."""
+        vecs = _normalise(np.asarray(vectors, dtype=np.float32))
+        with self._lock:
+            n = len(self)
+            if n == 0:
+                return np.full(len(vecs), -1.0, dtype=np.float32)
+            return (vecs @ self._mat[:n].T).max(axis=1)       # type: ignore[index]
+
+    def search(self, vector: Sequence[float], k: int = 4) -> List[Tuple[float, str, dict]]:
+        """Top‑`k` rows by cosine similarity → [(score, text, meta)], best first."""
+        with self._lock:
+            n = len(self)
+            if n == 0 or k <= 0:
+                return []
+            q = _normalise(np.asarray(vector, dtype=np.float32)[None, :])[0]
+            scores = self._mat[:n] @ q                  # type: ignore[index]
+            k = min(k, n)
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            return [(float(scores[i]), self.texts[i], self.metas[i]) for i in top]
+
+
+def novel_mask(vectors: np.ndarray, existing_best: np.ndarray, threshold: float) -> np.ndarray:
+    """
+    Write‑time dedup: True for rows that are neither ≥ `threshold` similar
+    to something already stored (`existing_best`) nor to an earlier row of
+    the same batch.
+    """
+    vecs = _normalise(np.asarray(vectors, dtype=np.float32))
+    keep = existing_best < threshold
+    sims = vecs @ vecs.T
+    for i in range(len(vecs)):
+        if keep[i]:
+            keep[i + 1 :] &= sims[i, i + 1 :] < threshold
+    return keep
+
+
+def redundant_rows(mat: np.ndarray, threshold: float, block: int = 512) -> np.ndarray:
+    """
+    Greedy leader clustering, newest first: walking rows from the end, a
+    row becomes a cluster representative unless it is ≥ `threshold`
+    similar to one already kept.  Returns the indices of all other rows.
+
+    Rows must be L2‑normalised.  Work is done in blocks so the cost is one
+    (block × kept) product per block plus a (block × block) product.
+    """
+    n    = len(mat)
+    keep = np.zeros(n, dtype=bool)
+    kept = np.empty((0, mat.shape[1]), dtype=np.float32)
+    for end in range(n, 0, -block):
+        idx   = np.arange(end - 1, max(0, end - block) - 1, -1)   # newest first
+        B     = np.asarray(mat[idx], dtype=np.float32)
+        alive = np.ones(len(idx), dtype=bool)
+        if len(kept):
+            alive &= (B @ kept.T).max(axis=1) < threshold
+        S = B @ B.T
+        for j in range(len(idx)):
+            if alive[j]:
+                alive[j + 1 :] &= S[j, j + 1 :] < threshold
+        keep[idx[alive]] = True
+        kept = np.vstack([kept, B[alive]])
+    return np.flatnonzero(~keep)
+
+
+def _normalise(mat: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(mat, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return mat / norms
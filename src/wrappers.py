@@ -1,166 +1,785 @@
-import os, time, hmac, hashlib, requests, urllib.parse
+import os, time, hmac, hashlib, random, asyncio, threading, requests, urllib.parse
+import httpx
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal, ROUND_DOWN, ROUND_HALF_EVEN
+from dataclasses import dataclass, asdict
+from requests.adapters import HTTPAdapter
 from dotenv import load_dotenv
-from typing import Any, Dict, Optional
+from typing import (Any, AsyncIterator, Awaitable, Callable, Dict, Hashable, Iterable,
+                    Iterator, List, Optional)
+
+from src.ratelimit import governor, traffic_class, RateLimited
+from src.telemetry import span
 
 load_dotenv()
 KEY, SECRET = os.getenv("ROOSTOO_KEY"), os.getenv("ROOSTOO_SECRET")
 
 BASE = "https://mock-api.roostoo.com/v3"
 
+# ── transport settings (override via env) ─────────────────────────────
+POOL_SIZE   = int(os.getenv("ROOSTOO_POOL_SIZE", "16"))   # keep‑alive sockets
+MAX_RETRIES = int(os.getenv("ROOSTOO_MAX_RETRIES", "2"))  # idempotent reads only
+BACKOFF_S   = float(os.getenv("ROOSTOO_BACKOFF_S", "0.2"))
+
+EXINFO_TTL_S   = float(os.getenv("ROOSTOO_EXINFO_TTL_S", "300"))   # pair metadata
+CLOCK_RESYNC_S = float(os.getenv("ROOSTOO_CLOCK_RESYNC_S", "60"))  # serverTime sync
+TICKER_TTL_S   = float(os.getenv("ROOSTOO_TICKER_TTL_S", "2"))     # default staleness budget
+
+ORDER_CONCURRENCY = int(os.getenv("ROOSTOO_ORDER_CONCURRENCY", "4"))  # bulk orders in flight
+ORDER_PAGE        = int(os.getenv("ROOSTOO_ORDER_PAGE", "100"))        # query_order page size
+
+CONNECT_TIMEOUT = 3.05
+TIMEOUTS: Dict[str, float] = {          # read timeout per endpoint (s)
+    "serverTime":    5,
+    "exchangeInfo":  5,
+    "ticker":        5,
+    "balance":       5,
+    "pending_count": 5,
+    "place_order":   10,
+    "query_order":   10,
+    "cancel_order":  10,
+}
+RETRY_STATUS = frozenset({429, 500, 502, 503, 504})
+
+# HMAC key schedule is computed once; every signature is a cheap .copy()
+_HMAC = hmac.new(SECRET.encode(), digestmod=hashlib.sha256) if SECRET else None
+
 
 def _sign(payload: str) -> str:
-    return hmac.new(SECRET.encode(), payload.encode(), hashlib.sha256).hexdigest()
+    if _HMAC is None:
+        raise RoostooError("ROOSTOO_SECRET is not set")
+    h = _HMAC.copy()
+    h.update(payload.encode())
+    return h.hexdigest()
 
 class RoostooError(RuntimeError):
     """Raised when the exchange rejects the request or returns non‑200."""
-    
-def get_server_time() -> int:
-    """GET /v3/serverTime – returns epoch‑ms."""
-    url = f"{BASE}/serverTime"
-    r = requests.get(url, timeout=5)
-    r.raise_for_status()
-    return int(r.json()["ServerTime"])
 
-def get_exchange_info() -> dict:
-    """GET /v3/exchangeInfo – returns exchange information."""
-    url = f"{BASE}/exchangeInfo"
-    r = requests.get(url, timeout=5)
-    r.raise_for_status()
-    return r.json()
 
-def get_ticker(pair: str) -> dict:
-    """
-    GET /v3/ticker?pair=…&timestamp=…
-    Returns last price, bid/ask, volume for `pair`.
-    """
-    ts   = int(time.time() * 1000)                       # current epoch‑ms
-    pair_q = urllib.parse.quote_plus(pair)               # encode 'BTC/USD' → 'BTC%2FUSD'
-    url  = f"{BASE}/ticker?pair={pair_q}&timestamp={ts}"
+# ── shared keep‑alive session ─────────────────────────────────────────
+def _make_session() -> requests.Session:
+    s = requests.Session()
+    adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE)
+    s.mount("https://", adapter)
+    s.mount("http://", adapter)
+    return s
+
+session = _make_session()
+
+
+def _canonical(params: Dict[str, Any]) -> str:
+    """Sorted, URL‑encoded `k=v&…` string – this exact text is what gets signed."""
+    return urllib.parse.urlencode(sorted(params.items()), safe="/")
 
-    r = requests.get(url, timeout=5)
 
+def _prepare(params: Optional[Dict[str, Any]], signed: bool,
+             timestamp: bool) -> tuple[str, Dict[str, str]]:
+    """Build the canonical payload + auth headers for one attempt."""
+    body = {k: v for k, v in (params or {}).items() if v is not None}
+    if signed or timestamp:
+        body["timestamp"] = clock.now_ms()       # exchange‑clock aligned
+        clock.maybe_resync()
+    payload = _canonical(body)
+
+    hdr: Dict[str, str] = {}
+    if signed:
+        hdr["RST-API-KEY"]   = KEY
+        hdr["MSG-SIGNATURE"] = _sign(payload)
+    return payload, hdr
+
+
+def _decode(status: int, reason: str, parse, text: str) -> Any:
+    """Parse the body and raise **RoostooError** on HTTP‑ or exchange‑level errors."""
     try:
-        data = r.json()
+        data = parse()
     except ValueError:
-        data = {"raw": r.text.strip()}
-
-    if not r.ok:
-        raise RoostooError(f"HTTP {r.status_code} {r.reason} — {data}")
+        data = {"raw": text.strip()}
 
+    if not 200 <= status < 400:
+        raise RoostooError(f"HTTP {status} {reason} — {data}")
     if isinstance(data, dict) and (not data.get("Success", True) or data.get("ErrMsg")):
         raise RoostooError(f"Exchange error: {data.get('ErrMsg', data)}")
-
     return data
 
-def get_balance() -> dict:
-    """GET /v3/balance?timestamp=… – returns account balance."""
-    ts = int(time.time() * 1000)                # current epoch‑ms
-
-    payload = f"timestamp={ts}"                 # 1. canonical string
-    sig     = _sign(payload)                    # 2. HMAC
-
-    url = f"{BASE}/balance?{payload}"           # 3. include timestamp in URL
-    hdr = {
-        "RST-API-KEY": KEY,
-        "MSG-SIGNATURE": sig,
-    }
 
-    r = requests.get(url, headers=hdr, timeout=5)
+def _request(
+    method: str,
+    endpoint: str,
+    params: Optional[Dict[str, Any]] = None,
+    *,
+    signed: bool = False,
+    timestamp: bool = False,
+) -> Any:
+    """
+    Single request path for every helper below.
+
+    • `timestamp` / `signed` add a fresh epoch‑ms timestamp on *each* attempt,
+      so retried signed requests are never stale.
+    • GETs are idempotent and retried up to MAX_RETRIES times on network
+      errors and 429/5xx with full‑jitter exponential backoff.
+      POSTs (orders!) are sent exactly once.
+    • Each attempt first takes a token from the shared rate governor
+      (`src.ratelimit`) and reports the response status back to it.
+    """
+    url      = f"{BASE}/{endpoint}"
+    timeout  = (CONNECT_TIMEOUT, TIMEOUTS.get(endpoint, 10))
+    is_get   = method == "GET"
+    attempts = 1 + (MAX_RETRIES if is_get else 0)
+    traffic  = traffic_class(endpoint, signed)
+
+    for attempt in range(attempts):
+        try:
+            governor.acquire(traffic)
+        except RateLimited as e:
+            raise RoostooError(str(e)) from e
+        payload, hdr = _prepare(params, signed, timestamp)
+        with span("http", endpoint=endpoint) as sp:
+            try:
+                if is_get:
+                    r = session.get(f"{url}?{payload}" if payload else url,
+                                    headers=hdr, timeout=timeout)
+                else:
+                    hdr["Content-Type"] = "application/x-www-form-urlencoded"
+                    r = session.post(url, data=payload, headers=hdr, timeout=timeout)
+            except requests.RequestException as e:
+                sp.fail(e)
+                r, err = None, e
+            _http_outcome(sp, r)
+        if r is None:
+            if attempt + 1 < attempts:
+                time.sleep(_backoff(attempt))
+                continue
+            raise RoostooError(f"Network/HTTP error: {err}") from err
+
+        _observe(traffic, r.status_code, r.headers, r.content)
+        if r.status_code in RETRY_STATUS and attempt + 1 < attempts:
+            time.sleep(_backoff(attempt))
+            continue
+        return _decode(r.status_code, r.reason, r.json, r.text)
+
+
+def _http_outcome(sp, r) -> None:
+    """Status class label for the attempt's span; 4xx/5xx count as errors."""
+    status = "network" if r is None else f"{r.status_code // 100}xx"
+    sp.label(status=status)
+    if r is not None and r.status_code >= 400:
+        sp.fail(str(r.status_code))
+
+
+def _observe(traffic: str, status: int, headers, content: bytes) -> None:
+    """Rate feedback: status, Retry-After and the head of the body."""
+    governor.observe(traffic, status, headers.get("Retry-After"),
+                     content[:512].decode("utf-8", "replace"))
+
+
+def _backoff(attempt: int) -> float:
+    """Full‑jitter exponential backoff delay for retry number `attempt`."""
+    return random.uniform(0, BACKOFF_S * (2 ** attempt))
+
+
+# ── async transport (httpx) ───────────────────────────────────────────
+_aclients: Dict[asyncio.AbstractEventLoop, httpx.AsyncClient] = {}
+
+
+def _get_aclient() -> httpx.AsyncClient:
+    """
+    Keep‑alive AsyncClient of the running event loop.  A client's
+    connections belong to the loop that opened them, so each loop gets its
+    own (e.g. `asyncio.run` in a CLI or test after the server's loop);
+    clients of closed loops are dropped.
+    """
+    loop   = asyncio.get_running_loop()
+    client = _aclients.get(loop)
+    if client is None or client.is_closed:
+        for dead in [l for l in _aclients if l.is_closed()]:
+            del _aclients[dead]
+        client = _aclients[loop] = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=POOL_SIZE,
+                                max_keepalive_connections=POOL_SIZE),
+        )
+    return client
 
-    # --- robust error handling like other helpers ---
-    try:
-        data = r.json()
-    except ValueError:
-        data = {"raw": r.text.strip()}
 
-    if not r.ok:
-        raise RoostooError(f"HTTP {r.status_code} {r.reason} — {data}")
-    if isinstance(data, dict) and data.get("ErrMsg"):
-        raise RoostooError(f"Exchange error: {data['ErrMsg']}")
+async def aclose() -> None:
+    """Close the running loop's AsyncClient (call from the server's shutdown hook)."""
+    client = _aclients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
 
-    return data
 
-def get_pending_count() -> dict:
+async def _arequest(
+    method: str,
+    endpoint: str,
+    params: Optional[Dict[str, Any]] = None,
+    *,
+    signed: bool = False,
+    timestamp: bool = False,
+) -> Any:
+    """Async twin of `_request` – same signing, retry and error semantics."""
+    url      = f"{BASE}/{endpoint}"
+    timeout  = httpx.Timeout(TIMEOUTS.get(endpoint, 10), connect=CONNECT_TIMEOUT)
+    is_get   = method == "GET"
+    attempts = 1 + (MAX_RETRIES if is_get else 0)
+    client   = _get_aclient()
+    traffic  = traffic_class(endpoint, signed)
+
+    for attempt in range(attempts):
+        try:
+            await governor.aacquire(traffic)
+        except RateLimited as e:
+            raise RoostooError(str(e)) from e
+        payload, hdr = _prepare(params, signed, timestamp)
+        with span("http", endpoint=endpoint) as sp:
+            try:
+                if is_get:
+                    r = await client.get(f"{url}?{payload}" if payload else url,
+                                         headers=hdr, timeout=timeout)
+                else:
+                    hdr["Content-Type"] = "application/x-www-form-urlencoded"
+                    r = await client.post(url, content=payload, headers=hdr,
+                                          timeout=timeout)
+            except httpx.HTTPError as e:
+                sp.fail(e)
+                r, err = None, e
+            _http_outcome(sp, r)
+        if r is None:
+            if attempt + 1 < attempts:
+                await asyncio.sleep(_backoff(attempt))
+                continue
+            raise RoostooError(f"Network/HTTP error: {err}") from err
+
+        _observe(traffic, r.status_code, r.headers, r.content)
+        if r.status_code in RETRY_STATUS and attempt + 1 < attempts:
+            await asyncio.sleep(_backoff(attempt))
+            continue
+        return _decode(r.status_code, r.reason_phrase, r.json, r.text)
+
+
+def _spawn(fn: Callable[[], Any], name: str) -> None:
+    """Run `fn` on a daemon thread (background refreshes)."""
+    threading.Thread(target=fn, name=name, daemon=True).start()
+
+
+# ── singleflight (request coalescing) ─────────────────────────────────
+class _Call:
+    __slots__ = ("done", "value", "exc")
+
+    def __init__(self):
+        self.done  = threading.Event()
+        self.value = None
+        self.exc: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """Concurrent `do(key, fn)` calls share one execution of `fn` (threads)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            call   = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.done.wait()
+            if call.exc is not None:
+                raise call.exc
+            return call.value
+
+        try:
+            call.value = fn()
+        except BaseException as e:
+            call.exc = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.value
+
+
+class AsyncSingleFlight:
+    """Asyncio flavour of `SingleFlight` – waiters share one task."""
+
+    def __init__(self):
+        self._tasks: Dict[Hashable, asyncio.Future] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._tasks.get(key)
+        if task is None:
+            task = self._tasks[key] = asyncio.ensure_future(fn())
+            task.add_done_callback(lambda _t: self._tasks.pop(key, None))
+        return await asyncio.shield(task)    # one waiter cancelling ≠ all
+
+
+# ── server clock model ────────────────────────────────────────────────
+class ServerClock:
     """
-    GET /v3/pending_count?timestamp=…
-    Returns the count of pending orders.
+    Local model of the exchange clock.
+
+    Each sync is one serverTime round trip.  The offset is taken from the
+    lowest‑RTT sample of the last `window` syncs (NTP‑style clock filter),
+    so one slow response can't skew it.  Between syncs `now_ms()` is
+    answered locally; `maybe_resync()` refreshes in the background.
     """
-    timestamp = int(time.time() * 1000)         # Generate current epoch‑ms
-    payload = f"timestamp={timestamp}"          # 1. canonical string
-    sig     = _sign(payload)                    # 2. HMAC
-
-    url = f"{BASE}/pending_count?{payload}"     # 3. include timestamp in URL
-    hdr = {
-        "RST-API-KEY": KEY,
-        "MSG-SIGNATURE": sig,
-    }
 
-    r = requests.get(url, headers=hdr, timeout=5)
+    RETRY_S = 5.0                       # back‑off after a failed sync
+
+    def __init__(self, resync_s: float = CLOCK_RESYNC_S, window: int = 8):
+        self.resync_s   = resync_s
+        self.offset_ms  = 0.0
+        self._samples: deque[tuple[float, float]] = deque(maxlen=window)  # (rtt, offset)
+        self._synced_at = float("-inf")  # monotonic seconds
+        self._retry_at  = 0.0
+        self._syncing   = False
+        self._lock      = threading.Lock()
+
+    @property
+    def stale(self) -> bool:
+        return time.monotonic() - self._synced_at > self.resync_s
+
+    def now_ms(self) -> int:
+        return int(time.time() * 1000 + self.offset_ms)
+
+    def observe(self, server_ms: int, sent_ms: float, recv_ms: float) -> None:
+        """Feed one serverTime sample taken between `sent_ms` and `recv_ms`."""
+        with self._lock:
+            self._samples.append((recv_ms - sent_ms, server_ms - (sent_ms + recv_ms) / 2))
+            self.offset_ms  = min(self._samples)[1]
+            self._synced_at = time.monotonic()
+
+    def sync(self) -> int:
+        sent   = time.time() * 1000
+        server = int(_request("GET", "serverTime")["ServerTime"])
+        self.observe(server, sent, time.time() * 1000)
+        return server
+
+    async def async_sync(self) -> int:
+        sent   = time.time() * 1000
+        server = int((await _arequest("GET", "serverTime"))["ServerTime"])
+        self.observe(server, sent, time.time() * 1000)
+        return server
+
+    def maybe_resync(self) -> None:
+        """Start a background sync if the estimate is stale (never blocks)."""
+        with self._lock:
+            if self._syncing or not self.stale or time.monotonic() < self._retry_at:
+                return
+            self._syncing = True
+        _spawn(self._background_sync, "roostoo-clock")
+
+    def _background_sync(self) -> None:
+        try:
+            self.sync()
+        except RoostooError:
+            self._retry_at = time.monotonic() + self.RETRY_S
+        finally:
+            self._syncing = False
+
+
+clock = ServerClock()
+
+
+# ── exchangeInfo cache ────────────────────────────────────────────────
+@dataclass(frozen=True)
+class PairRule:
+    """Trading rules for one pair, flattened from exchangeInfo.TradePairs."""
+    pair: str
+    price_precision: int
+    amount_precision: int
+    min_order: float            # MiniOrder – minimum order value in quote units
+    can_trade: bool
+
+
+class ExchangeInfoCache:
+    """
+    TTL cache for /exchangeInfo with stale‑while‑revalidate.
 
-    # --- robust error handling like other helpers ---
-    try:
-        data = r.json()
-    except ValueError:
-        data = {"raw": r.text.strip()}
+    The first call fetches synchronously; afterwards callers always get the
+    cached copy immediately and an expired entry is refreshed on a
+    background thread.  `rule(pair)` is a dict lookup on a pre‑built index.
+    Concurrent loads (cold callers, refreshes) share one request.
+    """
 
-    if not r.ok:
-        raise RoostooError(f"HTTP {r.status_code} {r.reason} — {data}")
-    if isinstance(data, dict) and data.get("ErrMsg"):
-        raise RoostooError(f"Exchange error: {data['ErrMsg']}")
+    def __init__(self, ttl_s: float = EXINFO_TTL_S):
+        self.ttl_s       = ttl_s
+        self._data: Optional[dict] = None
+        self._rules: Dict[str, PairRule] = {}
+        self._fetched_at = 0.0
+        self._refreshing = False
+        self._lock       = threading.Lock()
+        self._flight     = SingleFlight()
+        self._aflight    = AsyncSingleFlight()
+
+    def _store(self, data: dict) -> dict:
+        rules = {
+            pair: PairRule(
+                pair=pair,
+                price_precision=int(r.get("PricePrecision", 0)),
+                amount_precision=int(r.get("AmountPrecision", 0)),
+                min_order=float(r.get("MiniOrder", 0)),
+                can_trade=bool(r.get("CanTrade", True)),
+            )
+            for pair, r in (data.get("TradePairs") or {}).items()
+        }
+        with self._lock:
+            self._data, self._rules = data, rules
+            self._fetched_at = time.monotonic()
+        return data
+
+    def _maybe_refresh(self) -> None:
+        with self._lock:
+            if self._refreshing or time.monotonic() - self._fetched_at <= self.ttl_s:
+                return
+            self._refreshing = True
+        _spawn(self._background_refresh, "roostoo-exinfo")
+
+    def _background_refresh(self) -> None:
+        try:
+            self.refresh()
+        except RoostooError:
+            pass                         # keep serving the previous copy
+        finally:
+            self._refreshing = False
+
+    def refresh(self) -> dict:
+        return self._flight.do("exchangeInfo",
+                               lambda: self._store(_request("GET", "exchangeInfo")))
+
+    async def arefresh(self) -> dict:
+        async def fetch() -> dict:
+            return self._store(await _arequest("GET", "exchangeInfo"))
+        return await self._aflight.do("exchangeInfo", fetch)
+
+    def get(self) -> dict:
+        if self._data is None:
+            return self.refresh()
+        self._maybe_refresh()
+        return self._data
+
+    async def aget(self) -> dict:
+        if self._data is None:
+            return await self.arefresh()
+        self._maybe_refresh()
+        return self._data
+
+    def rule(self, pair: str) -> Optional[PairRule]:
+        self.get()
+        return self._rules.get(pair)
+
+    async def arule(self, pair: str) -> Optional[PairRule]:
+        await self.aget()
+        return self._rules.get(pair)
+
+    def known_pairs(self) -> List[str]:
+        """Pairs of the cached copy – never fetches (empty before first load)."""
+        return list(self._rules)
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._fetched_at = 0.0
+
+
+exchange_info = ExchangeInfoCache()
+
+
+# ── ticker snapshot cache ─────────────────────────────────────────────
+_ALL = "*"                              # singleflight key for the all‑pairs fetch
+
+
+class TickerCache:
+    """
+    Per‑pair ticker snapshots with a staleness budget.
+
+    • A hit younger than the pair's budget (`set_budget`, default
+      TICKER_TTL_S) is served from memory.
+    • Concurrent misses for the same pair share one HTTP request.
+    • `get_many` fetches every stale pair with a single all‑pairs
+      /ticker call (pair omitted) when more than one is missing; a
+      caller that joined someone else's all‑pairs call fetches the
+      pairs it still lacks one by one.
+    • A pair the exchange does not return is remembered as unknown for
+      EXINFO_TTL_S and reported as `{"error": …}` instead of being
+      refetched on every call.
+    """
 
-    return data
+    def __init__(self, default_ttl_s: float = TICKER_TTL_S):
+        self.default_ttl_s = default_ttl_s
+        self.budgets: Dict[str, float] = {}
+        self._snaps: Dict[str, tuple[float, int, dict]] = {}   # pair → (mono, ServerTime, Data)
+        self._unknown: Dict[str, float] = {}                   # pair → mono when not listed
+        self._flight  = SingleFlight()
+        self._aflight = AsyncSingleFlight()
+
+    def set_budget(self, pair: str, ttl_s: float) -> None:
+        self.budgets[pair] = ttl_s
+
+    def _fresh(self, pair: str, max_age: Optional[float]) -> Optional[tuple[int, dict]]:
+        snap = self._snaps.get(pair)
+        budget = self.budgets.get(pair, self.default_ttl_s) if max_age is None else max_age
+        if snap is None or time.monotonic() - snap[0] > budget:
+            return None
+        return snap[1], snap[2]
+
+    def _is_unknown(self, pair: str) -> bool:
+        seen = self._unknown.get(pair)
+        return seen is not None and time.monotonic() - seen <= EXINFO_TTL_S
+
+    def _store(self, resp: dict, asked: Iterable[str] = ()) -> dict:
+        now, st = time.monotonic(), int(resp.get("ServerTime", 0))
+        data = resp.get("Data") or {}
+        for pair, snap in data.items():
+            self._snaps[pair] = (now, st, snap)
+            self._unknown.pop(pair, None)
+        for pair in asked:
+            if pair not in data:
+                self._unknown[pair] = now
+        return resp
+
+    def _stale(self, pairs: list[str], max_age: Optional[float]) -> list[str]:
+        return [p for p in pairs
+                if self._fresh(p, max_age) is None and not self._is_unknown(p)]
+
+    @staticmethod
+    def _response(pair: str, st: int, data: dict) -> dict:
+        return {"Success": True, "ErrMsg": "", "ServerTime": st, "Data": {pair: data}}
+
+    # -- sync ----------------------------------------------------------
+    def get(self, pair: str, max_age: Optional[float] = None) -> dict:
+        hit = self._fresh(pair, max_age)
+        if hit is not None:
+            return self._response(pair, *hit)
+        return self._flight.do(pair, lambda: self._store(
+            _request("GET", "ticker", {"pair": pair}, timestamp=True), [pair]))
+
+    def get_many(self, pairs: Iterable[str],
+                 max_age: Optional[float] = None) -> Dict[str, dict]:
+        pairs   = list(dict.fromkeys(pairs))
+        missing = self._stale(pairs, max_age)
+        if len(missing) > 1:
+            self._flight.do(_ALL, lambda: self._store(
+                _request("GET", "ticker", timestamp=True), missing))
+            missing = self._stale(missing, max_age)     # a joined flight asked for other pairs
+        for pair in missing:
+            self.get(pair, max_age)
+        return self._collect(pairs)
+
+    # -- async ---------------------------------------------------------
+    async def aget(self, pair: str, max_age: Optional[float] = None) -> dict:
+        hit = self._fresh(pair, max_age)
+        if hit is not None:
+            return self._response(pair, *hit)
+
+        async def fetch() -> dict:
+            return self._store(await _arequest("GET", "ticker", {"pair": pair}, timestamp=True),
+                               [pair])
+        return await self._aflight.do(pair, fetch)
+
+    async def aget_many(self, pairs: Iterable[str],
+                        max_age: Optional[float] = None) -> Dict[str, dict]:
+        pairs   = list(dict.fromkeys(pairs))
+        missing = self._stale(pairs, max_age)
+        if len(missing) > 1:
+            async def fetch_all() -> dict:
+                return self._store(await _arequest("GET", "ticker", timestamp=True), missing)
+            await self._aflight.do(_ALL, fetch_all)
+            missing = self._stale(missing, max_age)     # a joined flight asked for other pairs
+        for pair in missing:
+            await self.aget(pair, max_age)
+        return self._collect(pairs)
+
+    def _collect(self, pairs: list[str]) -> Dict[str, dict]:
+        """{pair: Data‑entry + ServerTime}, or {pair: {"error": …}} if not listed."""
+        out: Dict[str, dict] = {}
+        for p in pairs:
+            snap = self._snaps.get(p)
+            if snap is not None:
+                out[p] = {**snap[2], "ServerTime": snap[1]}
+            elif self._is_unknown(p):
+                out[p] = {"error": f"Unknown pair: {p}"}
+        return out
+
+
+tickers = TickerCache()
+
+
+# ── request bodies (shared by sync + async helpers) ─────────────────
+def _order_body(pair: str, side: str, otype: str,
+                quantity: str, price: float | None) -> Dict[str, Any]:
+    side  = side.upper()
+    otype = otype.upper()
 
+    if side not in ("BUY", "SELL"):
+        raise ValueError("side must be BUY or SELL")
+    if otype not in ("MARKET", "LIMIT"):
+        raise ValueError("type must be MARKET or LIMIT")
 
-def place_order(pair: str, side: str, otype: str,
-                quantity: str, price: float | None = None) -> dict:
-    """Send a signed order and return the JSON.  
-       Raises **RoostooError** with detailed message on any failure."""
-    body = {
+    body: Dict[str, Any] = {
         "pair": pair,
         "side": side,
         "type": otype,
         "quantity": quantity,
-        "timestamp": int(time.time() * 1000),
     }
-
-    side  = side.upper()
-    otype = otype.upper() 
-    
-    if otype.upper() == "LIMIT":
+    if otype == "LIMIT":
         if price is None:
             raise ValueError("price required for LIMIT orders")
         body["price"] = price
-    if side not in ("BUY", "SELL"):
-        raise ValueError("side must be BUY or SELL")
-    if otype not in ("MARKET", "LIMIT"):
-        raise ValueError("type must be MARKET or LIMIT")
-    # Canonical key order for signature
-    payload = "&".join(f"{k}={body[k]}" for k in sorted(body))
-    hdr = {
-        "Content-Type": "application/x-www-form-urlencoded",
-        "RST-API-KEY": KEY,
-        "MSG-SIGNATURE": _sign(payload),
+    return body
+
+def _quantize(value: Any, name: str, precision: int, rounding: str) -> Decimal:
+    try:
+        return Decimal(str(value)).quantize(Decimal(1).scaleb(-precision), rounding)
+    except ArithmeticError:
+        raise ValueError(f"{name} is not a number: {value!r}") from None
+
+
+def validate_order(rule: Optional["PairRule"], order: Dict[str, Any],
+                   ref_price: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Check one order against its pair's cached exchangeInfo rule and return
+    the place_order body with quantity (rounded down) and price (rounded
+    to nearest) at the pair's precision.  The minimum order value is
+    checked against `price`, or for MARKET orders against `ref_price`
+    when one is known.  Raises ValueError with the reason otherwise.
+    """
+    pair = order.get("pair")
+    if rule is None:
+        raise ValueError(f"Unknown pair: {pair}")
+    if not rule.can_trade:
+        raise ValueError(f"{pair} is not tradable right now")
+    side  = str(order.get("side") or "")
+    otype = str(order.get("type") or order.get("otype") or "")
+    body  = _order_body(pair, side, otype, "0", order.get("price"))   # side / type / price checks
+
+    qty = _quantize(order.get("quantity"), "quantity", rule.amount_precision, ROUND_DOWN)
+    if qty <= 0:
+        raise ValueError(f"quantity rounds to 0 at {rule.amount_precision} decimals")
+    body["quantity"] = str(qty)
+
+    price = ref_price
+    if "price" in body:
+        px = _quantize(body["price"], "price", rule.price_precision, ROUND_HALF_EVEN)
+        if px <= 0:
+            raise ValueError(f"price rounds to 0 at {rule.price_precision} decimals")
+        body["price"] = price = float(px)
+    if price is not None and float(qty) * price < rule.min_order:
+        raise ValueError(f"order value {float(qty) * price:g} is below the minimum "
+                         f"{rule.min_order:g} for {pair}")
+    return body
+
+
+def _ref_price(pair: str) -> Optional[float]:
+    """Last price from a fresh cached ticker, for MARKET min‑value checks."""
+    hit = tickers._fresh(pair, None)
+    return float(hit[1]["LastPrice"]) if hit and "LastPrice" in hit[1] else None
+
+
+def _bulk_prepare(orders: Iterable[Dict[str, Any]]) -> tuple[list, list]:
+    """(results with local rejections filled in, [(index, body)] to submit)."""
+    results: List[Optional[Dict[str, Any]]] = []
+    todo: List[tuple[int, Dict[str, Any]]] = []
+    for i, order in enumerate(orders):
+        try:
+            body = validate_order(exchange_info._rules.get(order.get("pair")), order,
+                                  _ref_price(order.get("pair")))
+        except ValueError as exc:
+            results.append({"index": i, "ok": False, "stage": "validation",
+                            "order": order, "error": str(exc)})
+            continue
+        results.append(None)
+        todo.append((i, body))
+    return results, todo
+
+
+def _bulk_result(i: int, body: Dict[str, Any], resp: Any = None,
+                 exc: Optional[Exception] = None) -> Dict[str, Any]:
+    if exc is not None:
+        return {"index": i, "ok": False, "stage": "exchange", "order": body, "error": str(exc)}
+    return {"index": i, "ok": True, "order": body, "result": resp}
+
+
+def _bulk_summary(results: list) -> Dict[str, Any]:
+    return {
+        "placed":   sum(r["ok"] for r in results),
+        "rejected": sum(r.get("stage") == "validation" for r in results),
+        "failed":   sum(r.get("stage") == "exchange" for r in results),
+        "results":  results,
     }
 
-    r = requests.post(f"{BASE}/place_order", data=payload, headers=hdr, timeout=10)
 
-    # Try to decode JSON; fall back to plain text
-    try:
-        data = r.json()
-    except ValueError:
-        data = {"raw": r.text.strip()}
+def _query_body(order_id: Optional[str], pair: Optional[str],
+                offset: Optional[int], limit: Optional[int],
+                pending_only: Optional[bool]) -> Dict[str, Any]:
+    if order_id:
+        return {"order_id": order_id}
+    return {
+        "pair": pair,
+        "offset": offset,
+        "limit": limit,
+        "pending_only": None if pending_only is None
+                        else ("TRUE" if pending_only else "FALSE"),
+    }
 
-    # HTTP‑level error (451, 4xx, 5xx…)
-    if not r.ok:
-        raise RoostooError(
-            f"HTTP {r.status_code} {r.reason} — {data}",
-        )
+def _cancel_body(order_id: str | None, pair: str | None) -> Dict[str, Any]:
+    if order_id and pair:
+        raise ValueError("Provide only one of order_id OR pair, not both.")
+    return {"order_id": str(order_id) if order_id else None,
+            "pair": None if order_id else pair}
 
-    # Exchange‑level reject (Success:false or ErrMsg not empty)
-    if isinstance(data, dict) and (not data.get("Success", True) or data.get("ErrMsg")):
-        raise RoostooError(f"Exchange error: {data.get('ErrMsg', data)}")
 
-    return data
+# ── public endpoints ──────────────────────────────────────────────────
+def get_server_time() -> int:
+    """Exchange epoch‑ms – from the local clock model, syncing when stale."""
+    return clock.sync() if clock.stale else clock.now_ms()
+
+def get_exchange_info() -> dict:
+    """GET /v3/exchangeInfo – returns exchange information (TTL‑cached)."""
+    return exchange_info.get()
+
+def get_pair_info(pair: str) -> dict:
+    """Precision / min‑order rules for one pair, from the cached exchangeInfo."""
+    rule = exchange_info.rule(pair)
+    if rule is None:
+        raise RoostooError(f"Unknown pair: {pair}")
+    return asdict(rule)
+
+def get_ticker(pair: str, max_age: Optional[float] = None) -> dict:
+    """
+    GET /v3/ticker?pair=…&timestamp=…
+    Returns last price, bid/ask, volume for `pair`.
+    Served from the snapshot cache while younger than `max_age` seconds
+    (default: the pair's staleness budget); `max_age=0` forces a fetch.
+    """
+    return tickers.get(pair, max_age)
+
+def get_tickers(pairs: Iterable[str], max_age: Optional[float] = None) -> Dict[str, dict]:
+    """Snapshots for several pairs at once → {pair: ticker or {"error": …}}; one HTTP call at most."""
+    return tickers.get_many(pairs, max_age)
+
+# ── signed account endpoints ──────────────────────────────────────────
+def get_balance() -> dict:
+    """GET /v3/balance?timestamp=… – returns account balance."""
+    return _request("GET", "balance", signed=True)
+
+def get_pending_count() -> dict:
+    """
+    GET /v3/pending_count?timestamp=…
+    Returns the count of pending orders.
+    """
+    return _request("GET", "pending_count", signed=True)
+
+
+def place_order(pair: str, side: str, otype: str,
+                quantity: str, price: float | None = None) -> dict:
+    """Send a signed order and return the JSON.  
+       Raises **RoostooError** with detailed message on any failure."""
+    body = _order_body(pair, side, otype, quantity, price)
+    return _request("POST", "place_order", body, signed=True)
 
 def query_order(
     *,
@@ -179,54 +798,77 @@ def query_order(
         – on HTTP/network issues
         – when the exchange returns {"Success": false} or a non‑empty ErrMsg
     """
-
-    ts = int(time.time() * 1000)
-
-    # ── 1. Build form/body dict ───────────────────────────────────────
-    body: Dict[str, str] = {"timestamp": str(ts)}
-
-    if order_id:
-        body["order_id"] = order_id
-    else:
-        if pair:
-            body["pair"] = pair
-        if offset is not None:
-            body["offset"] = str(offset)
-        if limit is not None:
-            body["limit"] = str(limit)
-        if pending_only is not None:
-            body["pending_only"] = "TRUE" if pending_only else "FALSE"
-
-    # ► FIX #1 – proper URL‑encoding instead of manual join
-    payload = urllib.parse.urlencode(body, safe="/")
-
-    sig = _sign(payload)
-
-    url = f"{BASE}/query_order"
-    headers = {
-        "Content-Type": "application/x-www-form-urlencoded",
-        "RST-API-KEY": KEY,
-        "MSG-SIGNATURE": sig,
-    }
-
-    # ── 2. POST the request ───────────────────────────────────────────
+    body = _query_body(order_id, pair, offset, limit, pending_only)
+    return _request("POST", "query_order", body, signed=True)
+
+# ── order history (paged query_order, next page prefetched) ─────────
+@dataclass(frozen=True, slots=True)
+class OrderRecord:
+    """The fields of one query_order row that summaries / the LLM need."""
+    order_id: int
+    pair: str
+    side: str
+    type: str
+    status: str
+    price: float
+    quantity: float
+    filled: float
+    avg_price: float
+    fee: float
+    fee_coin: str
+    created_ms: int
+
+    @classmethod
+    def from_row(cls, o: Dict[str, Any]) -> "OrderRecord":
+        return cls(int(o.get("OrderID", 0)), o.get("Pair", ""), o.get("Side", ""),
+                   o.get("Type", ""), o.get("Status", ""), float(o.get("Price") or 0),
+                   float(o.get("Quantity") or 0), float(o.get("FilledQuantity") or 0),
+                   float(o.get("FilledAverPrice") or 0),
+                   float(o.get("CommissionChargeValue") or 0),
+                   o.get("CommissionCoin", ""), int(o.get("CreateTimestamp") or 0))
+
+
+def _no_orders(exc: RoostooError) -> bool:
+    """query_order reports an empty result as an exchange error."""
+    return "no order" in str(exc).lower()
+
+
+def _order_page(pair: Optional[str], pending_only: Optional[bool],
+                offset: int, limit: int) -> List[dict]:
     try:
-        resp = requests.post(url, data=payload, headers=headers, timeout=10)
-        resp.raise_for_status()                     # ► FIX #2 – HTTP guard
-    except requests.RequestException as e:
-        raise RoostooError(f"Network/HTTP error: {e}") from e
+        resp = query_order(pair=pair, pending_only=pending_only, offset=offset, limit=limit)
+    except RoostooError as exc:
+        if _no_orders(exc):
+            return []
+        raise
+    return resp.get("OrderMatched") or []
 
-    # ── 3. Parse JSON safely ──────────────────────────────────────────
-    try:
-        data: Dict[str, Any] = resp.json()
-    except ValueError:                             # not JSON?
-        raise RoostooError(f"Non‑JSON response: {resp.text.strip()}")
 
-    # ── 4. Exchange‑level error handling ──────────────────────────────
-    if not data.get("Success", True) or data.get("ErrMsg"):
-        raise RoostooError(f"Exchange error: {data.get('ErrMsg', data)}")
+def iter_orders(
+    *,
+    pair: Optional[str] = None,
+    pending_only: Optional[bool] = None,
+    page_size: int = ORDER_PAGE,
+    compact: bool = True,
+) -> Iterator[Any]:
+    """
+    Every order matching the filters, page by page.  While the caller
+    works through one page the next is already being fetched on a
+    helper thread.  Yields `OrderRecord`s (raw rows with compact=False).
+    """
+    pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="roostoo-orders")
+    try:
+        offset, nxt = 0, pool.submit(_order_page, pair, pending_only, 0, page_size)
+        while nxt is not None:
+            rows = nxt.result()
+            offset += len(rows)
+            nxt = (pool.submit(_order_page, pair, pending_only, offset, page_size)
+                   if len(rows) == page_size else None)
+            for row in rows:
+                yield OrderRecord.from_row(row) if compact else row
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
 
-    return data
 
 # ── Cancel order (signed) ──────────────────────────────────────────
 def cancel_order(
@@ -234,38 +876,137 @@ def cancel_order(
     order_id: str | None = None,
     pair: str | None = None,
 ) -> dict:
+    body = _cancel_body(order_id, pair)
+    return _request("POST", "cancel_order", body, signed=True)
 
-    if order_id and pair:
-        raise ValueError("Provide only one of order_id OR pair, not both.")
 
-    ts   = int(time.time() * 1000)
-    body: dict[str, str] = {"timestamp": str(ts)}
+def place_orders(orders: Iterable[Dict[str, Any]],
+                 max_in_flight: int = ORDER_CONCURRENCY) -> Dict[str, Any]:
+    """
+    Bulk place_order.  Every order ({pair, side, type, quantity, price?}) is
+    validated and rounded locally against the cached exchangeInfo rules;
+    the valid ones are sent concurrently, at most `max_in_flight` at a
+    time.  Returns counts plus one result per order, in input order:
+    `{"index", "ok", "order", "result"}` or `{…, "stage", "error"}` where
+    stage is "validation" (never sent) or "exchange".
+    """
+    orders = list(orders)
+    exchange_info.get()
+    results, todo = _bulk_prepare(orders)
 
-    if order_id:
-        body["order_id"] = str(order_id)
-    elif pair:
-        body["pair"] = pair
-
-    payload = "&".join(f"{k}={body[k]}" for k in sorted(body))
-    sig     = _sign(payload)
-
-    url = f"{BASE}/cancel_order"
-    hdr = {
-        "Content-Type": "application/x-www-form-urlencoded",
-        "RST-API-KEY": KEY,
-        "MSG-SIGNATURE": sig,
-    }
+    def send(item: tuple[int, Dict[str, Any]]) -> Dict[str, Any]:
+        i, body = item
+        try:
+            return _bulk_result(i, body, _request("POST", "place_order", body, signed=True))
+        except RoostooError as exc:
+            return _bulk_result(i, body, exc=exc)
 
-    r = requests.post(url, data=payload, headers=hdr, timeout=10)
+    if todo:
+        with ThreadPoolExecutor(max_workers=max(1, min(max_in_flight, len(todo))),
+                                thread_name_prefix="roostoo-order") as pool:
+            for out in pool.map(send, todo):
+                results[out["index"]] = out
+    return _bulk_summary(results)
 
-    try:
-        data = r.json()
-    except ValueError:
-        data = {"raw": r.text.strip()}
 
-    if not r.ok:
-        raise RoostooError(f"HTTP {r.status_code} {r.reason} — {data}")
-    if isinstance(data, dict) and (not data.get("Success", True) or data.get("ErrMsg")):
-        raise RoostooError(f"Exchange error: {data.get('ErrMsg', data)}")
+# ── async counterparts (same names, `a` prefix) ───────────────────────
+async def aget_server_time() -> int:
+    return await clock.async_sync() if clock.stale else clock.now_ms()
 
-    return data
+async def aget_exchange_info() -> dict:
+    return await exchange_info.aget()
+
+async def aget_pair_info(pair: str) -> dict:
+    rule = await exchange_info.arule(pair)
+    if rule is None:
+        raise RoostooError(f"Unknown pair: {pair}")
+    return asdict(rule)
+
+async def aget_ticker(pair: str, max_age: Optional[float] = None) -> dict:
+    return await tickers.aget(pair, max_age)
+
+async def aget_tickers(pairs: Iterable[str],
+                       max_age: Optional[float] = None) -> Dict[str, dict]:
+    return await tickers.aget_many(pairs, max_age)
+
+async def aget_balance() -> dict:
+    return await _arequest("GET", "balance", signed=True)
+
+async def aget_pending_count() -> dict:
+    return await _arequest("GET", "pending_count", signed=True)
+
+async def aplace_order(pair: str, side: str, otype: str,
+                       quantity: str, price: float | None = None) -> dict:
+    body = _order_body(pair, side, otype, quantity, price)
+    return await _arequest("POST", "place_order", body, signed=True)
+
+async def aquery_order(
+    *,
+    order_id: Optional[str] = None,
+    pair: Optional[str] = None,
+    offset: Optional[int] = None,
+    limit: Optional[int] = None,
+    pending_only: Optional[bool] = None,
+) -> Dict[str, Any]:
+    body = _query_body(order_id, pair, offset, limit, pending_only)
+    return await _arequest("POST", "query_order", body, signed=True)
+
+async def _aorder_page(pair: Optional[str], pending_only: Optional[bool],
+                       offset: int, limit: int) -> List[dict]:
+    try:
+        resp = await aquery_order(pair=pair, pending_only=pending_only,
+                                  offset=offset, limit=limit)
+    except RoostooError as exc:
+        if _no_orders(exc):
+            return []
+        raise
+    return resp.get("OrderMatched") or []
+
+async def aiter_orders(
+    *,
+    pair: Optional[str] = None,
+    pending_only: Optional[bool] = None,
+    page_size: int = ORDER_PAGE,
+    compact: bool = True,
+) -> AsyncIterator[Any]:
+    """Async twin of `iter_orders` – the next page is a task running alongside."""
+    offset = 0
+    nxt: Optional[asyncio.Task] = asyncio.ensure_future(
+        _aorder_page(pair, pending_only, 0, page_size))
+    try:
+        while nxt is not None:
+            rows = await nxt
+            offset += len(rows)
+            nxt = (asyncio.ensure_future(_aorder_page(pair, pending_only, offset, page_size))
+                   if len(rows) == page_size else None)
+            for row in rows:
+                yield OrderRecord.from_row(row) if compact else row
+    finally:
+        if nxt is not None:
+            nxt.cancel()
+
+async def acancel_order(
+    *,
+    order_id: str | None = None,
+    pair: str | None = None,
+) -> dict:
+    body = _cancel_body(order_id, pair)
+    return await _arequest("POST", "cancel_order", body, signed=True)
+
+async def aplace_orders(orders: Iterable[Dict[str, Any]],
+                        max_in_flight: int = ORDER_CONCURRENCY) -> Dict[str, Any]:
+    orders = list(orders)
+    await exchange_info.aget()
+    results, todo = _bulk_prepare(orders)
+    sem = asyncio.Semaphore(max(1, max_in_flight))
+
+    async def send(i: int, body: Dict[str, Any]) -> None:
+        async with sem:
+            try:
+                results[i] = _bulk_result(
+                    i, body, await _arequest("POST", "place_order", body, signed=True))
+            except RoostooError as exc:
+                results[i] = _bulk_result(i, body, exc=exc)
+
+    await asyncio.gather(*(send(i, body) for i, body in todo))
+    return _bulk_summary(results)
@@ -0,0 +1,13 @@
+# tests/conftest.py
+"""Offline defaults: local NumPy memory, hash embeddings, no API keys."""
+import os
+
+os.environ.setdefault("R0_MEMORY_BACKEND", "local")
+os.environ.setdefault("R0_MEMORY_PATH", "")
+os.environ.setdefault("R0_EMBEDDINGS", "hash")
+os.environ.setdefault("R0_TOKENIZER", "heuristic")
+os.environ.setdefault("OPENAI_API_KEY", "test")
+os.environ.setdefault("ROOSTOO_KEY", "test")
+os.environ.setdefault("ROOSTOO_SECRET", "test")
+os.environ.setdefault("R0_RESPONSE_CACHE", "0")       # tests must not see each other's answers
+os.environ.setdefault("R0_LEDGER", "0")                # account reads hit the (mocked) wrappers
@@ -0,0 +1,185 @@
+# tests/test_admission.py
+import asyncio, json
+
+import httpx
+import pytest
+
+from src.admission import Admission, Overloaded, ORDER, NORMAL, priority
+
+
+def test_priority_classification():
+    assert priority("Buy 0.1 BTC at market") == ORDER
+    assert priority("cancel all my orders") == ORDER
+    assert priority("what is the BTC price?") == NORMAL
+
+
+def test_queue_limit_priority_and_handoff():
+    async def main():
+        adm = Admission(workers=1, queue=1, deadline_s=5)
+        first = await adm.admit("balance?")
+        served = []
+
+        async def wait(prompt):
+            t = await adm.admit(prompt)
+            served.append(prompt)
+            return t
+
+        lookup = asyncio.create_task(wait("price of ETH?"))
+        await asyncio.sleep(0)
+        with pytest.raises(Overloaded) as full:          # a second lookup: queue full
+            await adm.admit("price of SOL?")
+        assert full.value.status == 429 and full.value.retry_after_s >= 1
+
+        order = asyncio.create_task(wait("sell 1 ETH"))  # orders only count each other
+        await asyncio.sleep(0)
+        assert adm.stats()["queued_orders"] == 1 and adm.stats()["queued"] == 1
+
+        adm.release(first)
+        adm.release(first)                               # idempotent
+        t_order = await order
+        assert served == ["sell 1 ETH"] and adm.busy == 1
+        adm.release(t_order)
+        adm.release(await lookup)
+        assert served == ["sell 1 ETH", "price of ETH?"] and adm.busy == 0
+        assert adm.stats()["rejected_429"] == 1
+
+    asyncio.run(main())
+
+
+def test_deadlines_reject_with_503():
+    async def main():
+        adm = Admission(workers=1, queue=10, deadline_s=5)
+        held = await adm.admit("balance?")
+        adm.turn_s = 0.01                               # looks quick: it does queue
+
+        with pytest.raises(Overloaded) as expired:      # waits, then gives up in the queue
+            await adm.admit("price?", deadline_s=0.05)
+        assert expired.value.status == 503 and adm.expired == 1
+        assert adm.stats()["queued"] == 0
+
+        adm.turn_s = 10.0                               # slow turns: don't even queue
+        with pytest.raises(Overloaded) as hopeless:
+            await adm.admit("price?", deadline_s=1)
+        assert hopeless.value.status == 503 and hopeless.value.retry_after_s == 10
+
+        adm.release(held)
+        assert adm.busy == 0
+
+    asyncio.run(main())
+
+
+def test_cancelled_waiter_passes_its_slot_on():
+    async def main():
+        adm = Admission(workers=1, queue=10, deadline_s=5)
+        held = await adm.admit("a")
+        gone = asyncio.create_task(adm.admit("b"))
+        nxt = asyncio.create_task(adm.admit("c"))
+        await asyncio.sleep(0)
+        gone.cancel()
+        await asyncio.sleep(0)
+        adm.release(held)
+        ticket = await nxt
+        adm.release(ticket)
+        assert adm.busy == 0 and adm.stats()["queued"] == 0
+
+    asyncio.run(main())
+
+
+@pytest.fixture
+def server(monkeypatch):
+    import backend.server as srv
+    return srv
+
+
+def _post(srv, body):
+    async def go():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=srv.api),
+                                     base_url="http://t") as client:
+            if isinstance(body, str):                    # raw JSON (e.g. Infinity / NaN)
+                return await client.post("/chat", content=body,
+                                         headers={"Content-Type": "application/json"})
+            return await client.post("/chat", json=body)
+    return asyncio.run(go())
+
+
+def test_chat_rejects_fast_when_overloaded(server, monkeypatch):
+    monkeypatch.setattr(server, "admission", Admission(workers=0, queue=0))
+    r = _post(server, {"message": "price?", "stream": False})
+    assert r.status_code == 429 and int(r.headers["Retry-After"]) >= 1
+
+
+def test_chat_deadline_cancels_the_run(server, monkeypatch):
+    adm = Admission(workers=2, queue=2, deadline_s=5)
+    monkeypatch.setattr(server, "admission", adm)
+    cancelled = []
+
+    async def slow_run(*a, **kw):
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    monkeypatch.setattr(server, "run_agent", slow_run)
+    r = _post(server, {"message": "price?", "stream": False, "deadline_s": 0.05})
+    assert r.status_code == 504 and cancelled == [True]
+    assert adm.busy == 0
+
+
+def test_stream_deadline_reports_error_and_frees_the_slot(server, monkeypatch):
+    adm = Admission(workers=1, queue=2, deadline_s=5)
+    monkeypatch.setattr(server, "admission", adm)
+
+    class SlowGraph:
+        async def astream(self, *a, **kw):
+            await asyncio.sleep(5)
+            yield "updates", {}
+
+    monkeypatch.setattr(server, "agent_app", SlowGraph())
+    r = _post(server, {"message": "price?", "deadline_s": 0.05})
+    assert r.status_code == 200
+    assert 'event: error\ndata: {"error": "deadline exceeded"}' in r.text
+    assert r.text.rstrip().endswith("[DONE]") and adm.busy == 0
+
+
+@pytest.mark.parametrize("deadline", [0, -1, float("inf"), float("nan")])
+def test_chat_rejects_bad_deadlines(server, monkeypatch, deadline):
+    adm = Admission(workers=1, queue=1, deadline_s=5)
+    monkeypatch.setattr(server, "admission", adm)
+    r = _post(server, json.dumps({"message": "price?", "stream": False, "deadline_s": deadline}))
+    assert r.status_code == 422 and adm.admitted == 0
+
+
+def test_follow_up_waits_for_its_session_before_taking_a_slot(server, monkeypatch):
+    adm = Admission(workers=2, queue=2, deadline_s=5)
+    monkeypatch.setattr(server, "admission", adm)
+
+    async def main():
+        gate, ran = asyncio.Event(), []
+
+        async def run(prompt, session=None, locked=False):
+            ran.append(prompt)
+            if prompt == "first":
+                await gate.wait()
+            return {"result": prompt}
+
+        monkeypatch.setattr(server, "run_agent", run)
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=server.api),
+                                     base_url="http://t") as client:
+            def post(message, **kw):
+                return asyncio.create_task(client.post(
+                    "/chat", json={"message": message, "stream": False, **kw}))
+
+            first = post("first", session="s")
+            await asyncio.sleep(0.01)
+            second = post("second", session="s")
+            await asyncio.sleep(0.01)
+            assert adm.busy == 1 and ran == ["first"]    # the follow‑up holds no slot
+            assert (await post("other")).status_code == 200     # … so this one gets it
+            late = await post("late", session="s", deadline_s=0.05)
+            assert late.status_code == 503 and int(late.headers["Retry-After"]) >= 1
+            gate.set()
+            return [(await t).json()["result"] for t in (first, second)]
+
+    assert asyncio.run(main()) == ["first", "second"]
+    assert adm.busy == 0 and adm.admitted == 3
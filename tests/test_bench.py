@@ -0,0 +1,56 @@
+# tests/test_bench.py
+import argparse, asyncio
+
+import pytest
+
+import src.wrappers as w
+from src import nodes
+from bench import e2e
+from bench.mock_exchange import MockExchange
+
+
+@pytest.fixture
+def exchange(monkeypatch):
+    with MockExchange() as ex:
+        monkeypatch.setattr(w, "BASE", ex.url)
+        monkeypatch.setattr(w, "BACKOFF_S", 0.0)
+        yield ex
+
+
+def test_mock_exchange_keeps_the_account_consistent(exchange):
+    before = float(w.get_balance()["Wallet"]["BTC"]["Free"])
+    filled = w.place_order("BTC/USD", "BUY", "MARKET", "0.5")["OrderDetail"]
+    assert filled["Status"] == "FILLED"
+    assert float(w.get_balance()["Wallet"]["BTC"]["Free"]) == pytest.approx(before + 0.5)
+
+    resting = w.place_order("ETH/USD", "SELL", "LIMIT", "1", price=99_999)["OrderDetail"]
+    assert w.get_pending_count()["TotalPending"] == 1
+    assert w.cancel_order(order_id=str(resting["OrderID"]))["CanceledList"] == [resting["OrderID"]]
+    assert [o.order_id for o in w.iter_orders()] == [resting["OrderID"], filled["OrderID"]]
+
+
+def test_mock_exchange_injects_faults(exchange):
+    exchange.error_rate = 1.0
+    with pytest.raises(w.RoostooError):
+        w.get_balance()
+    assert exchange.injected["error"] == 1 + w.MAX_RETRIES
+    assert exchange.counts["balance"] == 1 + w.MAX_RETRIES
+
+
+def test_e2e_smoke(monkeypatch):
+    monkeypatch.setattr(w, "BASE", w.BASE)          # restored after run() repoints it
+    monkeypatch.setattr(nodes, "llm", nodes.llm)
+    args = argparse.Namespace(turns=1, requests=4, concurrency=2, alloc_turns=2, top=3,
+                              latency_ms=0, jitter_ms=0, error_rate=0.0, throttle_rate=0.0,
+                              llm_ms=0, seed=1)
+    report = asyncio.run(e2e.run(args))
+
+    assert set(report["turns"]) == set(e2e.NAMES.values())
+    assert set(report["turns"]["order"]["nodes_ms"]) >= {"think", "act", "memory"}
+    assert list(report["turns"]["fast_path"]["nodes_ms"]) == ["cache", "route"]
+    assert report["load"]["failures"] == 0
+    assert report["exchange"]["requests"]["place_order"] >= 1
+    assert len(report["alloc"]["top_sites"]) <= 3
+
+    cmp = e2e.compare(report, report)
+    assert cmp["turn_p50_pct"]["order"] == 0.0 and cmp["throughput_pct"] == 0.0
@@ -0,0 +1,98 @@
+# tests/test_cassette.py
+import asyncio, time
+
+import pytest
+from langchain_core.messages import AIMessage
+
+import src.wrappers as w
+from src import cassette, nodes, tools
+from src.cassette import Cassette, CassetteMiss
+from bench.fakes import Script, ScriptedChat
+from bench.mock_exchange import MockExchange
+
+SCRIPTS = {
+    "what do I hold?": Script(calls=[("getBalance", {}), ("getTicker", {"pair": "BTC/USD"})],
+                              answer="Mostly BTC."),
+    "hi": Script(answer="Hello!"),
+}
+
+
+class _Offline:
+    """LLM stand‑in that must not be reached during a replay."""
+
+    def invoke(self, *a, **kw):
+        raise AssertionError("live LLM call during replay")
+
+    async def ainvoke(self, *a, **kw):
+        raise AssertionError("live LLM call during replay")
+
+
+def test_call_records_and_replays_results_errors_and_order(tmp_path):
+    path = str(tmp_path / "c.jsonl.gz")
+    rec = Cassette(path, "record")
+    values = iter([1, 2])
+    assert rec.call("tool", {"tool": "n"}, lambda: next(values)) == 1
+    assert rec.call("tool", {"tool": "n"}, lambda: next(values)) == 2
+
+    def boom():
+        raise w.RoostooError("Exchange error: insufficient balance")
+    with pytest.raises(w.RoostooError):
+        rec.call("tool", {"tool": "x"}, boom, errors=(w.RoostooError, ValueError))
+    rec.call("llm", {"text": "hi"}, lambda: AIMessage(content="yo", tool_calls=[
+        {"name": "getBalance", "args": {}, "id": "c1"}]),
+        encode=cassette.encode_message, decode=cassette.decode_message)
+    rec.close()
+
+    play = Cassette(path, "replay")
+    live = lambda: pytest.fail("went live")
+    assert [play.call("tool", {"tool": "n"}, live) for _ in range(3)] == [1, 2, 2]
+    with pytest.raises(w.RoostooError, match="insufficient balance"):
+        play.call("tool", {"tool": "x"}, live, errors=(w.RoostooError, ValueError))
+    msg = play.call("llm", {"text": "hi"}, live, decode=cassette.decode_message)
+    assert isinstance(msg, AIMessage) and msg.tool_calls[0]["name"] == "getBalance"
+    with pytest.raises(CassetteMiss):
+        play.call("tool", {"tool": "unknown"}, live)
+    assert play.stats()["misses"] == 1
+
+    lax = Cassette(path, "replay", strict=False)
+    assert lax.call("tool", {"tool": "unknown"}, lambda: "live") == "live"
+
+
+def test_replay_pace_follows_recorded_latency(tmp_path):
+    path = str(tmp_path / "c.jsonl")
+    rec = Cassette(path, "record")
+    asyncio.run(rec.acall("tool", {"tool": "slow"}, lambda: asyncio.sleep(0.05, "ok")))
+    rec.close()
+
+    fast, timed = Cassette(path, "replay"), Cassette(path, "replay", pace=1.0)
+    t0 = time.perf_counter()
+    assert asyncio.run(fast.acall("tool", {"tool": "slow"}, None)) == "ok"
+    t1 = time.perf_counter()
+    assert asyncio.run(timed.acall("tool", {"tool": "slow"}, None)) == "ok"
+    t2 = time.perf_counter()
+    assert t1 - t0 < 0.03 <= t2 - t1
+
+
+def test_recorded_traffic_replays_through_the_graph_offline(tmp_path, monkeypatch):
+    from backend.server import run_agent
+
+    path = str(tmp_path / "traffic.jsonl.gz")
+    monkeypatch.setattr(nodes, "llm", ScriptedChat(scripts=SCRIPTS))
+    monkeypatch.setattr(cassette, "tape", Cassette(path, "record"))
+    with MockExchange() as ex:
+        monkeypatch.setattr(w, "BASE", ex.url)
+
+        async def traffic():
+            for prompt in ("what do I hold?", "hi", "what do I hold?"):
+                await run_agent(prompt)
+        asyncio.run(traffic())
+    cassette.tape.close()
+    summary = cassette.summary(path)
+    assert summary["kinds"]["turn"]["n"] == 3 and summary["kinds"]["tool"]["n"] == 4
+
+    # exchange gone, LLM unreachable: everything must come from the cassette
+    monkeypatch.setattr(w, "BASE", "http://127.0.0.1:9/v3")
+    monkeypatch.setattr(nodes, "llm", _Offline())
+    report = asyncio.run(cassette.replay_turns(path, concurrency=2))
+    assert report["turns"] == 3 and report["matched"] == 3, report
+    assert not report["failed"] and report["cassette"]["misses"] == 0
@@ -0,0 +1,63 @@
+# tests/test_context.py
+import json
+
+from src import context
+from src.context import allocate, build_messages, compact_result, count_tokens, truncate
+
+EXCHANGE_INFO = {
+    "Success": True, "ErrMsg": "", "IsRunning": True,
+    "TradePairs": {
+        f"C{i}/USD": {"Coin": f"C{i}", "CoinFullName": f"Coin {i}", "PricePrecision": 2,
+                      "AmountPrecision": 4, "MiniOrder": 1.0, "CanTrade": True}
+        for i in range(60)
+    },
+}
+
+
+def test_compaction_drops_envelope_and_caps_pair_maps():
+    out = compact_result(EXCHANGE_INFO, "rules for c42/usd please")
+    assert "Success" not in out and "ErrMsg" not in out
+    pairs = out["TradePairs"]
+    assert len(pairs) == context.MAX_ITEMS + 1 and pairs["…"] == "+40 more"
+    assert next(iter(pairs)) == "C42/USD"                  # named pair kept first
+    assert "CoinFullName" not in pairs["C42/USD"]
+
+
+def test_truncate_is_bounded_and_marked():
+    text = "x" * 4000
+    cut = truncate(text, 100)
+    assert count_tokens(cut) <= 100 and cut.endswith("tokens omitted]")
+    assert truncate("short", 100) == "short"
+
+
+def test_allocation_passes_surplus_on_by_priority():
+    alloc = allocate({"recalled": 10, "history": 0, "result": 900, "error": 0}, 1000)
+    assert alloc == {"recalled": 10, "history": 0, "result": 900, "error": 0}
+    alloc = allocate({"recalled": 800, "history": 0, "result": 800, "error": 0}, 1000)
+    assert alloc["result"] == 800 and alloc["recalled"] == 200
+
+
+def test_prompt_fits_budget_and_keeps_order():
+    state = {
+        "text": "what about C1/USD?",
+        "recalled": ["old memory " * 50] * 6,
+        "history": [{"user": f"q{i}", "assistant": "a" * 400} for i in range(6)],
+        "result": EXCHANGE_INFO,
+        "error": None,
+    }
+    context.metrics.reset()
+    messages, report = build_messages(state, "system prompt", budget=900)
+    assert report.used <= 900 and set(report.truncated) >= {"recalled", "history"}
+    assert messages[0].content == "system prompt"
+    assert messages[-1].content == "what about C1/USD?"
+    assert report.tokens_out["result"] < report.tokens_in["result"]
+    human = [m.content for m in messages[1:-1] if m.type == "human"]
+    assert human == sorted(human)[-len(human):] and human[-1] == "q5"   # newest turns kept
+    assert context.metrics.snapshot()["calls"] == 1
+
+
+def test_small_context_is_untouched():
+    state = {"text": "hi", "recalled": ["m1"], "result": {"Success": True, "Data": 1}}
+    messages, report = build_messages(state, "sys", budget=4000)
+    assert [m.content for m in messages] == ["sys", "m1", json.dumps({"Data": 1}, separators=(",", ":")), "hi"]
+    assert report.truncated == []
@@ -0,0 +1,88 @@
+# tests/test_history.py
+import asyncio, threading, time
+
+import pytest
+
+import src.wrappers as w
+from src import tools
+from src.history import summarize
+
+
+def _row(oid, pair="BTC/USD", side="BUY", status="FILLED", qty=1.0, px=100.0, fee=0.1):
+    return {"OrderID": oid, "Pair": pair, "Side": side, "Type": "MARKET", "Status": status,
+            "Price": px, "Quantity": qty, "FilledQuantity": qty if status == "FILLED" else 0,
+            "FilledAverPrice": px if status == "FILLED" else 0, "CommissionCoin": "USD",
+            "CommissionChargeValue": fee if status == "FILLED" else 0,
+            "CreateTimestamp": 1_000 + oid, "ServerTimeUsage": 0.01}
+
+
+@pytest.fixture
+def history(monkeypatch):
+    rows = [_row(i) for i in range(1, 8)]
+    log = []
+
+    def query(*, order_id=None, pair=None, offset=None, limit=None, pending_only=None):
+        log.append(("start", offset, threading.current_thread().name))
+        time.sleep(0.02)
+        page = rows[offset:offset + limit]
+        log.append(("end", offset))
+        if not page:
+            raise w.RoostooError("Exchange error: no order matched")
+        return {"Success": True, "OrderMatched": page}
+
+    async def aquery(**kw):
+        log.append(("astart", kw["offset"]))
+        await asyncio.sleep(0.01)
+        return await asyncio.to_thread(query, **kw)
+
+    monkeypatch.setattr(w, "query_order", query)
+    monkeypatch.setattr(w, "aquery_order", aquery)
+    return rows, log
+
+
+def test_iter_orders_walks_pages_and_prefetches(history):
+    rows, log = history
+    seen = []
+    for rec in w.iter_orders(page_size=3):
+        if not seen:
+            time.sleep(0.05)                             # consumer busy with page 1 …
+            assert ("end", 3) in log                     # … while page 2 already arrived
+        seen.append(rec)
+    assert [r.order_id for r in seen] == list(range(1, 8))
+    assert isinstance(seen[0], w.OrderRecord) and seen[0].fee == 0.1
+    assert all(name.startswith("roostoo-orders") for _, _, name in
+               (e for e in log if e[0] == "start"))
+    assert [e[1] for e in log if e[0] == "start"] == [0, 3, 6]   # short page ends it
+
+
+def test_iter_orders_empty_and_raw(history):
+    rows, _ = history
+    rows.clear()
+    assert list(w.iter_orders()) == []
+    rows.append(_row(1))
+    assert list(w.iter_orders(compact=False)) == [rows[0]]
+
+
+def test_aiter_orders(history):
+    async def collect():
+        return [r.order_id async for r in w.aiter_orders(page_size=2)]
+    assert asyncio.run(collect()) == list(range(1, 8))
+
+
+def test_summary():
+    recs = [w.OrderRecord.from_row(r) for r in [
+        _row(1, qty=1.0, px=100.0), _row(2, qty=1.0, px=200.0),
+        _row(3, side="SELL", qty=1.5, px=180.0),
+        _row(4, status="CANCELED"), _row(5, pair="ETH/USD", qty=2.0, px=10.0, fee=0.0)]]
+    out = summarize(recs)
+    assert out["orders"] == 5 and out["by_status"] == {"FILLED": 4, "CANCELED": 1}
+    btc = out["pairs"]["BTC/USD"]
+    assert btc["avg_buy_price"] == 150.0 and btc["net_qty"] == 0.5
+    assert btc["realised_pnl"] == pytest.approx(1.5 * (180 - 150))
+    assert btc["fees"] == {"USD": pytest.approx(0.3)} and btc["first_ms"] == 1_001
+    assert "realised_pnl" not in out["pairs"]["ETH/USD"]
+
+
+def test_summary_tool(history):
+    out = tools.getOrderSummary.invoke({})
+    assert out["orders"] == 7 and out["pairs"]["BTC/USD"]["filled_buy_qty"] == 7.0
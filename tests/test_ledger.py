@@ -0,0 +1,134 @@
+# tests/test_ledger.py
+import asyncio
+
+import pytest
+
+import src.wrappers as w
+from src import tools
+from src.ledger import Ledger
+
+
+@pytest.fixture
+def exchange(monkeypatch):
+    """A tiny exchange: wallet + pending orders, counting account calls."""
+    ex = {"wallet": {"BTC": {"Free": 1.0, "Lock": 0.0}, "USD": {"Free": 1000.0, "Lock": 0.0}},
+          "pending": [], "calls": 0}
+
+    def balance():
+        ex["calls"] += 1
+        return {"Success": True, "Wallet": {c: dict(b) for c, b in ex["wallet"].items()}}
+
+    def query(*, order_id=None, pair=None, offset=None, limit=None, pending_only=None):
+        ex["calls"] += 1
+        rows = ex["pending"][offset or 0:(offset or 0) + (limit or 100)]
+        if not rows:
+            raise w.RoostooError("Exchange error: no order matched")
+        return {"Success": True, "OrderMatched": rows}
+
+    async def abalance():
+        return balance()
+
+    async def aquery(**kw):
+        return query(**kw)
+
+    for name, fn in [("get_balance", balance), ("query_order", query),
+                     ("aget_balance", abalance), ("aquery_order", aquery)]:
+        monkeypatch.setattr(w, name, fn)
+    return ex
+
+
+def _order(oid, side, status, qty, price, filled=0.0):
+    return {"OrderDetail": {"OrderID": oid, "Pair": "BTC/USD", "Side": side, "Status": status,
+                            "Quantity": qty, "Price": price, "FilledQuantity": filled,
+                            "FilledAverPrice": price if filled else 0,
+                            "CommissionCoin": "USD", "CommissionChargeValue": 0.1 if filled else 0}}
+
+
+def test_reads_are_local_after_first_sync(exchange):
+    led = Ledger()
+    assert led.balance()["Wallet"]["BTC"]["Free"] == 1.0
+    calls = exchange["calls"]
+    led.balance(), led.pending_count(), led.query(pending_only=True)
+    assert exchange["calls"] == calls and led.stats()["local_reads"] == 4
+
+
+def test_fills_locks_and_cancels_apply_incrementally(exchange):
+    led = Ledger()
+    led.balance()
+    led.apply_order(_order(1, "BUY", "FILLED", 0.5, 100.0, filled=0.5))
+    led.apply_order(_order(2, "SELL", "PENDING", 0.25, 200.0))
+    led.apply_order(_order(3, "BUY", "PENDING", 1.0, 50.0))
+    wal = led.balance()["Wallet"]
+    assert wal["BTC"] == {"Free": 1.25, "Lock": 0.25}
+    assert wal["USD"] == pytest.approx({"Free": 1000 - 50 - 0.1 - 50, "Lock": 50.0})
+    assert led.pending_count() == {"Success": True, "ErrMsg": "", "TotalPending": 2,
+                                   "OrderPairs": {"BTC/USD": 2}}
+    assert [o["OrderID"] for o in led.query(pending_only=True)["OrderMatched"]] == [3, 2]
+    assert led.query(order_id="1")["OrderMatched"][0]["Status"] == "FILLED"
+
+    led.apply_cancel({"CanceledList": [3]})
+    assert led.balance()["Wallet"]["USD"]["Lock"] == 0.0
+    assert led.pending_count()["TotalPending"] == 1
+    assert not led.stats()["dirty"]
+
+
+def test_unexplained_state_triggers_reconcile(exchange):
+    led = Ledger()
+    led.balance()
+    led.apply_cancel({"CanceledList": [99]})             # not an order we know
+    assert led.stale
+    exchange["pending"] = [_order(7, "BUY", "PENDING", 1.0, 10.0)["OrderDetail"]]
+    exchange["wallet"]["USD"] = {"Free": 990.0, "Lock": 10.0}
+    assert led.pending_count()["OrderPairs"] == {"BTC/USD": 1}
+    assert led.stats()["mismatches"] == 1 and not led.stale
+
+
+def test_schedule_and_async(exchange):
+    led = Ledger(reconcile_s=0)
+    asyncio.run(led.abalance())
+    calls = exchange["calls"]
+    asyncio.run(led.apending_count())                    # interval 0 → always re‑sync
+    assert exchange["calls"] > calls
+
+
+def test_tools_go_through_the_ledger(exchange, monkeypatch):
+    led = Ledger(enabled=True)
+    monkeypatch.setattr(tools, "ledger", led)
+    monkeypatch.setattr(w, "place_order", lambda *a, **kw: _order(5, "SELL", "PENDING", 0.5, 300.0))
+    tools.getBalance.invoke({})
+    tools.placeOrder.invoke({"pair": "BTC/USD", "side": "sell", "type": "limit",
+                             "quantity": "0.5", "price": 300.0})
+    calls = exchange["calls"]
+    assert tools.getPendingCount.invoke({})["TotalPending"] == 1
+    assert tools.getBalance.invoke({})["Wallet"]["BTC"] == {"Free": 0.5, "Lock": 0.5}
+    assert exchange["calls"] == calls
+
+
+def test_lookups_by_id_skip_the_reconcile(exchange):
+    led = Ledger()
+    led.balance()
+    led.apply_order(_order(1, "BUY", "FILLED", 0.5, 100.0, filled=0.5))
+    led.apply_order(_order(2, "BUY", "PENDING", 1.0, 50.0))
+    led.invalidate()
+    calls = exchange["calls"]
+    assert led.query(order_id="1")["OrderMatched"][0]["Status"] == "FILLED"
+    assert exchange["calls"] == calls                    # finished: local, stale or not
+    with pytest.raises(w.RoostooError):
+        led.query(order_id="2")                          # resting: one exchange call …
+    assert exchange["calls"] == calls + 1 and led.stale  # … and no reconcile before it
+    asyncio.run(led.aquery(order_id="1"))
+    assert exchange["calls"] == calls + 1
+    led.query(pending_only=True)                         # the listing does need a sync
+    assert exchange["calls"] > calls + 1 and not led.stale
+
+
+def test_finished_orders_are_bounded_lru(exchange):
+    led = Ledger(final_keep=2)
+    led.balance()
+    for oid in (1, 2):
+        led.apply_order(_order(oid, "BUY", "FILLED", 0.1, 100.0, filled=0.1))
+    led.apply_order(_order(9, "BUY", "PENDING", 1.0, 50.0))
+    led.query(order_id="1")                              # 1 is now the most recent
+    led.apply_order(_order(3, "BUY", "FILLED", 0.1, 100.0, filled=0.1))
+    assert set(led.orders) == {1, 3, 9}                  # 2 evicted, the open order kept
+    assert led.pending_count()["TotalPending"] == 1
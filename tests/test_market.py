@@ -0,0 +1,85 @@
+# tests/test_market.py
+import math
+import time
+
+import numpy as np
+import pytest
+
+import src.wrappers as w
+from src.market import MarketData, RingBuffer, compute_stats
+
+
+def _tick(px, vol=0.0, bid=None, ask=None):
+    return {"LastPrice": px, "MaxBid": bid or px - 1, "MinAsk": ask or px + 1,
+            "CoinTradeValue": vol}
+
+
+def test_ring_buffer_wraps_oldest_first():
+    buf = RingBuffer(size=3)
+    for i in range(5):
+        assert buf.append(1000 * (i + 1), _tick(100 + i))
+    assert not buf.append(5000, _tick(1))                 # same server time again
+    ts, rows = buf.window()
+    assert len(buf) == 3 and ts.tolist() == [3000, 4000, 5000]
+    assert rows[:, 0].tolist() == [102, 103, 104]
+    assert buf.window(since_ms=4000)[0].tolist() == [4000, 5000]
+
+
+def test_stats():
+    ts = np.array([0, 1000, 2000, 3000], dtype=np.int64)
+    rows = np.array([[100, 99, 101, 10], [110, 109, 111, 12],
+                     [90, 89, 91, 11], [105, 104, 106, 14]], dtype=np.float64)
+    st = compute_stats(ts, rows)
+    assert st["samples"] == 4 and st["high"] == 110 and st["low"] == 90
+    assert st["return_pct"] == 5.0
+    # volume steps +2, -1 (→ 0), +3 weight the later prices
+    assert st["vwap"] == pytest.approx((110 * 2 + 105 * 3) / 5)
+    r = np.diff(np.log(rows[:, 0]))
+    assert st["volatility"] == pytest.approx(r.std(ddof=1))
+    assert st["volatility_1h"] == pytest.approx(r.std(ddof=1) * math.sqrt(3600))
+    assert compute_stats(ts[:0], rows[:0])["vwap"] is None
+
+
+def test_poller_feeds_buffers_and_ticker_cache(monkeypatch):
+    monkeypatch.setattr(w, "tickers", w.TickerCache())
+    clock = iter(range(1_000, 10**9, 1_000))
+
+    def fetch():
+        st = next(clock)
+        return {"Success": True, "ServerTime": st,
+                "Data": {"BTC/USD": _tick(100 + st / 1000), "ETH/USD": _tick(5)}}
+
+    md = MarketData(["BTC/USD"], poll_s=0.01, size=16, fetch=fetch)
+    for _ in range(4):
+        assert md.poll_once() == 1
+    assert md.stats("btc/usd", window_s=2)["samples"] == 3
+    assert md.history("BTC/USD", points=2)["points"] == [[1000, 101.0], [4000, 104.0]]
+
+    def no_http(*a, **kw):
+        raise AssertionError("ticker should come from the poller")
+
+    monkeypatch.setattr(w, "_request", no_http)
+    assert w.get_ticker("BTC/USD")["Data"]["BTC/USD"]["LastPrice"] == 104.0
+    with pytest.raises(w.RoostooError, match="watch‑list"):
+        md.stats("SOL/USD")
+
+
+def test_background_thread(monkeypatch):
+    monkeypatch.setattr(w, "tickers", w.TickerCache())
+    n = iter(range(1, 10**9))
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        if len(calls) == 2:
+            raise w.RoostooError("HTTP 502")              # survives a failed tick
+        return {"ServerTime": next(n), "Data": {"BTC/USD": _tick(1.0)}}
+
+    md = MarketData(["BTC/USD"], poll_s=0.005, fetch=fetch)
+    assert md.start() and not md.start()
+    deadline = time.monotonic() + 2
+    while len(md.buffers["BTC/USD"]) < 3 and time.monotonic() < deadline:
+        time.sleep(0.005)
+    md.stop()
+    assert not md.running and md.failures >= 1 and len(md.buffers["BTC/USD"]) >= 3
+    assert w.tickers.budgets["BTC/USD"] >= 0.01
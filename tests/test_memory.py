@@ -0,0 +1,188 @@
+# tests/test_memory.py
+import asyncio, threading, time
+
+import numpy as np
+import pytest
+
+from src import memory
+from src.memory import HashEmbeddings, LocalBackend, MemoryBackend, PineconeBackend
+
+
+def test_local_backend_suppresses_near_duplicates():
+    backend = LocalBackend(HashEmbeddings(), path=None, dedup=0.97)
+    backend.add(["BTC/USD last price 100", "BTC/USD last price 100", "ETH balance 3"],
+                [{}, {}, {}])
+    backend.add(["ETH balance 3"], [{}])
+    assert backend.size() == 2 and backend.skipped == 2
+    assert backend.search("BTC price", 1) == ["BTC/USD last price 100"]
+
+
+def test_backends_must_implement_the_storage_methods():
+    class NoCompact(MemoryBackend):
+        def _best_existing(self, vecs): return np.zeros(len(vecs))
+        def _insert(self, vecs, texts, metas): pass
+        def search(self, query, k): return []
+        def size(self): return 0
+
+    with pytest.raises(TypeError, match="compact"):
+        NoCompact(HashEmbeddings())
+    with pytest.raises(TypeError):
+        MemoryBackend(HashEmbeddings())
+
+
+class _SlowIndex:
+    """Stands in for PineconeVectorStore: 50 ms per top‑1 lookup."""
+
+    def __init__(self):
+        self.active = self.peak = 0
+        self._lock = threading.Lock()
+
+    def similarity_search_by_vector_with_score(self, vec, k=1):
+        with self._lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(0.05)
+        with self._lock:
+            self.active -= 1
+        return [(None, 0.5)]
+
+
+def test_pinecone_dedup_lookups_run_concurrently():
+    backend = object.__new__(PineconeBackend)          # skip the network client
+    backend.vs = _SlowIndex()
+    backend._lookups = memory.ThreadPoolExecutor(8)
+    t0 = time.perf_counter()
+    best = backend._best_existing([[1.0, 0.0]] * 8)
+    assert np.allclose(best, 0.5)
+    assert backend.vs.peak > 1
+    assert time.perf_counter() - t0 < 0.3                # ≈ one round trip, not eight
+
+
+class _PagedIndex:
+    """Stands in for the Pinecone index: lazy `list` pages, counted fetches."""
+
+    def __init__(self, vectors):
+        self.vectors, self.fetched, self.deleted, self.pages = vectors, [], [], 0
+
+    def list(self):
+        ids = list(self.vectors)
+        for start in range(0, len(ids), 3):
+            self.pages += 1
+            yield ids[start : start + 3]
+
+    def fetch(self, ids):
+        self.fetched.append(len(ids))
+        rows = {i: type("V", (), {"values": self.vectors[i][0],
+                                   "metadata": {"ts": self.vectors[i][1]}}) for i in ids}
+        return type("R", (), {"vectors": rows})
+
+    def delete(self, ids):
+        self.deleted += ids
+
+
+def test_pinecone_compact_pages_and_caps_the_pass():
+    vectors = {f"v{i}": ([1.0, 0.0] if i % 2 else [0.0, 1.0], float(i)) for i in range(10)}
+    backend = object.__new__(PineconeBackend)
+    backend.idx = _PagedIndex(vectors)
+    assert backend.compact(0.99, max_rows=4) == 2       # v0..v3: keeps newest of each pair
+    assert sorted(backend.idx.deleted) == ["v0", "v1"]
+    assert backend.idx.pages == 2 and sum(backend.idx.fetched) == 4
+
+    backend.idx = _PagedIndex(vectors)
+    assert backend.compact(0.99) == 8 and max(backend.idx.fetched) <= 100
+
+
+def test_writer_batches_by_size_and_flushes():
+    batches = []
+    writer = memory.MemoryWriter(lambda texts, metas: batches.append(texts),
+                                 batch=4, window_s=5)
+    for i in range(10):
+        writer.put(f"m{i}")
+    writer.close()
+    assert [len(b) for b in batches] == [4, 4, 2]
+    assert sum(batches, []) == [f"m{i}" for i in range(10)]
+    assert writer.written == 10 and writer.batches == 3
+
+
+def test_writer_survives_a_failing_sink():
+    seen = []
+
+    def sink(texts, metas):
+        if texts == ["boom"]:
+            raise RuntimeError("down")
+        seen.extend(texts)
+
+    writer = memory.MemoryWriter(sink, batch=1, window_s=0)
+    writer.put("boom")
+    writer.put("ok", {"k": 1})
+    writer.flush()
+    assert seen == ["ok"] and writer.failed == 1
+    writer.close()
+
+
+def test_writer_aput_applies_backpressure_off_loop():
+    gate, seen = threading.Event(), []
+
+    def sink(texts, metas):
+        gate.wait(1)
+        seen.extend(texts)
+
+    writer = memory.MemoryWriter(sink, maxsize=1, batch=1, window_s=0)
+
+    async def produce():
+        for i in range(4):
+            await writer.aput(f"m{i}")
+
+    async def main():
+        task = asyncio.create_task(produce())
+        await asyncio.sleep(0.05)
+        assert not task.done()                           # blocked on the full queue
+        gate.set()
+        await task
+
+    asyncio.run(main())
+    writer.close()
+    assert seen == ["m0", "m1", "m2", "m3"]
+
+
+class _CountingEmbeddings(HashEmbeddings):
+    """Records every batch that reaches the model."""
+
+    def __init__(self):
+        super().__init__(dim=16)
+        self.sent = []
+
+    def embed_documents(self, texts):
+        self.sent.append(list(texts))
+        return [HashEmbeddings.embed_query(self, t) for t in texts]
+
+    def embed_query(self, text):
+        self.sent.append([text])
+        return HashEmbeddings.embed_query(self, text)
+
+
+def test_cached_embeddings_hit_miss_and_batch_dedup():
+    inner = _CountingEmbeddings()
+    cached = memory.CachedEmbeddings(inner, maxsize=8)
+    first = cached.embed_documents(["a", "b", "a"])
+    assert inner.sent == [["a", "b"]]                   # duplicate embedded once
+    assert first[0] == first[2] and cached.misses == 3 and cached.hits == 0
+
+    assert cached.embed_query("b") == first[1]
+    assert cached.embed_documents(["a", "c"])[0] == first[0]
+    assert inner.sent == [["a", "b"], ["c"]]            # only the miss reaches the model
+    assert (cached.hits, cached.misses) == (2, 4)
+
+
+def test_cached_embeddings_evicts_least_recently_used():
+    inner = _CountingEmbeddings()
+    cached = memory.CachedEmbeddings(inner, maxsize=2)
+    cached.embed_documents(["a", "b"])
+    cached.embed_query("a")                             # refresh a → b is oldest
+    cached.embed_query("c")                             # evicts b
+    inner.sent.clear()
+    cached.embed_query("a")
+    cached.embed_query("b")
+    assert inner.sent == [["b"]] and len(cached._lru) == 2
+    asyncio.run(cached.aembed_documents(["b", "c"]))    # c was evicted by b
+    assert inner.sent == [["b"], ["c"]]
@@ -0,0 +1,60 @@
+# tests/test_nodes.py
+import asyncio
+
+import pytest
+
+import src.wrappers as w
+from src import nodes
+from src.agent_graph import app
+from src.agent_state import make_state
+from bench.fakes import Script, ScriptedChat
+from bench.mock_exchange import MockExchange
+
+SCRIPTS = {
+    "what do I hold?": Script(calls=[("getBalance", {})], answer="Mostly BTC."),
+    "explain my pending orders": Script(calls=[("getPendingCount", {})], answer="None."),
+}
+
+
+@pytest.fixture
+def recalls(monkeypatch):
+    """Counts vector recalls (sync and async) per prompt."""
+    seen = []
+
+    def retrieve(query, k=4):
+        seen.append(query)
+        return [f"memory about {query}"]
+
+    async def aretrieve(query, k=4):
+        return retrieve(query, k)
+
+    monkeypatch.setattr(nodes, "retrieve_memory", retrieve)
+    monkeypatch.setattr(nodes, "aretrieve_memory", aretrieve)
+    monkeypatch.setattr(nodes, "llm", ScriptedChat(scripts=SCRIPTS))
+    with MockExchange() as ex:
+        monkeypatch.setattr(w, "BASE", ex.url)
+        yield seen
+
+
+@pytest.mark.parametrize("mode", ["sync", "async"])
+def test_recall_runs_once_per_turn(recalls, mode):
+    def run(prompt):
+        if mode == "sync":
+            return app.invoke(make_state(prompt))
+        return asyncio.run(app.ainvoke(make_state(prompt)))
+
+    state = run("what do I hold?")                      # think → act → memory → think
+    assert state["result"] == "Mostly BTC." and state["loop_count"] == 1
+    assert recalls == ["what do I hold?"]               # no second recall after the loop
+    assert state["recalled"] == ["memory about what do I hold?"]
+    assert state["recalled_for"] == "what do I hold?"
+
+    run("explain my pending orders")                    # new prompt → fresh recall
+    assert recalls == ["what do I hold?", "explain my pending orders"]
+
+
+def test_needs_recall():
+    state = {**make_state("a"), "recalled_for": "a"}
+    assert not nodes._needs_recall(state)
+    assert nodes._needs_recall({**state, "text": "b"})
+    assert not nodes._needs_recall({**make_state("b"), "history": [{"user": "a"}]})
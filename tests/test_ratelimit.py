@@ -0,0 +1,107 @@
+# tests/test_ratelimit.py
+import asyncio, time
+
+import pytest
+
+import src.wrappers as w
+from src.ratelimit import RateGovernor, RateLimited, is_throttle, retry_after_s, traffic_class
+
+RATES = {"public": 20.0, "signed": 20.0, "order": 20.0, "global": 40.0}
+
+
+def gov(**kw):
+    return RateGovernor({**RATES, **kw.pop("rates", {})}, burst_s=kw.pop("burst_s", 0.1),
+                        enabled=True, **kw)
+
+
+def test_classification_and_parsing():
+    assert traffic_class("place_order", True) == "order"
+    assert traffic_class("balance", True) == "signed"
+    assert traffic_class("ticker", False) == "public"
+    assert retry_after_s("2") == 2.0 and retry_after_s(None) is None
+    assert retry_after_s("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0     # in the past
+    assert is_throttle(429) and is_throttle(451)
+    assert is_throttle(200, '{"Success":false,"ErrMsg":"rate limit exceeded"}')
+    assert not is_throttle(200, '{"Success":true,"Data":{"rate limit":1}}')
+    assert not is_throttle(500, "internal error")
+
+
+def test_bucket_smooths_bursts():
+    g = gov()                                               # burst = 2 tokens
+    t0 = time.monotonic()
+    for _ in range(6):
+        g.acquire("public")
+    assert time.monotonic() - t0 >= 4 / 20 * 0.9
+
+
+def test_throttle_backs_off_and_recovers():
+    g = gov()
+    assert g.observe("signed", 429, "0.2")
+    lv = g.levels()
+    assert lv["signed"]["rate"] == 10 and lv["signed"]["throttles"] == 1
+    assert lv["global"]["blocked_s"] > 0.1                  # Retry-After applies to everyone
+    t0 = time.monotonic()
+    g.acquire("public")
+    assert time.monotonic() - t0 >= 0.15
+    for _ in range(5):
+        g.observe("signed", 200)
+    assert g.levels()["signed"]["rate"] == 20
+
+
+def test_orders_go_before_reads():
+    g = gov(rates={"global": 10.0}, burst_s=0.4)            # 4 global tokens, 1 reserved
+    for _ in range(3):
+        assert g._take("public") == 0
+    assert g._take("public") > 0                            # reads stop at the reserve …
+    assert g._take("order") == 0                            # … which an order may use
+    assert g.levels()["global"]["tokens"] < 1
+
+
+def test_max_wait_raises_and_wrappers_surface_roostoo_error(monkeypatch):
+    g = gov(max_wait_s=0.05)
+    g.observe("public", 429, "5")
+    with pytest.raises(RateLimited):
+        g.acquire("public")
+    monkeypatch.setattr(w, "governor", g)
+    with pytest.raises(w.RoostooError, match="client rate limit"):
+        w._request("GET", "ticker")
+
+
+def test_async_acquire_is_fair_across_tasks():
+    g = gov(rates={"public": 50.0}, burst_s=0.02)
+
+    async def main():
+        t0 = time.monotonic()
+        await asyncio.gather(*(g.aacquire("public") for _ in range(10)))
+        return time.monotonic() - t0
+
+    assert asyncio.run(main()) >= 9 / 50 * 0.9
+
+
+class _Resp:
+    def __init__(self, status, body, headers=None):
+        self.status_code, self.reason = status, "x"
+        self.content, self.text = body.encode(), body
+        self.headers = headers or {}
+
+    def json(self):
+        import json
+        return json.loads(self.text)
+
+
+def test_request_feeds_status_back(monkeypatch):
+    g = gov()
+    monkeypatch.setattr(w, "governor", g)
+    replies = [_Resp(429, "{}", {"Retry-After": "0.05"}),
+               _Resp(200, '{"Success":true,"Data":{}}')]
+
+    class Session:
+        def get(self, url, **kw):
+            return replies.pop(0)
+
+    monkeypatch.setattr(w, "session", Session())
+    monkeypatch.setattr(w, "_backoff", lambda attempt: 0)
+    t0 = time.monotonic()
+    assert w._request("GET", "ticker") == {"Success": True, "Data": {}}
+    assert time.monotonic() - t0 >= 0.04                     # waited out Retry-After
+    assert g.levels()["public"]["throttles"] == 1
@@ -0,0 +1,118 @@
+# tests/test_response_cache.py
+import asyncio
+
+import pytest
+from langchain_core.messages import AIMessage
+
+import src.wrappers as w
+from src import nodes, response_cache
+from src.agent_graph import app
+from src.agent_state import make_state
+from src.response_cache import ResponseCache, normalise, tool_ttl
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    monkeypatch.setattr(response_cache, "ENABLED", True)
+    fresh = ResponseCache()
+    monkeypatch.setattr(nodes, "responses", fresh)
+    return fresh
+
+
+def test_normalise():
+    assert normalise("  What's the BTC/USD  price?? ") == normalise("what s the btc/usd price")
+
+
+def test_ttl_per_tool():
+    assert tool_ttl("placeOrder") == 0 and tool_ttl("getServerTime") == 0
+    assert tool_ttl("getTicker") == w.tickers.default_ttl_s
+    assert tool_ttl("getExchangeInfo") == w.EXINFO_TTL_S
+    assert tool_ttl("getBalance") == response_cache.ACCOUNT_TTL_S
+
+
+def test_store_lookup_and_expiry(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(response_cache.time, "monotonic", lambda: now[0])
+    c = ResponseCache()
+    assert c.store("BTC price?", "100", ["getTicker"])
+    assert c.lookup("btc price").answer == "100"
+    now[0] += w.tickers.default_ttl_s + 0.1
+    assert c.lookup("btc price") is None
+    assert not c.store("buy BTC", "done", ["getTicker", "placeOrder"])
+    assert not c.store("time", "1700", ["getServerTime"])
+
+
+def test_mutation_invalidates_account_answers():
+    c = ResponseCache()
+    c.store("my balance", "BTC 1", ["getBalance"])
+    c.store("pair info", "BTC/USD …", ["getExchangeInfo"])
+    c.note_mutation()
+    assert c.lookup("my balance") is None
+    assert c.lookup("pair info") is not None
+
+
+def test_lru_bound():
+    c = ResponseCache(maxsize=2)
+    for q in ("a", "b", "c"):
+        c.store(q, q.upper(), [])
+    assert c.lookup("a") is None and c.lookup("c").answer == "C"
+
+
+def test_semantic_hit():
+    vecs = {"btc price": [1.0, 0.0], "bitcoin price": [0.99, 0.05], "eth price": [0.0, 1.0]}
+    c = ResponseCache(semantic_sim=0.95, embed=lambda t: vecs[t])
+    c.store("BTC price", "100", [])
+    assert c.lookup("bitcoin price").answer == "100"
+    assert c.lookup("eth price") is None
+    assert c.stats()["semantic_hits"] == 1
+
+
+class _Chat:
+    def __init__(self):
+        self.calls = 0
+
+    def invoke(self, messages, **kw):
+        self.calls += 1
+        if self.calls % 2:
+            return AIMessage(content="", tool_calls=[
+                {"name": "getBalance", "args": {}, "id": f"c{self.calls}"}])
+        return AIMessage(content=f"answer {self.calls}")
+
+    async def ainvoke(self, messages, **kw):
+        return self.invoke(messages)
+
+
+def test_graph_serves_repeats_until_an_order(monkeypatch, cache):
+    monkeypatch.setattr(w, "get_balance", lambda: {"Wallet": {"BTC": {"Free": 1}}})
+    monkeypatch.setattr(w, "place_order", lambda **kw: {"Success": True})
+    chat = _Chat()
+    monkeypatch.setattr(nodes, "llm", chat)
+
+    text = "how much BTC could I sell right now?"         # not a fast‑path prompt
+    first = app.invoke(make_state(text))
+    assert first["result"] == "answer 2" and not first.get("cached")
+    again = app.invoke(make_state(text))
+    assert again["cached"] and again["result"] == "answer 2" and chat.calls == 2
+
+    nodes._act_update(make_state("buy"), [{"name": "placeOrder", "arguments": {}}],
+                      [{"tool": "placeOrder", "args": {}, "result": {}, "error": None}])
+    assert cache.generation == 1
+    assert app.invoke(make_state(text))["result"] == "answer 4"
+
+
+def test_async_graph_and_session_turns_bypass(monkeypatch, cache):
+    async def balance():
+        return {"Wallet": {}}
+
+    monkeypatch.setattr(w, "aget_balance", balance)
+    chat = _Chat()
+    monkeypatch.setattr(nodes, "llm", chat)
+
+    text = "is my account able to trade?"
+    asyncio.run(app.ainvoke(make_state(text)))
+    out = asyncio.run(app.ainvoke(make_state(text)))
+    assert out["cached"] and chat.calls == 2
+
+    follow_up = {**make_state(text), "history": [{"user": "hi", "assistant": "hello"}]}
+    asyncio.run(app.ainvoke(follow_up))
+    assert chat.calls == 4
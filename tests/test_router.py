@@ -0,0 +1,90 @@
+# tests/test_router.py
+import asyncio
+
+import pytest
+from langchain_core.messages import AIMessage
+
+import src.wrappers as w
+from src import nodes, router
+from src.agent_graph import app
+from src.agent_state import make_state
+
+
+@pytest.mark.parametrize("text, tool, args", [
+    ("server time", "getServerTime", {}),
+    ("What's the exchange time?", "getServerTime", {}),
+    ("my balance", "getBalance", {}),
+    ("pending orders", "getPendingCount", {}),
+    ("BTC/USD price", "getTicker", {"pair": "BTC/USD"}),
+    ("bitcoin price", "getTicker", {"pair": "BTC/USD"}),
+    ("price of BTC and ETH", "getTickers", {"pairs": ["BTC/USD", "ETH/USD"]}),
+])
+def test_trivial_intents_route(text, tool, args):
+    route = router.match(text)
+    assert route is not None and route.calls == [{"tool": tool, "args": args}]
+
+
+@pytest.mark.parametrize("text", [
+    "buy 0.1 BTC at market price",
+    "should I sell if the price drops?",
+    "my balance and the BTC price",                     # two intents
+    "price",                                            # no pair
+    "hello there",
+    "give me a long detailed report of every BTC/USD price move over the last week",
+])
+def test_unsure_prompts_go_to_the_llm(text):
+    assert router.match(text) is None
+
+
+def test_templates():
+    ok = lambda res: [{"result": res, "error": None}]
+    assert "BTC 0.5 (+0.1 locked)" in router._render_balance(
+        ok({"Wallet": {"BTC": {"Free": 0.5, "Lock": 0.1}, "ETH": {"Free": 0, "Lock": 0}}}))
+    assert router._render_pending(ok({"TotalPending": 2, "OrderPairs": {"BTC/USD": 2}})) \
+        == "You have 2 pending orders: BTC/USD 2."
+    line = router._render_ticker(ok({"Data": {"BTC/USD": {
+        "LastPrice": 100.0, "MaxBid": 99.0, "MinAsk": 101.0, "Change": 0.0123}}}))
+    assert line == "BTC/USD last price 100 (bid 99 / ask 101, 24h +1.23%)."
+
+
+class _NoLLM:
+    def __init__(self, answer="llm answer"):
+        self.calls, self.answer = 0, answer
+
+    def invoke(self, messages, **kw):
+        self.calls += 1
+        self.messages = messages
+        return AIMessage(content=self.answer)
+
+    async def ainvoke(self, messages, **kw):
+        return self.invoke(messages)
+
+
+def test_fast_path_skips_the_llm(monkeypatch):
+    async def server_time():
+        return 1_700_000_000_000
+
+    monkeypatch.setattr(w, "aget_server_time", server_time)
+    monkeypatch.setattr(w, "get_server_time", lambda: 1_700_000_000_000)
+    llm = _NoLLM()
+    monkeypatch.setattr(nodes, "llm", llm)
+
+    out = asyncio.run(app.ainvoke(make_state("server time")))
+    assert out["routed"] == "server_time" and llm.calls == 0
+    assert out["result"].startswith("The exchange server time is 1700000000000")
+    out = app.invoke(make_state("server time"))
+    assert out["routed"] == "server_time" and llm.calls == 0
+
+
+def test_tool_error_hands_outcome_to_the_llm(monkeypatch):
+    async def ticker(pair, max_age=None):
+        raise w.RoostooError("unknown pair")
+
+    monkeypatch.setattr(w, "aget_ticker", ticker)
+    llm = _NoLLM("That pair is not listed.")
+    monkeypatch.setattr(nodes, "llm", llm)
+
+    out = asyncio.run(app.ainvoke(make_state("XYZ/USD price")))
+    assert llm.calls == 1 and not out["routed"]
+    assert out["result"] == "That pair is not listed."
+    assert any("unknown pair" in m.content for m in llm.messages)
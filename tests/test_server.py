@@ -0,0 +1,103 @@
+# tests/test_server.py
+import asyncio, json
+
+import pytest
+from langchain_core.messages import AIMessageChunk
+
+import backend.server as srv
+
+
+class _Clock:
+    def __init__(self):
+        self.t = 100.0
+
+    def monotonic(self):
+        return self.t
+
+    def perf_counter(self):
+        return self.t
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    c = _Clock()
+    monkeypatch.setattr(srv, "time", c)
+    monkeypatch.setattr(srv, "FRAME_CHARS", 8)
+    monkeypatch.setattr(srv, "FRAME_MS", 40)
+    return c
+
+
+def test_framer_flushes_by_size_by_age_and_at_the_end(clock):
+    f = srv._TokenFramer()
+    assert f.push("ab") is None and f.push("cd") is None
+    clock.t += 0.05                                     # oldest token is 50 ms old
+    assert f.push("e") == "abcde"
+    assert f.push("0123456789") == "0123456789"         # big enough on its own
+    assert f.push("x") is None
+    assert f.flush() == "x" and f.flush() is None
+
+
+def _tok(text, node="think"):
+    return "messages", (AIMessageChunk(content=text), {"langgraph_node": node})
+
+
+class _StubGraph:
+    """astream replays a fixed run: think tokens, a tool call, the answer."""
+
+    def __init__(self, clock):
+        self.clock = clock
+
+    async def astream(self, state, config, stream_mode):
+        yield "updates", {"cache": {}}
+        yield "updates", {"route": {}}
+        yield _tok("", node="think")                    # empty chunks are skipped
+        yield "updates", {"think": {"actions": [{"name": "getBalance", "arguments": {}}]}}
+        yield "custom", {"event": "tool_start", "tool": "getBalance", "args": {}}
+        yield "custom", {"event": "tool_end", "tool": "getBalance", "ok": True, "ms": 3.0}
+        yield "updates", {"act": {"result": {"Wallet": {}}}}
+        yield _tok("I checked", node="act")             # not from think: not streamed
+        for piece in ("You ", "hold ", "none."):
+            self.clock.t += 0.01
+            yield _tok(piece)
+        yield "updates", {"think": {"result": "You hold none.", "recalled": ["m"]}}
+
+
+def _events(body: str):
+    out = []
+    for block in body.strip().split("\n\n"):
+        event, data = block.split("\n", 1)
+        data = data[len("data: "):]
+        out.append((event[len("event: "):], data if data == "[DONE]" else json.loads(data)))
+    return out
+
+
+def test_stream_agent_event_order(clock, monkeypatch):
+    monkeypatch.setattr(srv, "agent_app", _StubGraph(clock))
+
+    async def collect():
+        return "".join([chunk async for chunk in srv.stream_agent("what do I hold?")])
+
+    events = _events(asyncio.run(collect()))
+    assert [e for e, _ in events] == [
+        "node", "node", "node", "tool_start", "tool_end", "node",
+        "token", "token", "node", "result", "done"]
+    assert [d["node"] for e, d in events if e == "node"] == ["cache", "route", "think",
+                                                             "act", "think"]
+    tokens = [d["text"] for e, d in events if e == "token"]
+    assert tokens == ["You hold ", "none."]             # size flush, then flushed by the update
+    assert events[-2][1] == {"result": "You hold none.", "recalled": ["m"]}
+    assert events[-1] == ("done", "[DONE]")
+
+
+def test_stream_agent_reports_errors_then_done(monkeypatch):
+    class Broken:
+        async def astream(self, *a, **kw):
+            raise RuntimeError("boom")
+            yield
+
+    monkeypatch.setattr(srv, "agent_app", Broken())
+
+    async def collect():
+        return "".join([chunk async for chunk in srv.stream_agent("hi")])
+
+    assert _events(asyncio.run(collect())) == [("error", {"error": "boom"}), ("done", "[DONE]")]
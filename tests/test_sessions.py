@@ -0,0 +1,94 @@
+# tests/test_sessions.py
+import asyncio
+
+from langchain_core.messages import AIMessage
+from langgraph.checkpoint.base import empty_checkpoint
+
+from src import nodes
+from src.agent_graph import compile_app
+from src.agent_state import make_state
+from src.sessions import BoundedMemorySaver, SessionLocks
+
+
+def _put(saver, tid, versions=None):
+    ckpt = empty_checkpoint()
+    if versions:
+        ckpt["channel_versions"] = versions
+        ckpt["channel_values"] = {ch: f"{ch}@{v}" for ch, v in versions.items()}
+    return saver.put({"configurable": {"thread_id": tid, "checkpoint_ns": ""}},
+                     ckpt, {}, versions or {})
+
+
+def test_lru_eviction_beyond_max_sessions():
+    saver = BoundedMemorySaver(max_sessions=2, ttl_s=60)
+    for tid in "abc":
+        _put(saver, tid)
+    assert sorted(saver.storage) == ["b", "c"]
+    assert saver.active == 2 and saver.evicted == 1
+    assert saver                                        # stays truthy for compile()
+
+
+def test_idle_sessions_expire(monkeypatch):
+    saver = BoundedMemorySaver(max_sessions=10, ttl_s=30)
+    clock = iter([0.0, 100.0, 100.0])
+    monkeypatch.setattr("src.sessions.time.monotonic", lambda: next(clock))
+    _put(saver, "old")
+    _put(saver, "new")
+    assert list(saver.storage) == ["new"]
+
+
+def test_prunes_old_checkpoints_and_their_blobs():
+    saver = BoundedMemorySaver(keep=2)
+    for v in range(1, 5):
+        _put(saver, "t", {"x": f"{v:02d}"})
+    assert len(saver.storage["t"][""]) == 2
+    assert sorted(k[3] for k in saver.blobs) == ["03", "04"]
+
+
+def test_session_locks_are_shared_per_id():
+    locks = SessionLocks()
+    a = locks("s")
+    assert locks("s") is a and locks("other") is not a
+
+
+class _Chat:
+    """Minimal stand‑in for the tool‑bound chat model."""
+
+    def __init__(self, *answers):
+        self.answers, self.prompts = list(answers), []
+
+    def invoke(self, messages, **kw):
+        self.prompts.append(messages)
+        return AIMessage(content=self.answers.pop(0))
+
+    async def ainvoke(self, messages, **kw):
+        return self.invoke(messages)
+
+
+def test_follow_up_uses_history_not_stale_recalls(monkeypatch):
+    recalls = []
+
+    async def recall(query, k=4):
+        recalls.append(query)
+        return ["remembered snippet"]
+
+    monkeypatch.setattr(nodes, "aretrieve_memory", recall)
+    chat = _Chat("first answer", "second answer")
+    monkeypatch.setattr(nodes, "llm", chat)
+
+    app = compile_app(BoundedMemorySaver())
+    cfg = {"configurable": {"thread_id": "s1"}}
+
+    async def turns():
+        one = await app.ainvoke(make_state("first"), cfg)
+        two = await app.ainvoke(make_state("follow up"), cfg)
+        return one, two
+
+    one, two = asyncio.run(turns())
+    assert recalls == ["first"]
+    assert one["recalled"] == ["remembered snippet"]
+    assert two["recalled"] == [] and two["result"] == "second answer"
+    assert two["history"][-1] == {"user": "follow up", "assistant": "second answer"}
+    contents = [m.content for m in chat.prompts[1]]
+    assert "remembered snippet" not in contents
+    assert contents[-3:] == ["first", "first answer", "follow up"]
@@ -0,0 +1,77 @@
+# tests/test_strategy.py
+import asyncio
+
+import pytest
+
+import src.wrappers as w
+from src import nodes, strategy
+from src.agent_graph import app, dispatch
+from src.agent_state import make_state
+from bench.fakes import Script, ScriptedChat
+from bench.mock_exchange import MockExchange
+
+TARGETS = {"BTC": 0.5, "ETH": 0.25, "USD": 0.25}
+
+
+@pytest.fixture
+def exchange(monkeypatch):
+    with MockExchange() as ex:
+        monkeypatch.setattr(w, "BASE", ex.url)
+        yield ex
+
+
+def _weights(ex: MockExchange) -> dict:
+    values = {c: b["Free"] * (ex.prices[f"{c}/USD"] if c != "USD" else 1.0)
+              for c, b in ex.wallet.items()}
+    total = sum(values.values())
+    return {c: v / total for c, v in values.items()}
+
+
+def test_dispatch_sends_strategy_batches_to_execute():
+    run = {"name": "runStrategy", "arguments": {"strategy": "liquidate"}}
+    read = {"name": "getBalance", "arguments": {}}
+    assert dispatch({**make_state("x"), "actions": [run]}) == "execute"
+    assert dispatch({**make_state("x"), "actions": [run, read]}) == "act"
+    assert dispatch(make_state("x")) == "end"
+
+
+def test_rebalance_takes_two_llm_calls(exchange, monkeypatch):
+    prompt = "rebalance to 50% BTC, 25% ETH, rest USD"
+    llm = ScriptedChat(scripts={prompt: Script(
+        calls=[("runStrategy", {"strategy": "rebalance",
+                                "params": {"targets": TARGETS, "tolerance": 0}})],
+        answer="Rebalanced.")})
+    monkeypatch.setattr(nodes, "llm", llm)
+
+    state = asyncio.run(app.ainvoke(make_state(prompt)))
+    assert state["result"] == "Rebalanced." and llm.calls == 2
+    assert state["tools_used"] == ["runStrategy"] and not state.get("error")
+    weights = _weights(exchange)
+    assert weights["BTC"] == pytest.approx(0.5, abs=0.02)
+    assert weights["ETH"] == pytest.approx(0.25, abs=0.02)
+    assert exchange.wallet["SOL"]["Free"] == 0 and exchange.wallet["DOGE"]["Free"] == 0
+    assert exchange.counts.get("balance") == 1        # one read of each kind, then orders
+
+
+def test_dry_run_sizes_locally_and_skips_dust(exchange):
+    report = strategy.run("orders", {"dry_run": True, "orders": [
+        {"pair": "BTC/USD", "side": "BUY", "value": 100},
+        {"pair": "DOGE/USD", "side": "BUY", "value": 0.5},
+        {"pair": "ETH/USD", "side": "SELL", "fraction": 0.5}]})
+    assert report["error"] is None and not report["placed"]
+    by_pair = {o["pair"]: o for o in report["orders"]}
+    assert [o["side"] for o in report["orders"]] == ["SELL", "BUY"]     # sells go first
+    assert by_pair["ETH/USD"]["quantity"] == "5.0000"
+    assert len(by_pair["BTC/USD"]["quantity"].split(".")[1]) == 5
+    assert report["skipped"][0]["pair"] == "DOGE/USD" and "minimum" in report["skipped"][0]["reason"]
+    assert "place_order" not in exchange.counts
+
+
+def test_rejected_phase_stops_the_plan(exchange):
+    report = asyncio.run(strategy.arun("orders", {"orders": [
+        {"pair": "ETH/USD", "side": "SELL", "quantity": 500},
+        {"pair": "BTC/USD", "side": "BUY", "value": 100}]}))
+    assert "insufficient balance" in report["error"]
+    assert len(report["placed"]) == 1 and exchange.counts.get("place_order") == 1
+    with pytest.raises(ValueError, match="Unknown strategy"):
+        strategy.run("martingale", {})
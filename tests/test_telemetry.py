@@ -0,0 +1,118 @@
+# tests/test_telemetry.py
+import asyncio, json, threading
+
+import httpx
+import pytest
+
+from src import telemetry
+from src.nodes import traced_node
+from src.telemetry import registry, span
+
+
+@pytest.fixture(autouse=True)
+def clean():
+    registry.reset()
+    yield
+    registry.reset()
+
+
+def _hist(name, **labels):
+    return registry.histograms[name][telemetry._key(labels)]
+
+
+def test_span_records_latency_and_errors():
+    for _ in range(3):
+        with span("tool", tool="getTicker"):
+            pass
+    with pytest.raises(KeyError):
+        with span("tool", tool="getTicker"):
+            raise KeyError("x")
+    with span("tool", tool="getBalance") as sp:
+        sp.fail("exchange said no")
+
+    assert _hist("r0_tool_seconds", tool="getTicker").count == 4
+    errors = registry.counters["r0_tool_errors_total"]
+    assert errors[telemetry._key({"tool": "getTicker"})] == 1
+    assert errors[telemetry._key({"tool": "getBalance"})] == 1
+
+
+def test_traced_node_wraps_sync_and_async():
+    @traced_node("demo")
+    def node(state):
+        return {"actions": []}
+
+    @traced_node("demo")
+    async def anode(state):
+        return {"actions": []}
+
+    assert node({}) == {"actions": []}
+    assert asyncio.run(anode({})) == {"actions": []}
+    assert _hist("r0_node_seconds", node="demo").count == 2
+
+
+def test_render_is_prometheus_text():
+    with span("http", endpoint="ticker") as sp:
+        sp.label(status="2xx")
+    telemetry.count("r0_llm_tokens_total", 12, direction="input")
+    registry.gauges(lambda: [("r0_demo_level", {"bucket": "a\"b"}, 1.5)])
+    try:
+        text = registry.render()
+    finally:
+        registry._gauges.pop()
+
+    assert '# TYPE r0_http_seconds histogram' in text
+    assert 'r0_http_seconds_bucket{endpoint="ticker",status="2xx",le="+Inf"} 1' in text
+    assert 'r0_http_seconds_count{endpoint="ticker",status="2xx"} 1' in text
+    assert 'r0_llm_tokens_total{direction="input"} 12' in text
+    assert 'r0_demo_level{bucket="a\\"b"} 1.5' in text
+
+
+def test_sampled_trace_follows_children_across_threads(monkeypatch, tmp_path):
+    path = tmp_path / "trace.jsonl"
+    monkeypatch.setattr(telemetry, "TRACE_SAMPLE", 1.0)
+    monkeypatch.setattr(telemetry, "TRACE_PATH", str(path))
+
+    def child():
+        with span("http", endpoint="balance"):
+            pass
+
+    with span("turn", mode="invoke"):
+        with span("node", node="act"):
+            t = threading.Thread(target=telemetry.propagate(child))
+            t.start()
+            t.join()
+
+    rows = [json.loads(l) for l in path.read_text().splitlines()]
+    assert [r["kind"] for r in rows] == ["http", "node", "turn"]
+    assert len({r["trace"] for r in rows}) == 1
+    http, node, turn = rows
+    assert http["parent"] == node["span"] and node["parent"] == turn["span"]
+    assert turn["parent"] is None and http["endpoint"] == "balance"
+
+
+def test_unsampled_spans_write_no_trace(monkeypatch, tmp_path):
+    path = tmp_path / "trace.jsonl"
+    monkeypatch.setattr(telemetry, "TRACE_SAMPLE", 0.0)
+    monkeypatch.setattr(telemetry, "TRACE_PATH", str(path))
+    with span("turn", mode="invoke"):
+        with span("node", node="think"):
+            pass
+    assert not path.exists()
+
+
+def test_metrics_endpoint(monkeypatch):
+    from backend.server import api
+
+    async def scrape():
+        with span("node", node="route"):
+            pass
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=api),
+                                     base_url="http://t") as client:
+            return await client.get("/metrics")
+
+    r = asyncio.run(scrape())
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("text/plain")
+    assert 'r0_node_seconds_count{node="route"} 1' in r.text
+    assert 'r0_rate_tokens{bucket="global"}' in r.text
+    assert "r0_memory_write_queue 0" in r.text
@@ -0,0 +1,57 @@
+# tests/test_tools.py
+import asyncio
+
+import pytest
+
+import src.wrappers as w
+from src import tools
+
+
+@pytest.fixture
+def exchange(monkeypatch):
+    """Stub the wrappers the tools call; records every ticker request."""
+    seen = []
+
+    def ticker(pair, max_age=None):
+        seen.append(pair)
+        if pair == "BAD/USD":
+            raise w.RoostooError("unknown pair")
+        return {"pair": pair, "LastPrice": 100.0}
+
+    async def aticker(pair, max_age=None):
+        return ticker(pair)
+
+    monkeypatch.setattr(w, "get_ticker", ticker)
+    monkeypatch.setattr(w, "aget_ticker", aticker)
+    return seen
+
+
+CALLS = [
+    {"tool": "getTicker", "args": {"pair": "BTC/USD"}},
+    {"tool": "getTicker", "args": {}},                       # schema violation
+    {"tool": "getTicker", "args": {"pair": "BAD/USD"}},      # exchange rejection
+    {"tool": "noSuchTool", "args": {}},
+]
+
+
+def _check(outcomes):
+    assert [o["tool"] for o in outcomes] == [c["tool"] for c in CALLS]
+    assert outcomes[0]["result"] == {"pair": "BTC/USD", "LastPrice": 100.0}
+    assert outcomes[0]["error"] is None
+    assert "pair" in outcomes[1]["error"]
+    assert outcomes[2]["error"] == "unknown pair"
+    assert "Unknown tool" in outcomes[3]["error"]
+
+
+def test_bad_call_does_not_fail_the_batch(exchange):
+    _check(tools.run_tool_calls(CALLS))
+
+
+def test_bad_call_does_not_fail_the_async_batch(exchange):
+    _check(asyncio.run(tools.arun_tool_calls(CALLS)))
+
+
+def test_mutating_calls_are_barriers():
+    calls = [{"tool": "getTicker"}, {"tool": "getBalance"}, {"tool": "placeOrder"},
+             {"tool": "getTicker"}, {"tool": "cancelOrder"}]
+    assert list(tools._segments(calls)) == [[0, 1], [2], [3], [4]]
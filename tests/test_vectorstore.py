@@ -0,0 +1,92 @@
+# tests/test_vectorstore.py
+import json, os
+
+import numpy as np
+import pytest
+
+from src.vectorstore import LocalVectorStore, novel_mask, redundant_rows
+
+
+def _vec(i: int, dim: int = 8) -> list:
+    v = np.zeros(dim, dtype=np.float32)
+    v[i % dim] = 1.0
+    return v.tolist()
+
+
+def test_search_returns_best_first():
+    store = LocalVectorStore()
+    store.add([_vec(0), _vec(1), _vec(2)], ["a", "b", "c"])
+    hits = store.search(_vec(1), k=2)
+    assert hits[0][1] == "b" and hits[0][0] > hits[1][0]
+    assert len(store) == 3
+
+
+def test_persists_across_reload(tmp_path):
+    store = LocalVectorStore(str(tmp_path))
+    store.add([_vec(0), _vec(1)], ["a", "b"], [{"n": 1}, {"n": 2}])
+    again = LocalVectorStore(str(tmp_path))
+    assert again.texts == ["a", "b"] and again.metas == [{"n": 1}, {"n": 2}]
+    assert again.search(_vec(1), k=1)[0][1] == "b"
+
+
+def test_torn_log_line_is_truncated_before_next_append(tmp_path):
+    store = LocalVectorStore(str(tmp_path))
+    store.add([_vec(0), _vec(1)], ["a", "b"])
+    with open(tmp_path / "log.jsonl", "a", encoding="utf-8") as f:
+        f.write('{"text": "c", "me')                    # crash mid‑append
+
+    store = LocalVectorStore(str(tmp_path))
+    assert store.texts == ["a", "b"]
+    store.add([_vec(3)], ["d"])
+
+    store = LocalVectorStore(str(tmp_path))
+    assert store.texts == ["a", "b", "d"]
+    assert store.search(_vec(3), k=1)[0][1] == "d"
+    with open(tmp_path / "log.jsonl", encoding="utf-8") as f:
+        assert [json.loads(line)["text"] for line in f] == ["a", "b", "d"]
+
+
+def test_grows_past_initial_capacity(tmp_path):
+    store = LocalVectorStore(str(tmp_path), initial_capacity=2)
+    store.add([_vec(i) for i in range(5)], list("abcde"))
+    again = LocalVectorStore(str(tmp_path), initial_capacity=2)
+    assert again.texts == list("abcde")
+    assert again.search(_vec(4), k=1)[0][1] == "e"
+
+
+def test_compact_keeps_newest_of_each_cluster(tmp_path):
+    store = LocalVectorStore(str(tmp_path))
+    store.add([_vec(0), _vec(1), _vec(0)], ["old", "other", "new"])
+    assert store.compact(0.99) == 1
+    assert store.texts == ["other", "new"]
+    assert LocalVectorStore(str(tmp_path)).texts == ["other", "new"]
+
+
+def test_compact_interrupted_before_commit_keeps_old_generation(tmp_path, monkeypatch):
+    store = LocalVectorStore(str(tmp_path))
+    store.add([_vec(0), _vec(1), _vec(0)], ["old", "other", "new"])
+
+    def crash(gen):                                     # new files written, header not switched
+        raise OSError("disk gone")
+    monkeypatch.setattr(store, "_write_header", crash)
+    with pytest.raises(OSError):
+        store.compact(0.99)
+    assert store.texts == ["old", "other", "new"]       # in‑memory state untouched
+
+    again = LocalVectorStore(str(tmp_path))
+    assert again.texts == ["old", "other", "new"]
+    assert again.search(_vec(1), k=1)[0][1] == "other"  # rows still line up with the log
+    assert sorted(os.listdir(tmp_path)) == ["header.json", "log.jsonl", "vectors.f32"]
+
+    assert again.compact(0.99) == 1                     # and the next attempt commits
+    again.add([_vec(2)], ["third"])
+    reloaded = LocalVectorStore(str(tmp_path))
+    assert reloaded.texts == ["other", "new", "third"]
+    assert reloaded.search(_vec(2), k=1)[0][1] == "third"
+    assert "vectors.f32" not in os.listdir(tmp_path)
+
+
+def test_novel_mask_and_redundant_rows():
+    vecs = np.asarray([_vec(0), _vec(0), _vec(1)], dtype=np.float32)
+    assert novel_mask(vecs, np.array([-1.0, -1.0, 1.0]), 0.99).tolist() == [True, False, False]
+    assert redundant_rows(vecs, 0.99).tolist() == [0]
@@ -0,0 +1,477 @@
+# tests/test_wrappers.py
+import asyncio, json, threading, time
+
+import pytest
+
+import src.wrappers as w
+from src.wrappers import AsyncSingleFlight, SingleFlight, TickerCache
+
+
+def test_singleflight_shares_one_execution():
+    flight, calls, results = SingleFlight(), [], []
+    gate = threading.Event()
+
+    def slow():
+        calls.append(1)
+        gate.wait(1)
+        return 42
+
+    threads = [threading.Thread(target=lambda: results.append(flight.do("k", slow)))
+               for _ in range(8)]
+    for t in threads:
+        t.start()
+    time.sleep(0.05)
+    gate.set()
+    for t in threads:
+        t.join()
+    assert calls == [1] and results == [42] * 8
+    assert flight.do("k", lambda: 7) == 7                 # key released afterwards
+
+
+def test_singleflight_propagates_errors_to_waiters():
+    flight = SingleFlight()
+    with pytest.raises(KeyError):
+        flight.do("k", lambda: {}["missing"])
+    assert flight.do("k", lambda: 1) == 1
+
+
+def test_async_singleflight_shares_one_task():
+    flight, calls = AsyncSingleFlight(), []
+
+    async def slow():
+        calls.append(1)
+        await asyncio.sleep(0.02)
+        return "v"
+
+    async def main():
+        return await asyncio.gather(*(flight.do("k", slow) for _ in range(5)))
+
+    assert asyncio.run(main()) == ["v"] * 5 and calls == [1]
+
+
+@pytest.fixture
+def ticker_api(monkeypatch):
+    """All‑pairs /ticker lists BTC and ETH only; counts requests."""
+    hits = []
+
+    def request(method, endpoint, params=None, **kw):
+        hits.append((params or {}).get("pair", "*"))
+        data = {"BTC/USD": {"LastPrice": 100.0}, "ETH/USD": {"LastPrice": 10.0}}
+        if params and params.get("pair"):
+            data = {k: v for k, v in data.items() if k == params["pair"]}
+        return {"Success": True, "ErrMsg": "", "ServerTime": 1, "Data": data}
+
+    monkeypatch.setattr(w, "_request", request)
+    return hits
+
+
+def test_get_many_batches_and_serves_from_cache(ticker_api):
+    cache = TickerCache(default_ttl_s=60)
+    assert set(cache.get_many(["BTC/USD", "ETH/USD"])) == {"BTC/USD", "ETH/USD"}
+    cache.get_many(["BTC/USD", "ETH/USD"])
+    assert ticker_api == ["*"]
+
+
+def test_unlisted_pair_is_reported_and_not_refetched(ticker_api):
+    cache = TickerCache(default_ttl_s=60)
+    out = cache.get_many(["BTC/USD", "NOPE/USD"])
+    assert out["BTC/USD"]["LastPrice"] == 100.0
+    assert out["NOPE/USD"] == {"error": "Unknown pair: NOPE/USD"}
+    again = cache.get_many(["BTC/USD", "NOPE/USD"])
+    assert again == out and ticker_api == ["*"]
+
+
+def test_follower_of_an_all_pairs_call_fetches_what_it_still_lacks(ticker_api, monkeypatch):
+    cache, gate, request = TickerCache(default_ttl_s=60), threading.Event(), w._request
+
+    def gated(method, endpoint, params=None, **kw):
+        if not params:
+            gate.wait(1)                                 # hold the leader's all‑pairs call
+        return request(method, endpoint, params, **kw)
+
+    monkeypatch.setattr(w, "_request", gated)
+    out = {}
+    threads = [threading.Thread(target=lambda: out.update(
+                   leader=cache.get_many(["BTC/USD", "ETH/USD"]))),
+               threading.Thread(target=lambda: out.update(
+                   follower=cache.get_many(["BTC/USD", "NOPE/USD"])))]
+    threads[0].start()
+    time.sleep(0.02)
+    threads[1].start()                                   # joins the leader's flight
+    time.sleep(0.05)
+    gate.set()
+    for t in threads:
+        t.join()
+    assert set(out["leader"]) == {"BTC/USD", "ETH/USD"}
+    assert out["follower"]["BTC/USD"]["LastPrice"] == 100.0
+    assert out["follower"]["NOPE/USD"] == {"error": "Unknown pair: NOPE/USD"}
+    assert sorted(ticker_api) == ["*", "NOPE/USD"]     # one shared call + the leftover pair
+
+
+def test_async_follower_of_an_all_pairs_call_fetches_what_it_still_lacks(monkeypatch):
+    hits = []
+
+    async def arequest(method, endpoint, params=None, **kw):
+        hits.append((params or {}).get("pair", "*"))
+        await asyncio.sleep(0.01)
+        data = {"BTC/USD": {"LastPrice": 100.0}, "ETH/USD": {"LastPrice": 10.0}}
+        if params and params.get("pair"):
+            data = {k: v for k, v in data.items() if k == params["pair"]}
+        return {"Success": True, "ErrMsg": "", "ServerTime": 1, "Data": data}
+
+    monkeypatch.setattr(w, "_arequest", arequest)
+    cache = TickerCache(default_ttl_s=60)
+
+    async def main():
+        return await asyncio.gather(cache.aget_many(["BTC/USD", "ETH/USD"]),
+                                    cache.aget_many(["ETH/USD", "NOPE/USD"]))
+
+    lead, follow = asyncio.run(main())
+    assert set(lead) == {"BTC/USD", "ETH/USD"}
+    assert follow["NOPE/USD"] == {"error": "Unknown pair: NOPE/USD"}
+    assert sorted(hits) == ["*", "NOPE/USD"]
+
+
+# ── bulk orders ───────────────────────────────────────────────────────
+@pytest.fixture
+def order_api(monkeypatch):
+    info = w.ExchangeInfoCache()
+    info._store({"TradePairs": {
+        "BTC/USD": {"PricePrecision": 2, "AmountPrecision": 4, "MiniOrder": 1, "CanTrade": True},
+        "OLD/USD": {"PricePrecision": 2, "AmountPrecision": 2, "MiniOrder": 1, "CanTrade": False},
+    }})
+    monkeypatch.setattr(w, "exchange_info", info)
+    monkeypatch.setattr(w, "tickers", TickerCache())
+    sent, state = [], {"in_flight": 0, "peak": 0}
+    lock = threading.Lock()
+
+    def place(body):
+        with lock:
+            sent.append(body)
+            state["in_flight"] += 1
+            state["peak"] = max(state["peak"], state["in_flight"])
+        time.sleep(0.02)
+        with lock:
+            state["in_flight"] -= 1
+        if body["quantity"] == "0.5000":
+            raise w.RoostooError("insufficient balance")
+        return {"Success": True, "OrderDetail": {"OrderID": len(sent)}}
+
+    def request(method, path, params=None, signed=False, **kw):
+        assert path == "place_order"
+        return place(params)
+
+    async def arequest(method, path, params=None, signed=False, **kw):
+        await asyncio.sleep(0)
+        return await asyncio.to_thread(place, params)
+
+    monkeypatch.setattr(w, "_request", request)
+    monkeypatch.setattr(w, "_arequest", arequest)
+    return sent, state
+
+
+ORDERS = [
+    {"pair": "BTC/USD", "side": "buy", "type": "limit", "quantity": "0.123456", "price": 100.005},
+    {"pair": "BTC/USD", "side": "sell", "type": "LIMIT", "quantity": "0.00001", "price": 100},
+    {"pair": "XYZ/USD", "side": "BUY", "type": "MARKET", "quantity": "1"},
+    {"pair": "OLD/USD", "side": "BUY", "type": "MARKET", "quantity": "1"},
+    {"pair": "BTC/USD", "side": "BUY", "type": "LIMIT", "quantity": "0.001", "price": 100},
+    {"pair": "BTC/USD", "side": "BUY", "type": "LIMIT", "quantity": "0.5", "price": 10},
+] + [{"pair": "BTC/USD", "side": "BUY", "type": "MARKET", "quantity": "1"}] * 6
+
+
+def _check_bulk(out, sent, state):
+    res = out["results"]
+    assert [r["index"] for r in res] == list(range(len(ORDERS)))
+    assert res[0]["ok"] and res[0]["order"] == {"pair": "BTC/USD", "side": "BUY", "type": "LIMIT",
+                                                "quantity": "0.1234", "price": 100.0}
+    assert "rounds to 0" in res[1]["error"] and res[1]["stage"] == "validation"
+    assert "Unknown pair" in res[2]["error"]
+    assert "not tradable" in res[3]["error"]
+    assert "below the minimum" in res[4]["error"]
+    assert res[5]["stage"] == "exchange" and "insufficient" in res[5]["error"]
+    assert (out["placed"], out["rejected"], out["failed"]) == (7, 4, 1)
+    assert len(sent) == 8 and state["peak"] <= 3
+
+
+def test_place_orders_validates_locally_and_limits_in_flight(order_api):
+    out = w.place_orders(ORDERS, max_in_flight=3)
+    _check_bulk(out, *order_api)
+    assert order_api[1]["peak"] > 1                       # actually concurrent
+
+
+def test_aplace_orders(order_api):
+    out = asyncio.run(w.aplace_orders(ORDERS, max_in_flight=3))
+    _check_bulk(out, *order_api)
+
+
+def test_market_min_value_uses_cached_price(order_api):
+    w.tickers._store({"ServerTime": 1, "Data": {"BTC/USD": {"LastPrice": 100.0}}})
+    out = w.place_orders([{"pair": "BTC/USD", "side": "BUY", "type": "MARKET",
+                           "quantity": "0.001"}])
+    assert out["rejected"] == 1 and "below the minimum" in out["results"][0]["error"]
+
+
+# ── server clock / exchangeInfo cache ─────────────────────────────────
+class _FakeTime:
+    """Stands in for the `time` module inside src.wrappers."""
+
+    def __init__(self):
+        self.mono, self.wall = 1000.0, 1_700_000_000.0
+
+    def monotonic(self):
+        return self.mono
+
+    def time(self):
+        return self.wall
+
+    def advance(self, s):
+        self.mono += s
+        self.wall += s
+
+    def __getattr__(self, name):
+        return getattr(time, name)
+
+
+@pytest.fixture
+def fake_time(monkeypatch):
+    ft = _FakeTime()
+    monkeypatch.setattr(w, "time", ft)
+    spawned = []
+
+    def spawn(fn, name):                                # background work runs inline
+        spawned.append(name)
+        fn()
+    monkeypatch.setattr(w, "_spawn", spawn)
+    ft.spawned = spawned
+    return ft
+
+
+@pytest.fixture
+def server_time(monkeypatch, fake_time):
+    """serverTime is 250 ms ahead of the local wall clock; counts requests."""
+    calls = []
+
+    def request(method, endpoint, params=None, **kw):
+        calls.append(endpoint)
+        return {"ServerTime": int(fake_time.wall * 1000) + 250}
+
+    monkeypatch.setattr(w, "_request", request)
+    return calls
+
+
+def test_clock_offset_comes_from_the_lowest_rtt_sample():
+    clock = w.ServerClock(window=3)
+    clock.observe(1500, 1000, 1100)                     # rtt 100 → offset 450
+    clock.observe(2305, 2000, 2010)                     # rtt 10  → offset 300
+    clock.observe(4000, 3000, 3200)                     # rtt 200 → offset 900
+    assert clock.offset_ms == 300
+    for t in (5000, 6000, 7000):                        # window rolls past the best one
+        clock.observe(t + 100, t, t + 50)               # rtt 50 → offset 75
+    assert clock.offset_ms == 75
+
+
+def test_server_time_is_answered_locally_while_fresh(monkeypatch, server_time, fake_time):
+    clock = w.ServerClock(resync_s=60)
+    monkeypatch.setattr(w, "clock", clock)
+    first = w.get_server_time()
+    assert server_time == ["serverTime"] and clock.offset_ms == pytest.approx(250)
+
+    fake_time.advance(10)
+    assert w.get_server_time() == pytest.approx(first + 10_000, abs=1)
+    assert server_time == ["serverTime"]                # no round trip
+
+    fake_time.advance(60)
+    w.get_server_time()
+    assert server_time == ["serverTime"] * 2
+
+
+def test_prepare_stamps_exchange_time_and_resyncs_in_background(monkeypatch, server_time,
+                                                                 fake_time):
+    clock = w.ServerClock(resync_s=60)
+    clock.observe(int(fake_time.wall * 1000) + 250, fake_time.wall * 1000,
+                  fake_time.wall * 1000)
+    monkeypatch.setattr(w, "clock", clock)
+
+    payload, hdr = w._prepare({"pair": "BTC/USD"}, signed=False, timestamp=True)
+    assert payload == f"pair=BTC/USD&timestamp={int(fake_time.wall * 1000) + 250}"
+    assert hdr == {} and fake_time.spawned == []        # fresh: no resync
+
+    fake_time.advance(61)
+    w._prepare(None, signed=False, timestamp=True)
+    assert fake_time.spawned == ["roostoo-clock"] and server_time == ["serverTime"]
+    assert not clock.stale
+
+
+def test_failed_background_resync_backs_off(monkeypatch, fake_time):
+    def down(*a, **kw):
+        raise w.RoostooError("Network/HTTP error")
+    monkeypatch.setattr(w, "_request", down)
+    clock = w.ServerClock(resync_s=60)
+    clock.maybe_resync()
+    clock.maybe_resync()                                # inside RETRY_S: not retried
+    assert fake_time.spawned == ["roostoo-clock"]
+    fake_time.advance(w.ServerClock.RETRY_S + 1)
+    clock.maybe_resync()
+    assert len(fake_time.spawned) == 2
+
+
+@pytest.fixture
+def exinfo_api(monkeypatch):
+    calls = []
+
+    def request(method, endpoint, params=None, **kw):
+        calls.append(endpoint)
+        return {"TradePairs": {"BTC/USD": {"PricePrecision": 2, "AmountPrecision": len(calls),
+                                           "MiniOrder": 1, "CanTrade": True}}}
+
+    monkeypatch.setattr(w, "_request", request)
+    return calls
+
+
+def test_exchange_info_refreshes_after_ttl_and_keeps_serving(exinfo_api, fake_time):
+    cache = w.ExchangeInfoCache(ttl_s=300)
+    assert cache.rule("BTC/USD").amount_precision == 1
+    fake_time.advance(200)
+    assert cache.rule("BTC/USD").amount_precision == 1 and exinfo_api == ["exchangeInfo"]
+
+    fake_time.advance(200)                              # expired → background refresh
+    cache.get()
+    assert fake_time.spawned == ["roostoo-exinfo"] and len(exinfo_api) == 2
+    assert cache.rule("BTC/USD").amount_precision == 2
+
+
+def test_exchange_info_cold_load_is_shared(monkeypatch):
+    calls, gate = [], threading.Event()
+
+    def request(method, endpoint, params=None, **kw):
+        calls.append(endpoint)
+        gate.wait(1)
+        return {"TradePairs": {}}
+
+    monkeypatch.setattr(w, "_request", request)
+    cache = w.ExchangeInfoCache()
+    threads = [threading.Thread(target=cache.get) for _ in range(8)]
+    for t in threads:
+        t.start()
+    time.sleep(0.05)
+    gate.set()
+    for t in threads:
+        t.join()
+    assert calls == ["exchangeInfo"]
+
+    acalls = []
+
+    async def arequest(method, endpoint, params=None, **kw):
+        acalls.append(endpoint)
+        await asyncio.sleep(0.01)
+        return {"TradePairs": {}}
+
+    monkeypatch.setattr(w, "_arequest", arequest)
+    cold = w.ExchangeInfoCache()
+
+    async def main():
+        await asyncio.gather(*(cold.aget() for _ in range(8)))
+    asyncio.run(main())
+    assert acalls == ["exchangeInfo"]
+
+
+def test_async_client_follows_the_running_loop(monkeypatch):
+    from bench.mock_exchange import MockExchange
+
+    async def fetch():
+        await w.aget_pending_count()
+        return w._get_aclient()
+
+    with MockExchange() as ex:
+        monkeypatch.setattr(w, "BASE", ex.url)
+        first = asyncio.run(fetch())
+        second = asyncio.run(fetch())                   # new loop: no dead connections reused
+    assert first is not second and not second.is_closed
+    assert len([l for l in w._aclients if l.is_closed()]) <= 1   # older ones pruned
+
+
+# ── request path: signing, retries ────────────────────────────────────
+def test_sign_matches_a_fresh_hmac():
+    import hashlib, hmac
+
+    for payload in ("pair=BTC/USD&timestamp=1", "", "quantity=0.1&side=BUY&timestamp=2"):
+        fresh = hmac.new(w.SECRET.encode(), payload.encode(), hashlib.sha256).hexdigest()
+        assert w._sign(payload) == fresh
+    assert w._sign("a=1") == w._sign("a=1")             # the shared key schedule is untouched
+
+
+class _Resp:
+    def __init__(self, status, body):
+        self.status_code, self.reason, self.headers = status, "x", {}
+        self.text = json.dumps(body)
+        self.content = self.text.encode()
+
+    def json(self):
+        return json.loads(self.text)
+
+
+class _Governor:
+    def acquire(self, traffic):
+        pass
+
+    async def aacquire(self, traffic):
+        pass
+
+    def observe(self, *a):
+        pass
+
+
+@pytest.fixture
+def transport(monkeypatch):
+    """Scripted statuses per attempt for both the requests session and httpx."""
+    sent, script = [], []
+
+    def reply(method, url, headers):
+        path, _, query = url.partition("?")
+        sent.append((method, path.rsplit("/", 1)[-1], query,
+                     {k.lower(): v for k, v in headers.items()}))
+        status = script.pop(0) if script else 200
+        return status, ({"Success": True, "ErrMsg": ""} if status == 200 else {"ErrMsg": "busy"})
+
+    class Session:
+        def get(self, url, headers, timeout):
+            return _Resp(*reply("GET", url, headers))
+
+        def post(self, url, data, headers, timeout):
+            return _Resp(*reply("POST", url, headers))
+
+    def handler(request):
+        status, body = reply(request.method, str(request.url), request.headers)
+        return w.httpx.Response(status, json=body)
+
+    monkeypatch.setattr(w, "session", Session())
+    monkeypatch.setattr(w, "governor", _Governor())
+    monkeypatch.setattr(w, "_backoff", lambda attempt: 0)
+    monkeypatch.setattr(w, "_get_aclient",
+                        lambda: w.httpx.AsyncClient(transport=w.httpx.MockTransport(handler)))
+    return sent, script
+
+
+@pytest.mark.parametrize("mode", ["sync", "async"])
+def test_gets_retry_on_retry_status_posts_go_once(transport, mode):
+    sent, script = transport
+    call = (w._request if mode == "sync"
+            else lambda *a, **kw: asyncio.run(w._arequest(*a, **kw)))
+
+    script[:] = [503, 429]
+    assert call("GET", "balance", signed=True)["Success"]
+    assert [s[1] for s in sent] == ["balance"] * 3
+    assert all(hdr["msg-signature"] == w._sign(query) for _, _, query, hdr in sent)
+
+    sent.clear()
+    script[:] = [503] * (w.MAX_RETRIES + 1)
+    with pytest.raises(w.RoostooError, match="HTTP 503"):
+        call("GET", "ticker", {"pair": "BTC/USD"}, timestamp=True)
+    assert len(sent) == 1 + w.MAX_RETRIES
+
+    sent.clear()
+    script[:] = [503]
+    with pytest.raises(w.RoostooError, match="HTTP 503"):
+        call("POST", "place_order", {"pair": "BTC/USD"}, signed=True)
+    assert [s[:2] for s in sent] == [("POST", "place_order")]   # an order is never resent